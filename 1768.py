@@ -4,8 +4,8 @@ from __future__ import print_function
 
 __description__ = 'Analyze Cobalt Strike beacons'
 __author__ = 'Didier Stevens'
-__version__ = '0.0.16'
-__date__ = '2022/08/20'
+__version__ = '0.0.19'
+__date__ = '2026/10/18'
 
 """
 Source code put in the public domain by Didier Stevens, no Copyright
@@ -56,12 +56,17 @@ History:
   2022/07/31: 0.0.15 update class cAPIOptions
   2022/08/17: added option --sanitycheck; refactored FinalTests
   2022/08/20: 0.0.16 added output instructions to JSON output
+  2026/10/18: 0.0.17 faster byte statistics: CalculateBytePrevalence
+  2026/10/18: added XORChainVectorized
+  2026/10/18: 0.0.18 added option --memorydump, FindAllWindowed, AnalyzeMemoryDump
+  2026/10/18: 0.0.19 added result cache: options --cache, --no-cache and --cache-stats
 
 Todo:
 
 """
 
 import optparse
+import operator
 import sys
 import os
 import binascii
@@ -78,6 +83,8 @@ import fnmatch
 import json
 import time
 import hashlib
+import mmap
+import sqlite3
 try:
     import pyzipper as zipfile
 except ImportError:
@@ -123,6 +130,15 @@ The sanity check checks for the presence of config values 1 and 7, and check if
 1 -> known payload type
 7 -> public key starts with 308
 
+Option --memorydump treats the input as a (process) memory dump: no PE file or shellcode detection is done, the file is searched for 'i' and '.' encoded configs and each config found is decoded and reported once (configs are deduplicated with SHA-256).
+With this option, files on disk are memory mapped in stead of read into memory: the file is scanned window per window (16 MB), and only the 64 KB window of each candidate config is decoded. This allows to analyze process dumps that are larger than the available memory.
+Data that can not be memory mapped (stdin, extracted ZIP files, cut expressions, ...) is read into memory and then scanned the same way.
+
+Option --cache takes the filename of a SQLite database to cache results. The results (output and config) of each analyzed file are stored in this database, with as key the SHA256 of the file content, the version of this tool and the options that influence the output (-r, -s, -S, -c, -V, -H, --memorydump and the content of 1768.json).
+When the same content is analyzed again with the same version and options, the results are taken from the database: the only processing done is calculating the SHA256 hash. This is useful when the same sample store is analyzed regularly.
+Use option --no-cache to ignore the cached results: all files are analyzed again, and the new results are stored in the database.
+Use option --cache-stats to print statistics (hits, misses, stored results and database entries) to stderr after all files have been processed.
+
 Option -V (--verbose) produces more output:
 - verbosity for config values (like the private key for leaked keys)
 - hex/ascii dump of found signatures
@@ -1419,20 +1435,42 @@ class cLogfile():
             self.Line('Finish', '%d error(s)' % self.errors, '%d second(s)' % (time.time() - self.starttime))
             self.oOutput.Close()
 
+BYTE_PREVALENCE_CACHE_SIZE = 0x100
+dBytePrevalenceCache = {}
+
+def NumPy():
+    # NumPy is only imported when it is needed: importing it takes more time than calculating the statistics of small data
+    try:
+        import numpy
+    except ImportError:
+        return None
+    return numpy
+
+# the prevalence is memoized by the SHA-256 of the data (for example, %ENTROPY%, %BYTESTATS% and %HISTOGRAM% count the bytes of the same data), the oldest entry is removed when the cache is full
+def CalculateBytePrevalence(data):
+    key = hashlib.sha256(data).digest()
+    if not key in dBytePrevalenceCache:
+        dPrevalence = {iter: 0 for iter in range(0x100)}
+        numpy = None
+        if len(data) >= 0x100000:
+            numpy = NumPy()
+        if numpy != None:
+            dPrevalence.update(enumerate(numpy.bincount(numpy.frombuffer(data, dtype=numpy.uint8), minlength=0x100).tolist()))
+        else:
+            dPrevalence.update(collections.Counter(bytearray(data)))
+        while len(dBytePrevalenceCache) >= BYTE_PREVALENCE_CACHE_SIZE:
+            dBytePrevalenceCache.pop(next(iter(dBytePrevalenceCache)), None)
+        dBytePrevalenceCache[key] = dPrevalence
+    return dict(dBytePrevalenceCache[key])
+
 def CalculateByteStatistics(dPrevalence=None, data=None):
     averageConsecutiveByteDifference = None
     if dPrevalence == None:
         dPrevalence = {iter: 0 for iter in range(0x100)}
-        sumDifferences = 0.0
-        previous = None
         if len(data) > 1:
-            for byte in data:
-                byte = C2IIP2(byte)
-                dPrevalence[byte] += 1
-                if previous != None:
-                    sumDifferences += abs(byte - previous)
-                previous = byte
-            averageConsecutiveByteDifference = sumDifferences /float(len(data)-1)
+            dPrevalence = CalculateBytePrevalence(data)
+            data = bytearray(data)
+            averageConsecutiveByteDifference = sum(map(abs, map(operator.sub, data[1:], data[:-1]))) / float(len(data) - 1)
     sumValues = sum(dPrevalence.values())
     countNullByte = dPrevalence[0]
     countControlBytes = 0
@@ -1499,7 +1537,13 @@ def PrefixIfNeeded(string, prefix=' '):
     else:
         return prefix + string
 
+dXorTables = {}
+
 def Xor(data, key):
+    if len(key) == 1:
+        if not key in dXorTables:
+            dXorTables[key] = bytes(bytearray([iter ^ P23Ord(key[0]) for iter in range(0x100)]))
+        return bytes(data).translate(dXorTables[key])
     data = C2SIP3(data)
     key = C2SIP3(key)
     return C2BIP3(''.join(chr(ord(data[i]) ^ ord(key[i % len(key)])) for i in range(len(data))))
@@ -1514,6 +1558,27 @@ def FindAll(data, sub):
         result.append(position)
         start = position + 1
 
+SCAN_WINDOW_SIZE = 0x1000000
+CONFIG_WINDOW_SIZE = 0x10000
+
+# data can be bytes or an mmap object: find is done window per window (no copies) and the windows overlap by the length of the longest search minus 1
+def FindAllWindowed(data, searches, windowSize=SCAN_WINDOW_SIZE):
+    overlap = max([len(search) for search in searches]) - 1
+    length = len(data)
+    windowStart = 0
+    while windowStart < length:
+        windowNext = windowStart + windowSize
+        windowEnd = min(windowNext + overlap, length)
+        positions = []
+        for search in searches:
+            position = data.find(search, windowStart, windowEnd)
+            while position != -1 and position < windowNext:
+                positions.append(position)
+                position = data.find(search, position + 1, windowEnd)
+        for position in sorted(positions):
+            yield position
+        windowStart = windowNext
+
 def FindAllList(data, searches):
     result = []
     for element in searches:
@@ -2160,13 +2225,19 @@ def XORChainFast(iKey, encodedData):
         index += formatLength
     return oDATA.getvalue()
 
+def XORChainVectorized(iKey, encodedData):
+    # decoded word n = encoded word n XOR encoded word n-1 (the key for word 0): the encoded data is XORed with itself shifted by one word, as 2 big integers
+    if sys.version_info[0] < 3:
+        return XORChainFast(iKey, encodedData)
+    length = len(encodedData) // 4 * 4
+    if length == 0:
+        return b''
+    encodedData = encodedData[:length]
+    shiftedData = struct.pack('<I', iKey) + encodedData[:-4]
+    return (int.from_bytes(encodedData, 'little') ^ int.from_bytes(shiftedData, 'little')).to_bytes(length, 'little')
+
 def XORChain(iKey, encodedData):
-    fast = XORChainFast(iKey, encodedData)
-    return fast
-    slow = XORChainSlow(iKey, encodedData)
-    if slow != fast:
-        raise Exception('slow != fast')
-    return fast
+    return XORChainVectorized(iKey, encodedData)
 
 def TryXORChainDecoding(data):
     if len(data) < 0x100:
@@ -2223,6 +2294,28 @@ def FinalTests(data, options, oOutput):
                 oOutput.Line('  ... signature ...')
                 oOutput.Line(cDump(data[position+len(signature):position+len(signature)+0x100], '  ', position+len(signature)).HexAsciiDump(rle=True), eol='')
 
+# data can be bytes or an mmap object: only the config window of each candidate is read and decoded
+def AnalyzeMemoryDump(data, oOutput, options):
+    dConfigs = {}
+    for position in FindAllWindowed(data, [START_CONFIG_I, START_CONFIG_DOT]):
+        result, dJSON = AnalyzeEmbeddedPEFileSub(data[position:position + CONFIG_WINDOW_SIZE], options)
+        configSha256 = hashlib.sha256(''.join(result).encode()).hexdigest()
+        if not configSha256 in dConfigs:
+            dConfigs[configSha256] = True
+            if result != [ERROR_SANITY_CHECK]:
+                oOutput.JSON(dJSON)
+                for line in result:
+                    oOutput.Line(line)
+    FinalTests(data, options, oOutput)
+
+def MemoryMapBinaryFile(oBinaryFile):
+    if oBinaryFile.extracted or oBinaryFile.fIn == sys.stdin:
+        return None
+    try:
+        return mmap.mmap(oBinaryFile.fIn.fileno(), 0, access=mmap.ACCESS_READ)
+    except:
+        return None
+
 #a# this is a kludge, to fix later when I have time
 def ProcessBinaryFileSub(sectiondata, data, oOutput, options):
     payloadType, payloadSize, intxorkey, id2, sectiondata = Unpack('<IIII', sectiondata)
@@ -2265,6 +2358,92 @@ def ProcessBinaryFileSub(sectiondata, data, oOutput, options):
     FinalTests(payload, options, oOutput)
     return True
 
+def ProcessMemoryDump(filename, data, oOutput, oLogfile, options):
+    if options.hash:
+        oOutput.Line('MD5   : %s' % hashlib.md5(data).hexdigest())
+        oOutput.Line('SHA1  : %s' % hashlib.sha1(data).hexdigest())
+        oOutput.Line('SHA256: %s' % hashlib.sha256(data).hexdigest())
+    try:
+        AnalyzeMemoryDump(data, oOutput, options)
+    except:
+        oLogfile.LineError('Processing file %s %s' % (filename, repr(sys.exc_info()[1])))
+        if not options.ignoreprocessingerrors:
+            raise
+        return False
+    return True
+
+class cOutputRecorder(object):
+    def __init__(self, oOutput):
+        self.oOutput = oOutput
+        self.events = []
+
+    def JSON(self, dJSON):
+        self.events.append(['JSON', dJSON])
+        self.oOutput.JSON(dJSON)
+
+    def Line(self, line, eol='\n'):
+        self.events.append(['Line', line, eol])
+        self.oOutput.Line(line, eol)
+
+class cResultCache(object):
+    def __init__(self, filename, options):
+        self.connection = sqlite3.connect(filename)
+        self.connection.execute('CREATE TABLE IF NOT EXISTS results (sha256 TEXT, version TEXT, options TEXT, events TEXT, PRIMARY KEY (sha256, version, options))')
+        self.optionsKey = json.dumps([options.raw, options.select, options.sanitycheck, options.csv, options.verbose, options.hash, options.memorydump, hashlib.sha256(json.dumps(GetJSONData(), sort_keys=True).encode()).hexdigest()])
+        self.hits = 0
+        self.misses = 0
+        self.stored = 0
+
+    def Get(self, sha256):
+        row = self.connection.execute('SELECT events FROM results WHERE sha256 = ? AND version = ? AND options = ?', (sha256, __version__, self.optionsKey)).fetchone()
+        if row == None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        events = json.loads(row[0])
+        for event in events:
+            if event[0] == 'JSON':
+                event[1] = dict([(int(key), value) for key, value in event[1].items()])
+        return events
+
+    def Put(self, sha256, events):
+        try:
+            eventsJSON = json.dumps(events)
+        except:
+            return
+        self.connection.execute('INSERT OR REPLACE INTO results VALUES (?, ?, ?, ?)', (sha256, __version__, self.optionsKey, eventsJSON))
+        self.stored += 1
+        if self.stored % 100 == 0:
+            self.connection.commit()
+
+    def Stats(self):
+        entries = self.connection.execute('SELECT COUNT(*) FROM results').fetchone()[0]
+        return 'Cache: %d hit(s), %d miss(es), %d stored, %d entries' % (self.hits, self.misses, self.stored, entries)
+
+    def Close(self):
+        self.connection.commit()
+        self.connection.close()
+
+# results are cached by SHA256 of the data, tool version and options that influence the output
+def ProcessDataCached(function, filename, data, oOutput, oLogfile, options):
+    if options.oResultCache == None:
+        return function(filename, data, oOutput, oLogfile, options)
+    sha256 = hashlib.sha256(data).hexdigest()
+    if not options.nocache:
+        events = options.oResultCache.Get(sha256)
+        if events != None:
+            for event in events:
+                if event[0] == 'JSON':
+                    oOutput.JSON(event[1])
+                else:
+                    oOutput.Line(event[1], event[2])
+            return True
+    oOutputRecorder = cOutputRecorder(oOutput)
+    if function(filename, data, oOutputRecorder, oLogfile, options):
+        options.oResultCache.Put(sha256, oOutputRecorder.events)
+        return True
+    return False
+
 def ProcessBinaryFile(filename, content, cutexpression, flag, oOutput, oLogfile, options):
     if content == None:
         try:
@@ -2273,6 +2452,14 @@ def ProcessBinaryFile(filename, content, cutexpression, flag, oOutput, oLogfile,
             oLogfile.LineError('Opening file %s %s' % (filename, repr(sys.exc_info()[1])))
             return
         oLogfile.Line('Success', 'Opening file %s' % filename)
+        if options.memorydump and cutexpression == '':
+            oMmap = MemoryMapBinaryFile(oBinaryFile)
+            if oMmap != None:
+                oOutput.Line('File: %s (memory mapped)' % filename)
+                ProcessDataCached(ProcessMemoryDump, filename, oMmap, oOutput, oLogfile, options)
+                oMmap.close()
+                oBinaryFile.close()
+                return
         try:
             data = oBinaryFile.read()
         except:
@@ -2285,6 +2472,12 @@ def ProcessBinaryFile(filename, content, cutexpression, flag, oOutput, oLogfile,
         data = content
         oOutput.Line('File: %s' % (filename))
 
+    if options.memorydump:
+        ProcessDataCached(ProcessMemoryDump, filename, data, oOutput, oLogfile, options)
+    else:
+        ProcessDataCached(ProcessBinaryData, filename, data, oOutput, oLogfile, options)
+
+def ProcessBinaryData(filename, data, oOutput, oLogfile, options):
     if options.hash:
         oOutput.Line('MD5   : %s' % hashlib.md5(data).hexdigest())
         oOutput.Line('SHA1  : %s' % hashlib.sha1(data).hexdigest())
@@ -2328,22 +2521,14 @@ def ProcessBinaryFile(filename, content, cutexpression, flag, oOutput, oLogfile,
             oOutput.Line(cDump(data).HexAsciiDump(rle=False))
             FinalTests(data, options, oOutput)
         else:
-            dConfigs = {}
-            for position in FindAll(data, START_CONFIG_I) + FindAll(data, START_CONFIG_DOT):
-                result, dJSON = AnalyzeEmbeddedPEFileSub(data[position:position+0x10000], options)
-                configSha256 = hashlib.sha256(''.join(result).encode()).hexdigest()
-                if not configSha256 in dConfigs:
-                    dConfigs[configSha256] = True
-                    if result != [ERROR_SANITY_CHECK]:
-                        oOutput.JSON(dJSON)
-                        for line in result:
-                            oOutput.Line(line)
-            FinalTests(data, options, oOutput)
+            AnalyzeMemoryDump(data, oOutput, options)
         # ----------------------------------------------
     except:
         oLogfile.LineError('Processing file %s %s' % (filename, repr(sys.exc_info()[1])))
         if not options.ignoreprocessingerrors:
             raise
+        return False
+    return True
 
 def FormatTime(epoch=None):
     if epoch == None:
@@ -2478,6 +2663,8 @@ class cAPIOptions(object):
         self.verbose = False
         self.hash = False
         self.sanitycheck = False
+        self.memorydump = False
+        self.oResultCache = None
 
 class cAPIOutput(object):
     def __init__(self):
@@ -2535,6 +2722,7 @@ https://DidierStevens.com'''
     oParser.add_option('-S', '--sanitycheck', action='store_true', default=False, help='Exclude configs that do not pass sanity check')
     oParser.add_option('-o', '--output', type=str, default='', help='Output to file (# supported)')
     oParser.add_option('-l', '--licenseids', default='', help='License ID(s)/Watermark(s) to generate YARA rules for')
+    oParser.add_option('--memorydump', action='store_true', default=False, help='Scan the file as a memory dump (memory mapped, for large files)')
     oParser.add_option('-c', '--csv', action='store_true', default=False, help='Output config in CSV format')
     oParser.add_option('-p', '--password', default='infected', help='The ZIP password to be used (default infected)')
     oParser.add_option('-n', '--noextraction', action='store_true', default=False, help='Do not extract from archive file')
@@ -2547,6 +2735,9 @@ https://DidierStevens.com'''
     oParser.add_option('-V', '--verbose', action='store_true', default=False, help='Verbose output')
     oParser.add_option('--logfile', type=str, default='', help='Create logfile with given keyword')
     oParser.add_option('--logcomment', type=str, default='', help='A string with comments to be included in the log file')
+    oParser.add_option('--cache', type=str, default='', help='SQLite database file to cache results')
+    oParser.add_option('--no-cache', dest='nocache', action='store_true', default=False, help='Do not use cached results (results are recalculated and stored)')
+    oParser.add_option('--cache-stats', dest='cachestats', action='store_true', default=False, help='Print cache statistics')
     oParser.add_option('--ignoreprocessingerrors', action='store_true', default=False, help='Ignore errors during file processing')
     (options, args) = oParser.parse_args()
 
@@ -2559,6 +2750,15 @@ https://DidierStevens.com'''
         print('Error: option -j can not be used with files')
         return
 
+    if (options.nocache or options.cachestats) and options.cache == '':
+        print('Error: options --no-cache and --cache-stats require option --cache')
+        return
+
+    if options.cache == '':
+        options.oResultCache = None
+    else:
+        options.oResultCache = cResultCache(options.cache, options)
+
     oLogfile = cLogfile(options.logfile, options.logcomment)
     oExpandFilenameArguments = cExpandFilenameArguments(args, options.literalfilenames, options.recursedir, options.checkfilenames, '#c#', '#f#')
     oLogfile.Line('FilesCount', str(len(oExpandFilenameArguments.Filenames())))
@@ -2570,6 +2770,11 @@ https://DidierStevens.com'''
 
     ProcessBinaryFiles(oExpandFilenameArguments.Filenames(), oLogfile, options)
 
+    if options.oResultCache != None:
+        if options.cachestats:
+            PrintError(options.oResultCache.Stats())
+        options.oResultCache.Close()
+
     if oLogfile.errors > 0:
         PrintError('Number of errors: %d' % oLogfile.errors)
     oLogfile.Close()
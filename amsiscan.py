@@ -4,8 +4,8 @@ from __future__ import print_function
 
 __description__ = 'Scan input with AmsiScanBuffer'
 __author__ = 'Didier Stevens'
-__version__ = '0.0.1'
-__date__ = '2019/06/12'
+__version__ = '0.0.2'
+__date__ = '2026/10/18'
 
 """
 Source code put in the public domain by Didier Stevens, no Copyright
@@ -19,12 +19,14 @@ History:
   2019/04/27: continue
   2019/06/02: refactor
   2019/06/12: refactor, man page, Python 3
+  2026/10/18: 0.0.2 faster byte statistics: CalculateBytePrevalence
 
 Todo:
   Document flag arguments in man page
 """
 
 import optparse
+import hashlib
 import sys
 import os
 import zipfile
@@ -1322,20 +1324,42 @@ class cLogfile():
             self.Line('Finish', '%d error(s)' % self.errors, '%d second(s)' % (time.time() - self.starttime))
             self.oOutput.Close()
 
+BYTE_PREVALENCE_CACHE_SIZE = 0x100
+dBytePrevalenceCache = {}
+
+def NumPy():
+    # NumPy is only imported when it is needed: importing it takes more time than calculating the statistics of small data
+    try:
+        import numpy
+    except ImportError:
+        return None
+    return numpy
+
+# the prevalence is memoized by the SHA-256 of the data (for example, %ENTROPY%, %BYTESTATS% and %HISTOGRAM% count the bytes of the same data), the oldest entry is removed when the cache is full
+def CalculateBytePrevalence(data):
+    key = hashlib.sha256(data).digest()
+    if not key in dBytePrevalenceCache:
+        dPrevalence = {iter: 0 for iter in range(0x100)}
+        numpy = None
+        if len(data) >= 0x100000:
+            numpy = NumPy()
+        if numpy != None:
+            dPrevalence.update(enumerate(numpy.bincount(numpy.frombuffer(data, dtype=numpy.uint8), minlength=0x100).tolist()))
+        else:
+            dPrevalence.update(collections.Counter(bytearray(data)))
+        while len(dBytePrevalenceCache) >= BYTE_PREVALENCE_CACHE_SIZE:
+            dBytePrevalenceCache.pop(next(iter(dBytePrevalenceCache)), None)
+        dBytePrevalenceCache[key] = dPrevalence
+    return dict(dBytePrevalenceCache[key])
+
 def CalculateByteStatistics(dPrevalence=None, data=None):
     averageConsecutiveByteDifference = None
     if dPrevalence == None:
         dPrevalence = {iter: 0 for iter in range(0x100)}
-        sumDifferences = 0.0
-        previous = None
         if len(data) > 1:
-            for byte in data:
-                byte = C2IIP2(byte)
-                dPrevalence[byte] += 1
-                if previous != None:
-                    sumDifferences += abs(byte - previous)
-                previous = byte
-            averageConsecutiveByteDifference = sumDifferences /float(len(data)-1)
+            dPrevalence = CalculateBytePrevalence(data)
+            data = bytearray(data)
+            averageConsecutiveByteDifference = sum(map(abs, map(operator.sub, data[1:], data[:-1]))) / float(len(data) - 1)
     sumValues = sum(dPrevalence.values())
     countNullByte = dPrevalence[0]
     countControlBytes = 0
@@ -2,8 +2,8 @@
 
 __description__ = 'Extract base64 strings from file'
 __author__ = 'Didier Stevens'
-__version__ = '0.0.24'
-__date__ = '2022/10/13'
+__version__ = '0.0.25'
+__date__ = '2026/10/18'
 
 """
 
@@ -43,6 +43,7 @@ History:
   2022/07/15: 0.0.23 added option --jsoninput & --postprocess
   2022/07/17: continue
   2022/10/13: 0.0.24 update CalculateByteStatistics
+  2026/10/18: 0.0.25 faster CalculateByteStatistics: CalculateBytePrevalence, run lengths with regular expressions
 
 Todo:
   add base64 url
@@ -57,6 +58,7 @@ import textwrap
 import re
 import hashlib
 import string
+import collections
 import math
 import string
 import codecs
@@ -504,50 +506,56 @@ def Magic(data):
             magicHex += '%02x' % P23Ord(data[iter])
     return magicPrintable, magicHex
 
+BYTE_PREVALENCE_CACHE_SIZE = 0x100
+dBytePrevalenceCache = {}
+
+def NumPy():
+    # NumPy is only imported when it is needed: importing it takes more time than calculating the statistics of small data
+    try:
+        import numpy
+    except ImportError:
+        return None
+    return numpy
+
+# the prevalence is memoized by the SHA-256 of the data (for example, %ENTROPY%, %BYTESTATS% and %HISTOGRAM% count the bytes of the same data), the oldest entry is removed when the cache is full
+def CalculateBytePrevalence(data):
+    key = hashlib.sha256(data).digest()
+    if not key in dBytePrevalenceCache:
+        dPrevalence = {iter: 0 for iter in range(0x100)}
+        numpy = None
+        if len(data) >= 0x100000:
+            numpy = NumPy()
+        if numpy != None:
+            dPrevalence.update(enumerate(numpy.bincount(numpy.frombuffer(data, dtype=numpy.uint8), minlength=0x100).tolist()))
+        else:
+            dPrevalence.update(collections.Counter(bytearray(data)))
+        while len(dBytePrevalenceCache) >= BYTE_PREVALENCE_CACHE_SIZE:
+            dBytePrevalenceCache.pop(next(iter(dBytePrevalenceCache)), None)
+        dBytePrevalenceCache[key] = dPrevalence
+    return dict(dBytePrevalenceCache[key])
+
+oREPrintableRun = re.compile(b'[\x20-\x7E]+')
+oREBASE64Run = re.compile(b'[a-zA-Z0-9+/]+')
+oREHEXRun = re.compile(b'[a-fA-F0-9]+')
+
+def LongestRun(oRE, data):
+    return max([0] + [len(run) for run in oRE.findall(data)])
+
 def CalculateByteStatistics(dPrevalence=None, data=None):
     longestString = 0
     longestBASE64String = 0
     longestHEXString = 0
-    base64digits = b'abcdefghijklmnopqrstuvwxyzABCDEFGHIJKLMNOPQRSTUVWXYZ0123456789+/'
-    hexdigits = b'abcdefABCDEF0123456789'
     averageConsecutiveByteDifference = None
     if dPrevalence == None:
         dPrevalence = {iter: 0 for iter in range(0x100)}
-        sumDifferences = 0.0
-        previous = None
         if len(data) > 1:
-            lengthString = 0
-            lengthBASE64String = 0
-            lengthHEXString = 0
-            for byte in data:
-                dPrevalence[byte] += 1
-                if previous != None:
-                    sumDifferences += abs(byte - previous)
-                    if byte >= 0x20 and byte < 0x7F:
-                        lengthString += 1
-                    else:
-                        longestString = max(longestString, lengthString)
-                        lengthString = 0
-                    if byte in base64digits:
-                        lengthBASE64String += 1
-                    else:
-                        longestBASE64String = max(longestBASE64String, lengthBASE64String)
-                        lengthBASE64String = 0
-                    if byte in hexdigits:
-                        lengthHEXString += 1
-                    else:
-                        longestHEXString = max(longestHEXString, lengthHEXString)
-                        lengthHEXString = 0
-                else:
-                    if byte >= 0x20 and byte < 0x7F:
-                        lengthString = 1
-                    if byte in hexdigits:
-                        lengthHEXString = 1
-                previous = byte
-            averageConsecutiveByteDifference = sumDifferences /float(len(data)-1)
-            longestString = max(longestString, lengthString)
-            longestBASE64String = max(longestBASE64String, lengthBASE64String)
-            longestHEXString = max(longestHEXString, lengthHEXString)
+            dPrevalence = CalculateBytePrevalence(data)
+            data = bytearray(data)
+            averageConsecutiveByteDifference = sum(map(abs, map(operator.sub, data[1:], data[:-1]))) / float(len(data) - 1)
+            # the first byte does not start a BASE64 run
+            longestString = LongestRun(oREPrintableRun, bytes(data))
+            longestBASE64String = LongestRun(oREBASE64Run, bytes(data[1:]))
+            longestHEXString = LongestRun(oREHEXRun, bytes(data))
     sumValues = sum(dPrevalence.values())
     countNullByte = dPrevalence[0]
     countControlBytes = 0
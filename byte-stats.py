@@ -2,8 +2,8 @@
 
 __description__ = 'Calculate byte statistics'
 __author__ = 'Didier Stevens'
-__version__ = '0.0.9'
-__date__ = '2022/10/17'
+__version__ = '0.0.13'
+__date__ = '2026/10/18'
 
 """
 Source code put in public domain by Didier Stevens, no Copyright
@@ -26,6 +26,10 @@ History:
   2017/11/01: added option -g
   2020/12/21: 0.0.8 Python 3
   2022/10/17: 0.0.9 added statistics for longest strings
+  2026/10/18: 0.0.10 added cCalculateByteStatisticsNumPy: NumPy is used (when installed) to calculate statistics
+  2026/10/18: 0.0.11 input is read in blocks (option --blocksize), bucket and sequence results are no longer kept in memory
+  2026/10/18: 0.0.12 added option --selftest
+  2026/10/18: 0.0.13 NumPy block size is an argument of cCalculateByteStatisticsNumPy and BucketsNumPy, option --selftest no longer changes NUMPY_BLOCK_SIZE
 
 Todo:
 """
@@ -40,6 +44,11 @@ import string
 import textwrap
 import binascii
 import operator
+import random
+try:
+    import numpy
+except ImportError:
+    numpy = None
 
 bPython3 = sys.version_info[0] > 2
 if bPython3:
@@ -353,6 +362,12 @@ Fir. (First) is the first byte value in the range.
 Last is the last byte value in the range (this value is not displayed for ranges of a single byte).
 Len. (length) is the number of unique byte values in the range.
 Range is the printout of the byte values in the range (. is printed if the byte value is not printable).
+
+When Python module NumPy is installed, byte-stats.py uses it to calculate the statistics (this is much faster for large files). Without NumPy, the statistics are calculated byte per byte. The results are the same.
+
+Files are read in blocks of 1MB (use option --blocksize to change this): memory use does not depend on the size of the input. With option -l, the bucket properties are printed while the input is being read.
+
+Option --selftest checks that the NumPy and the byte per byte calculations give the same results: random data is processed in blocks of random sizes (like option --blocksize) and in buckets, with small NumPy block sizes to test the block boundaries.
 '''
     for line in manual.split('\n'):
         print(textwrap.fill(line, 79))
@@ -402,6 +417,8 @@ def P23Ord(value):
     else:
         return ord(value)
 
+WHITESPACE_BYTES = [iter for iter in range(1, 0x21) if chr(iter) in string.whitespace]
+
 class cCalculateByteStatistics():
 
     def __init__(self, data=None):
@@ -448,45 +465,29 @@ class cCalculateByteStatistics():
 
         self.previous = byte
 
+    def ProcessData(self, data):
+        for byte in bytearray(data):
+            self.Process(byte)
+
     def Prevalence(self):
         return self.dPrevalence
 
     def Stats(self):
-        sumValues = sum(self.dPrevalence.values())
-        countNullByte = self.dPrevalence[0]
-        countControlBytes = 0
-        countWhitespaceBytes = 0
-        countUniqueBytes = 0
-        for iter in range(1, 0x21):
-            if chr(iter) in string.whitespace:
-                countWhitespaceBytes += self.dPrevalence[iter]
-            else:
-                countControlBytes += self.dPrevalence[iter]
-        countControlBytes += self.dPrevalence[0x7F]
-        countPrintableBytes = 0
-        for iter in range(0x21, 0x7F):
-            countPrintableBytes += self.dPrevalence[iter]
-        countHighBytes = 0
-        for iter in range(0x80, 0x100):
-            countHighBytes += self.dPrevalence[iter]
-        countHexadecimalBytes = 0
-        countBASE64Bytes = 0
-        for iter in range(0x30, 0x3A):
-            countHexadecimalBytes += self.dPrevalence[iter]
-            countBASE64Bytes += self.dPrevalence[iter]
-        for iter in range(0x41, 0x47):
-            countHexadecimalBytes += self.dPrevalence[iter]
-        for iter in range(0x61, 0x67):
-            countHexadecimalBytes += self.dPrevalence[iter]
-        for iter in range(0x41, 0x5B):
-            countBASE64Bytes += self.dPrevalence[iter]
-        for iter in range(0x61, 0x7B):
-            countBASE64Bytes += self.dPrevalence[iter]
-        countBASE64Bytes += self.dPrevalence[ord('+')] + self.dPrevalence[ord('/')] + self.dPrevalence[ord('=')]
+        prevalences = [self.dPrevalence[iter] for iter in range(0x100)]
+        sumValues = sum(prevalences)
+        countNullByte = prevalences[0]
+        countWhitespaceBytes = sum([prevalences[iter] for iter in WHITESPACE_BYTES])
+        countControlBytes = sum(prevalences[1:0x21]) - countWhitespaceBytes + prevalences[0x7F]
+        countPrintableBytes = sum(prevalences[0x21:0x7F])
+        countHighBytes = sum(prevalences[0x80:0x100])
+        countDigitBytes = sum(prevalences[0x30:0x3A])
+        countHexadecimalBytes = countDigitBytes + sum(prevalences[0x41:0x47]) + sum(prevalences[0x61:0x67])
+        countBASE64Bytes = countDigitBytes + sum(prevalences[0x41:0x5B]) + sum(prevalences[0x61:0x7B]) + prevalences[ord('+')] + prevalences[ord('/')] + prevalences[ord('=')]
         entropy = 0.0
-        for iter in range(0x100):
-            if self.dPrevalence[iter] > 0:
-                prevalence = float(self.dPrevalence[iter]) / float(sumValues)
+        countUniqueBytes = 0
+        for prevalence in prevalences:
+            if prevalence > 0:
+                prevalence = float(prevalence) / float(sumValues)
                 entropy += - prevalence * math.log(prevalence, 2)
                 countUniqueBytes += 1
         if self.count == 0:
@@ -498,16 +499,148 @@ class cCalculateByteStatistics():
         self.printableStringLength = max(self.printableStringLength, self.printableStringLengthMax)
         return sumValues, entropy, countUniqueBytes, countNullByte, countControlBytes, countWhitespaceBytes, countPrintableBytes, countHighBytes, countHexadecimalBytes, countBASE64Bytes, averageConsecutiveByteDifference, self.printableStringLength, self.hexLength, self.base64Length
 
+def IsHexadecimal(byte):
+    return byte >= 0x30 and byte <= 0x39 or byte >= 0x41 and byte <= 0x46 or byte >= 0x61 and byte <= 0x66
+
+def IsBASE64(byte):
+    return byte >= 0x30 and byte <= 0x39 or byte >= 0x41 and byte <= 0x5A or byte >= 0x61 and byte <= 0x7A or byte == 0x2B or byte == 0x2F
+
+def IsPrintable(byte):
+    return byte >= 0x20 and byte <= 0x7E or byte == 0x09
+
+NUMPY_BLOCK_SIZE = 0x400000
+
+def MaximumRunLengthNumPy(mask, length, lengthMax):
+    positions = numpy.flatnonzero(~mask)
+    if len(positions) == 0:
+        return length + len(mask), lengthMax
+    lengthMax = max(lengthMax, length + int(positions[0]))
+    if len(positions) > 1:
+        lengthMax = max(lengthMax, int(numpy.diff(positions).max()) - 1)
+    return len(mask) - 1 - int(positions[-1]), lengthMax
+
+def MaximumRunLengthsNumPy(mask2D):
+    # longest run of True values per row: rows are padded with False at both ends, the distance between consecutive False values minus 1 is a run length
+    rows, columns = mask2D.shape
+    padded = numpy.zeros((rows, columns + 2), dtype=bool)
+    padded[:, 1:-1] = mask2D
+    positions = numpy.flatnonzero(~padded.ravel())
+    result = numpy.zeros(rows, dtype=numpy.int64)
+    numpy.maximum.at(result, positions[:-1] // (columns + 2), numpy.diff(positions) - 1)
+    return result.tolist()
+
+class cCalculateByteStatisticsNumPy(cCalculateByteStatistics):
+    # same statistics as cCalculateByteStatistics, but data is processed with NumPy in stead of byte per byte
+
+    tableHexadecimal = numpy != None and numpy.array([IsHexadecimal(byte) for byte in range(0x100)])
+    tableBASE64 = numpy != None and numpy.array([IsBASE64(byte) for byte in range(0x100)])
+    tablePrintable = numpy != None and numpy.array([IsPrintable(byte) for byte in range(0x100)])
+
+    def __init__(self, data=None, blockSize=NUMPY_BLOCK_SIZE):
+        self.blockSize = blockSize
+        cCalculateByteStatistics.__init__(self, data)
+
+    def ProcessData(self, data):
+        for position in range(0, len(data), self.blockSize):
+            self.ProcessArray(numpy.frombuffer(data[position:position + self.blockSize], dtype=numpy.uint8))
+
+    def ProcessArray(self, array):
+        for byte, count in enumerate(numpy.bincount(array, minlength=0x100).tolist()):
+            self.dPrevalence[byte] += count
+        if self.previous != None:
+            self.sumDifference += abs(int(array[0]) - self.previous)
+            self.count += 1
+        self.sumDifference += int(numpy.abs(numpy.diff(array.astype(numpy.int16))).sum())
+        self.count += len(array) - 1
+        self.previous = int(array[-1])
+        self.hexLength, self.hexLengthMax = MaximumRunLengthNumPy(self.tableHexadecimal[array], self.hexLength, self.hexLengthMax)
+        self.base64Length, self.base64LengthMax = MaximumRunLengthNumPy(self.tableBASE64[array], self.base64Length, self.base64LengthMax)
+        self.printableStringLength, self.printableStringLengthMax = MaximumRunLengthNumPy(self.tablePrintable[array], self.printableStringLength, self.printableStringLengthMax)
+
+def BucketsPython(data, bucketSize):
+    result = []
+    for position in range(0, len(data), bucketSize):
+        oCalculateByteStatistics = cCalculateByteStatistics()
+        oCalculateByteStatistics.ProcessData(data[position:position + bucketSize])
+        result.append(oCalculateByteStatistics)
+    return result
+
+def BucketsNumPy(data, bucketSize, blockSize=NUMPY_BLOCK_SIZE):
+    # data is reshaped to a 2-D array with one bucket per row, statistics are calculated per row
+    result = []
+    rowsPerBlock = max(1, blockSize // bucketSize)
+    for position in range(0, len(data), rowsPerBlock * bucketSize):
+        array = numpy.frombuffer(data[position:position + rowsPerBlock * bucketSize], dtype=numpy.uint8).reshape(-1, bucketSize)
+        rows = array.shape[0]
+        prevalences = numpy.bincount((numpy.arange(rows, dtype=numpy.int64)[:, None] * 0x100 + array).ravel(), minlength=rows * 0x100).reshape(rows, 0x100).tolist()
+        sumDifferences = numpy.abs(numpy.diff(array.astype(numpy.int16), axis=1)).sum(axis=1).tolist()
+        hexLengths = MaximumRunLengthsNumPy(cCalculateByteStatisticsNumPy.tableHexadecimal[array])
+        base64Lengths = MaximumRunLengthsNumPy(cCalculateByteStatisticsNumPy.tableBASE64[array])
+        printableStringLengths = MaximumRunLengthsNumPy(cCalculateByteStatisticsNumPy.tablePrintable[array])
+        for row in range(rows):
+            oCalculateByteStatistics = cCalculateByteStatisticsNumPy(blockSize=blockSize)
+            oCalculateByteStatistics.dPrevalence = dict(enumerate(prevalences[row]))
+            oCalculateByteStatistics.sumDifference = sumDifferences[row]
+            oCalculateByteStatistics.count = bucketSize - 1
+            oCalculateByteStatistics.previous = int(array[row, -1])
+            oCalculateByteStatistics.hexLengthMax = hexLengths[row]
+            oCalculateByteStatistics.base64LengthMax = base64Lengths[row]
+            oCalculateByteStatistics.printableStringLengthMax = printableStringLengths[row]
+            result.append(oCalculateByteStatistics)
+    return result
+
+# random data made of runs of random, hexadecimal, BASE64 and printable bytes, to test the run lengths
+def SelfTestData(oRandom, length):
+    alphabets = [list(range(0x100)), list(b'0123456789abcdefABCDEF'), list(b'ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz0123456789+/'), list(range(0x20, 0x7F)) + [0x09]]
+    data = bytearray()
+    while len(data) < length:
+        alphabet = oRandom.choice(alphabets)
+        data.extend(oRandom.choice(alphabet) for iter in range(oRandom.randint(1, 50)))
+    return bytes(data[:length])
+
+def SelfTestProcessData(oCalculateByteStatistics, data, blocksizes):
+    position = 0
+    for blocksize in blocksizes:
+        oCalculateByteStatistics.ProcessData(data[position:position + blocksize])
+        position += blocksize
+    return oCalculateByteStatistics.Stats()
+
+def SelfTest():
+    if numpy == None:
+        print('Option --selftest requires module numpy')
+        return
+
+    oRandom = random.Random(0)
+    countTests = 0
+    for numpyBlockSize in [1, 2, 7, 64, NUMPY_BLOCK_SIZE]:
+        for length in [1, 2, 3, 63, 64, 65, 256, 1000] + [oRandom.randint(1, 2000) for iter in range(5)]:
+            data = SelfTestData(oRandom, length)
+            blocksizes = []
+            while sum(blocksizes) < length:
+                blocksizes.append(oRandom.choice([1, 2, oRandom.randint(1, 100), oRandom.randint(1, length)]))
+            for blocks in [[length], blocksizes]:
+                stats = SelfTestProcessData(cCalculateByteStatistics(), data, blocks)
+                statsNumPy = SelfTestProcessData(cCalculateByteStatisticsNumPy(blockSize=numpyBlockSize), data, blocks)
+                assert stats == statsNumPy, 'Stats() differ: NumPy block size %d, length %d, blocks %r\n%r\n%r' % (numpyBlockSize, length, blocks, stats, statsNumPy)
+                countTests += 1
+            for bucketSize in [2, 3, 16, 100]:
+                size = length // bucketSize * bucketSize
+                stats = [oCalculateByteStatistics.Stats() for oCalculateByteStatistics in BucketsPython(data[:size], bucketSize)]
+                statsNumPy = [oCalculateByteStatistics.Stats() for oCalculateByteStatistics in BucketsNumPy(data[:size], bucketSize, numpyBlockSize)]
+                assert stats == statsNumPy, 'Buckets differ: NumPy block size %d, length %d, bucket size %d' % (numpyBlockSize, size, bucketSize)
+                countTests += 1
+    print('Self test OK: %d comparisons' % countTests)
+
 def GenerateLine(prefix, counter, sumValues, buckets, index, options):
     line = '%-18s%9d %6.2f%%' % (prefix + ':', counter, float(counter) / sumValues * 100.0)
     if len(buckets) > 0:
-        value = min([properties[index] for position, properties in buckets])
+        value = MinimumAndPosition(buckets, index)[0]
         if sumValues == 256:
             line += ' %9d %6.2f%%' % (value, float(value) / sumValues * 100.0)
         else:
             line += ' %9d %6.2f%%' % (value, float(value) / float(options.bucket) * 100.0)
         if len(buckets) > 1:
-            value = max([properties[index] for position, properties in buckets])
+            value = MaximumAndPosition(buckets, index)[0]
             if sumValues == 256:
                 line += ' %9d %6.2f%%' % (value, float(value) / sumValues * 100.0)
             else:
@@ -526,23 +659,101 @@ def ByteSub(byte1, byte2):
         diff += 256
     return diff
 
+class cBuckets():
+    # bucket properties are not stored: only the minimum and maximum values (with their position) are kept, so that memory use does not grow with the input size
+    # with option list, bucket properties are printed as they are calculated
+
+    def __init__(self, options, index=None):
+        self.options = options
+        self.index = index
+        self.count = 0
+        self.minimums = None
+        self.maximums = None
+        self.values = []
+        if self.options.property in ['e', 'a']:
+            self.format = '0x%08x %f'
+        else:
+            self.format = '0x%08x %9d'
+
+    def __len__(self):
+        return self.count
+
+    def Add(self, position, properties):
+        self.count += 1
+        if self.minimums == None:
+            self.minimums = [(value, position) for value in properties]
+            self.maximums = [(value, position) for value in properties]
+        else:
+            for index, value in enumerate(properties):
+                if value < self.minimums[index][0]:
+                    self.minimums[index] = (value, position)
+                if value > self.maximums[index][0]:
+                    self.maximums[index] = (value, position)
+        if self.options.list:
+            print(self.format % (position, properties[self.index]))
+        elif self.options.graph:
+            self.values.append(properties[self.index])
+
 def MinimumAndPosition(buckets, index):
-    valueMinimum = buckets[0][1][index]
-    positionMinimum = buckets[0][0]
-    for position, properties in buckets[1:]:
-        if properties[index] < valueMinimum:
-            valueMinimum = properties[index]
-            positionMinimum = position
-    return (valueMinimum, positionMinimum)
+    return buckets.minimums[index]
 
 def MaximumAndPosition(buckets, index):
-    valueMaximum = buckets[0][1][index]
-    positionMaximum = buckets[0][0]
-    for position, properties in buckets[1:]:
-        if properties[index] > valueMaximum:
-            valueMaximum = properties[index]
-            positionMaximum = position
-    return (valueMaximum, positionMaximum)
+    return buckets.maximums[index]
+
+class cSequences():
+    # detects sequences of bytes with a constant difference, state is kept across blocks of data
+    # only the first bytes of a sequence are stored, and unless all sequences have to be reported, only the top sequences are kept
+
+    PREFIX_LENGTH = 21
+    TOP = 10
+    PRUNE = 10000
+
+    def __init__(self, options):
+        self.options = options
+        self.dSequences = {}
+        self.countBytes = 0
+        self.previous = None
+        self.diff = None
+        self.position = None
+        self.length = 0
+        self.prefix = []
+
+    def ProcessData(self, data):
+        for value in bytearray(data):
+            self.countBytes += 1
+            if self.previous != None:
+                diff = ByteSub(value, self.previous)
+                if self.diff == diff:
+                    self.length += 1
+                    if len(self.prefix) < self.PREFIX_LENGTH:
+                        self.prefix.append(value)
+                else:
+                    self.Store()
+                    self.diff = diff
+                    self.position = self.countBytes - 2
+                    self.length = 2
+                    self.prefix = [self.previous, value]
+            self.previous = value
+
+    def Store(self):
+        if self.length > 2:
+            self.dSequences[self.position] = (self.length, self.diff, self.prefix)
+            if not self.options.all and len(self.dSequences) > self.PRUNE:
+                self.dSequences = dict(self.Sorted()[:self.TOP])
+
+    def Sorted(self):
+        if self.options.keys:
+            return sorted(self.dSequences.items())
+        else:
+            return sorted(self.dSequences.items(), key=lambda item: (-item[1][0], item[0]))
+
+    def Sequences(self):
+        self.Store()
+        self.length = 0
+        sequences = self.Sorted()
+        if not self.options.all:
+            sequences = sequences[:self.TOP]
+        return sequences
 
 def cmp_to_key(mycmp):
     'Convert a cmp= function into a key= function'
@@ -567,13 +778,28 @@ def ByteStats(args, options):
     if options.bucket < 2:
         print('Bucket size must be at least 2, not %d' % options.bucket)
         return
+    if options.blocksize < 1:
+        print('Block size must be at least 1, not %d' % options.blocksize)
+        return
+    dProperties = {'e': 1, 'u': 2, 'n': 3, 'c': 4, 'w': 5, 'p': 6, 'h': 7, 'x': 8, 'b': 9, 'a': 10}
+    if options.list or options.graph:
+        if options.property not in dProperties:
+            print('Unknown property: %s' % options.property)
+            return
+        buckets = cBuckets(options, dProperties[options.property])
+    else:
+        buckets = cBuckets(options)
+    oSequences = cSequences(options)
     countBytes = 0
-    buckets = []
-    diffs = []
-    values = []
-    dDiffs = {}
-    oCalculateByteStatistics = cCalculateByteStatistics()
-    oCalculateByteStatisticsBucket = cCalculateByteStatistics()
+    if numpy == None:
+        CalculateByteStatistics = cCalculateByteStatistics
+        Buckets = BucketsPython
+    else:
+        CalculateByteStatistics = cCalculateByteStatisticsNumPy
+        Buckets = BucketsNumPy
+    oCalculateByteStatistics = CalculateByteStatistics()
+    oCalculateByteStatisticsBucket = CalculateByteStatistics()
+    countBytesBucket = 0
     if args != ['']:
         args = ExpandFilenameArguments(args)
     for file in args:
@@ -587,63 +813,46 @@ def ByteStats(args, options):
                 msvcrt.setmode(sys.stdin.fileno(), os.O_BINARY)
         else:
             fIn = open(file, 'rb')
-        for char in fIn.read():
-            value = P23Ord(char)
-            countBytes += 1
-            oCalculateByteStatistics.Process(value)
-            oCalculateByteStatisticsBucket.Process(value)
+        while True:
+            data = fIn.read(options.blocksize)
+            if len(data) == 0:
+                break
+            oCalculateByteStatistics.ProcessData(data)
+            position = 0
+            while position < len(data):
+                if countBytesBucket == 0 and len(data) - position >= options.bucket:
+                    size = (len(data) - position) // options.bucket * options.bucket
+                    for index, oCalculateByteStatisticsFullBucket in enumerate(Buckets(data[position:position + size], options.bucket)):
+                        buckets.Add(countBytes + position + index * options.bucket, oCalculateByteStatisticsFullBucket.Stats())
+                else:
+                    size = min(options.bucket - countBytesBucket, len(data) - position)
+                    oCalculateByteStatisticsBucket.ProcessData(data[position:position + size])
+                    countBytesBucket += size
+                    if countBytesBucket == options.bucket:
+                        buckets.Add(countBytes + position + size - options.bucket, oCalculateByteStatisticsBucket.Stats())
+                        oCalculateByteStatisticsBucket = CalculateByteStatistics()
+                        countBytesBucket = 0
+                position += size
             if options.sequence:
-                values.append(value)
-                if countBytes > 1:
-                    diff = ByteSub(value, values[-2])
-                    if diffs == []:
-                        diffs = [diff]
-                        savPosition = countBytes
-                    elif diffs[-1] == diff:
-                        diffs.append(diff)
-                    else:
-                        if len(diffs) > 1:
-                            dDiffs[savPosition - 2] = values[:-1]
-                        diffs = [diff]
-                        values = values[-2:]
-                        savPosition = countBytes
-            if countBytes % options.bucket == 0:
-                buckets.append([countBytes - options.bucket, oCalculateByteStatisticsBucket.Stats()])
-                oCalculateByteStatisticsBucket = cCalculateByteStatistics()
+                oSequences.ProcessData(data)
+            countBytes += len(data)
         if bPython3:
             if fIn != sys.stdin.buffer:
                 fIn.close()
         else:
             if fIn != sys.stdin:
                 fIn.close()
-    if len(diffs) > 1:
-        dDiffs[savPosition - 2] = values
 
     if countBytes == 0:
         print('Empty file(s)! Statistics can not be calculated.')
         return
 
     sumValues, entropy, countUniqueBytes, countNullByte, countControlBytes, countWhitespaceBytes, countPrintableBytes, countHighBytes, countHexadecimalBytes, countBASE64Bytes, averageConsecutiveByteDifference, maxPrintableStringLength, maxHexLength, maxBase64Length = oCalculateByteStatistics.Stats()
-    dProperties = {'e': 1, 'u': 2, 'n': 3, 'c': 4, 'w': 5, 'p': 6, 'h': 7, 'x': 8, 'b': 9, 'a': 10}
-    if options.list:
-        if options.property not in dProperties:
-            print('Unknown property: %s' % options.property)
-            return
-        index = dProperties[options.property]
-        if options.property in ['e', 'a']:
-            format = '0x%08x %f'
-        else:
-            format = '0x%08x %9d'
-        for position, properties in buckets:
-            print(format % (position, properties[index]))
-    elif options.graph:
-        if options.property not in dProperties:
-            print('Unknown property: %s' % options.property)
-            return
+    if options.graph:
         index = dProperties[options.property]
         oTk = tkinter.Tk()
         oTk.title('byte-stats: property %s' % options.property)
-        c_width = len(buckets)
+        c_width = len(buckets.values)
         multiplier = 1
         if options.property == 'e':
             c_height = 81
@@ -653,20 +862,20 @@ def ByteStats(args, options):
         elif options.property == 'a':
             c_height = 258
         else:
-            maximum = max(properties[index] for position, properties in buckets)
+            maximum = MaximumAndPosition(buckets, index)[0]
             c_height = 301
             multiplier = float(c_height - 1) / float(maximum)
         oCanvas = tkinter.Canvas(oTk, width=c_width, height=c_height, bg= 'white')
         oCanvas.pack()
         points = []
         counter = 0
-        for position, properties in buckets:
+        for value in buckets.values:
             points.append(counter)
-            points.append(c_height - int(properties[index] * multiplier))
+            points.append(c_height - int(value * multiplier))
             counter += 1
         oCanvas.create_line(points)
         oTk.mainloop()
-    else:
+    elif not options.list:
         listCount = oCalculateByteStatistics.Prevalence().items()
         if options.keys:
             index = 0
@@ -738,23 +947,9 @@ def ByteStats(args, options):
     if options.sequence:
         print('')
         print('Position    Length Diff Bytes')
-        if options.keys:
-            sequences = sorted(dDiffs.items())
-        else:
-            if bPython3:
-                def MyCmp(a, b):
-                    return (a > b) - (a < b)
-                sequences = sorted(dDiffs.items(), key=cmp_to_key(lambda x, y: IFF(len(x[1]) == len(y[1]), MyCmp(y[0], x[0]), MyCmp(len(x[1]), len(y[1])))), reverse=True)
-            else:
-                sequences = sorted(dDiffs.items(), cmp=lambda x, y: IFF(len(x[1]) == len(y[1]), cmp(y[0], x[0]), cmp(len(x[1]), len(y[1]))), reverse=True)
-        if not options.all:
-            sequences = sequences[:10]
-        for sequence in sequences:
-            if len(sequence[1]) >= options.filter:
-                if bPython3:
-                    print('0x%08x: %6d %4d 0x%s' % (sequence[0], len(sequence[1]), ByteSub(sequence[1][1], sequence[1][0]), TruncateString(binascii.hexlify((''.join([chr(c) for c in sequence[1]])).encode()).decode(), 40)))
-                else:
-                    print('0x%08x: %6d %4d 0x%s' % (sequence[0], len(sequence[1]), ByteSub(sequence[1][1], sequence[1][0]), TruncateString(binascii.hexlify(''.join([chr(c) for c in sequence[1]])), 40)))
+        for position, (length, diff, prefix) in oSequences.Sequences():
+            if length >= options.filter:
+                print('0x%08x: %6d %4d 0x%s' % (position, length, diff, TruncateString(binascii.hexlify(bytes(bytearray(prefix))).decode(), 40)))
 
     def Chr(number):
         return IFF(number >= 0x20 and number < 0x7F, chr(number), '.')
@@ -807,7 +1002,9 @@ https://DidierStevens.com'''
     oParser.add_option('-a', '--all', action='store_true', default=False, help='Print all byte stats')
     oParser.add_option('-s', '--sequence', action='store_true', default=False, help='Detect simple sequences')
     oParser.add_option('-f', '--filter', type=int, default=0, help='Minimum length of sequence for displaying (default 0)')
+    oParser.add_option('--blocksize', type=int, default=0x100000, help='Size of the blocks read from the input (default is 1048576 bytes)')
     oParser.add_option('-r', '--ranges', action='store_true', default=False, help='Report byte ranges')
+    oParser.add_option('--selftest', action='store_true', default=False, help='Check that the NumPy and the byte per byte calculations give the same results')
     (options, args) = oParser.parse_args()
 
     if options.man:
@@ -815,6 +1012,10 @@ https://DidierStevens.com'''
         PrintManual()
         return
 
+    if options.selftest:
+        SelfTest()
+        return
+
     if len(args) == 0:
         args = ['']
     ByteStats(args, options)
@@ -4,8 +4,8 @@ from __future__ import print_function
 
 __description__ = 'Analyze Cobalt Strike beacon process dumps for further analysis'
 __author__ = 'Didier Stevens'
-__version__ = '0.0.3'
-__date__ = '2021/12/12'
+__version__ = '0.0.5'
+__date__ = '2026/10/18'
 
 """
 Source code put in the public domain by Didier Stevens, no Copyright
@@ -18,12 +18,16 @@ History:
   2021/11/03: continue
   2021/11/09: 0.0.2 added summary and option -n
   2021/12/12: 0.0.3 added options -r, --numberofkeystotry, --keystotry, --keysize
+  2026/10/18: 0.0.4 faster byte statistics: CalculateBytePrevalence
+  2026/10/18: 0.0.5 faster key counting (CountKeys) and XOR decoding (Xor, XorOffsetsContaining)
 
 Todo:
   Handle error when memory stream larger than segment?
 """
 
 import optparse
+import operator
+import hashlib
 import sys
 import os
 import zipfile
@@ -1185,20 +1189,42 @@ class cLogfile():
             self.Line('Finish', '%d error(s)' % self.errors, '%d second(s)' % (time.time() - self.starttime))
             self.oOutput.Close()
 
+BYTE_PREVALENCE_CACHE_SIZE = 0x100
+dBytePrevalenceCache = {}
+
+def NumPy():
+    # NumPy is only imported when it is needed: importing it takes more time than calculating the statistics of small data
+    try:
+        import numpy
+    except ImportError:
+        return None
+    return numpy
+
+# the prevalence is memoized by the SHA-256 of the data (for example, %ENTROPY%, %BYTESTATS% and %HISTOGRAM% count the bytes of the same data), the oldest entry is removed when the cache is full
+def CalculateBytePrevalence(data):
+    key = hashlib.sha256(data).digest()
+    if not key in dBytePrevalenceCache:
+        dPrevalence = {iter: 0 for iter in range(0x100)}
+        numpy = None
+        if len(data) >= 0x100000:
+            numpy = NumPy()
+        if numpy != None:
+            dPrevalence.update(enumerate(numpy.bincount(numpy.frombuffer(data, dtype=numpy.uint8), minlength=0x100).tolist()))
+        else:
+            dPrevalence.update(collections.Counter(bytearray(data)))
+        while len(dBytePrevalenceCache) >= BYTE_PREVALENCE_CACHE_SIZE:
+            dBytePrevalenceCache.pop(next(iter(dBytePrevalenceCache)), None)
+        dBytePrevalenceCache[key] = dPrevalence
+    return dict(dBytePrevalenceCache[key])
+
 def CalculateByteStatistics(dPrevalence=None, data=None):
     averageConsecutiveByteDifference = None
     if dPrevalence == None:
         dPrevalence = {iter: 0 for iter in range(0x100)}
-        sumDifferences = 0.0
-        previous = None
         if len(data) > 1:
-            for byte in data:
-                byte = C2IIP2(byte)
-                dPrevalence[byte] += 1
-                if previous != None:
-                    sumDifferences += abs(byte - previous)
-                previous = byte
-            averageConsecutiveByteDifference = sumDifferences /float(len(data)-1)
+            dPrevalence = CalculateBytePrevalence(data)
+            data = bytearray(data)
+            averageConsecutiveByteDifference = sum(map(abs, map(operator.sub, data[1:], data[:-1]))) / float(len(data) - 1)
     sumValues = sum(dPrevalence.values())
     countNullByte = dPrevalence[0]
     countControlBytes = 0
@@ -1266,7 +1292,63 @@ def C2SIP3(bytes):
 
 def Xor(data, key, offset):
     key = key[offset:] + key [:offset]
-    return bytes([data[i] ^ key[i % len(key)] for i in range(len(data))])
+    keystream = (key * (len(data) // len(key) + 1))[:len(data)]
+    return (int.from_bytes(data, 'little') ^ int.from_bytes(keystream, 'little')).to_bytes(len(data), 'little')
+
+# returns the key offsets for which Xor(data, key, offset) contains search, for all offsets at once:
+# search is encoded with each rotation of the key (phase), and an encoded search found at position p means offset (phase - p) % len(key)
+def XorOffsetsContaining(data, key, search):
+    offsets = set()
+    keystream = key * (len(search) // len(key) + 2)
+    for phase in range(len(key)):
+        encoded = bytes(bytearray([byteSearch ^ byteKey for byteSearch, byteKey in zip(bytearray(search), bytearray(keystream[phase:phase + len(search)]))]))
+        position = data.find(encoded)
+        while position != -1:
+            offsets.add((phase - position) % len(key))
+            position = data.find(encoded, position + 1)
+    return offsets
+
+def CountKeysPython(data, keysize):
+    dKeys = collections.Counter()
+    for offset in range(keysize):
+        dKeys.update(data[position:position + keysize] for position in range(offset, len(data) - keysize + 1, keysize))
+    return dKeys
+
+# keys (max 16 bytes) are packed in 2 big-endian 64-bit integers and sorted with a stable sort: the first key of a run of identical keys is its first occurrence
+def CountKeysNumPy(numpy, data, keysize, minimum):
+    highs = []
+    lows = []
+    array = numpy.frombuffer(data, dtype=numpy.uint8)
+    for offset in range(keysize):
+        rows = (len(data) - offset) // keysize
+        packed = numpy.zeros((rows, 16), dtype=numpy.uint8)
+        packed[:, :keysize] = array[offset:offset + rows * keysize].reshape(rows, keysize)
+        packed = packed.view('>u8')
+        highs.append(packed[:, 0])
+        lows.append(packed[:, 1])
+    highs = numpy.concatenate(highs)
+    lows = numpy.concatenate(lows)
+    if len(highs) == 0:
+        return 0, []
+    order = numpy.lexsort((lows, highs))
+    highs = highs[order]
+    lows = lows[order]
+    starts = numpy.flatnonzero(numpy.concatenate(([True], (highs[1:] != highs[:-1]) | (lows[1:] != lows[:-1]))))
+    counts = numpy.diff(numpy.append(starts, len(highs)))
+    selected = numpy.flatnonzero(counts >= minimum)
+    keys = []
+    for index in selected[numpy.lexsort((order[starts[selected]], -counts[selected]))]:
+        keys.append([struct.pack('>QQ', int(highs[starts[index]]), int(lows[starts[index]]))[:keysize], int(counts[index])])
+    return len(starts), keys
+
+# returns the number of different keys and the keys that appear at least minimum times, most frequent first (ties: first appearance first)
+def CountKeys(data, keysize, minimum):
+    if keysize <= 16 and len(data) >= 0x100000:
+        numpy = NumPy()
+        if numpy != None:
+            return CountKeysNumPy(numpy, data, keysize, minimum)
+    dKeys = CountKeysPython(data, keysize)
+    return len(dKeys), [[key, value] for key, value in sorted(dKeys.items(), reverse=True, key=lambda item: item[1]) if value >= minimum]
 
 def KeyStats(data):
     dStats = {}
@@ -1350,19 +1432,11 @@ def ProcessBinaryFile(filename, content, dSummary, cutexpression, flag, oOutput,
 
         for baseAddress, data in listData:
             oOutput.Line('Segment %x size %x' % (baseAddress, len(data)))
-            dKeys = {}
-            for offset in range(options.keysize):
-                position = 0
-                while len(data[position + offset:position + offset + options.keysize]) == options.keysize:
-                    key = data[position + offset:position + offset + options.keysize]
-                    dKeys[key] = dKeys.get(key, 0) + 1
-                    position += options.keysize
-            oOutput.Line('Potential keys = %d' % len(dKeys))
+            countKeys, keysCounted = CountKeys(data, options.keysize, 100)
+            oOutput.Line('Potential keys = %d' % countKeys)
             keysSorted = []
             normalizedKeys = set()
-            for key, value in sorted(dKeys.items(), reverse=True, key=lambda item: item[1]):
-                if value < 100:
-                    continue
+            for key, value in keysCounted:
                 keyStats = KeyStats(key)
                 acbd = CalculateByteStatistics(data=key)[-1]
                 if keyStats[0][1] < 4 and acbd >= 20:
@@ -1381,9 +1455,9 @@ def ProcessBinaryFile(filename, content, dSummary, cutexpression, flag, oOutput,
                 keysToTry = [int(index) for index in options.keystotry.split(',')]
                 for keyToTry in keysToTry:
                     oOutput.Line('Trying probable key %d:' % keyToTry)
+                    offsetsFound = XorOffsetsContaining(data, keysSorted[keyToTry][0], b'sha256\x00')
                     for offset in range(options.keysize):
-                        decrypted = Xor(data, keysSorted[keyToTry][0], offset)
-                        if b'sha256\x00' in decrypted:
+                        if offset in offsetsFound:
     #                        print(dataInfo[1].Protect, dataInfo[1].BaseAddress, dataInfo[1].RegionSize, dataInfo[1].Type)
                             oOutput.Line('sha256\\x00 string found, key offset: %d' % offset)
                             dSummary['keys'] = dSummary.get('keys', []) + [binascii.b2a_hex(keysSorted[keyToTry][0])]
@@ -1392,7 +1466,7 @@ def ProcessBinaryFile(filename, content, dSummary, cutexpression, flag, oOutput,
                                 oOutput.Line('Writing segment to disk: %s' % dumpFilename)
                                 dSummary['files'] = dSummary.get('files', []) + [dumpFilename]
                                 with open(dumpFilename, 'wb') as fOut:
-                                    fOut.write(decrypted)
+                                    fOut.write(Xor(data, keysSorted[keyToTry][0], offset))
 
             oOutput.Line('')
 
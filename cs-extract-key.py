@@ -4,8 +4,8 @@ from __future__ import print_function
 
 __description__ = 'Extract cryptographic keys from Cobalt Strike beacon process dump'
 __author__ = 'Didier Stevens'
-__version__ = '0.0.4'
-__date__ = '2021/12/11'
+__version__ = '0.0.7'
+__date__ = '2026/10/18'
 
 """
 Source code put in the public domain by Didier Stevens, no Copyright
@@ -26,12 +26,16 @@ History:
   2021/11/06: 0.0.3 added AverageDifferenceConsecutiveBytes and disabled it
   2021/11/11: added option verbose
   2021/12/11: 0.0.4 added option donotfullsearch
+  2026/10/18: 0.0.5 faster byte statistics: CalculateBytePrevalence
+  2026/10/18: 0.0.6 added option --jobs
+  2026/10/18: 0.0.7 added candidate key prefilter, options --noprefilter and --prefilterstats; decrypt only the first AES block
 
 Todo:
   Document flag arguments in man page
 """
 
 import optparse
+import operator
 import sys
 import os
 import zipfile
@@ -51,6 +55,8 @@ import time
 import csv
 import hashlib
 import hmac
+import mmap
+import multiprocessing
 try:
     import Crypto.Cipher.AES
 except ImportError:
@@ -157,6 +163,12 @@ But whenever I found an AES key near an HMAC key, they were always true positive
 
 Remark that the above method (using option -t or -c) works also for version 3.x beacons.
 
+The search for HMAC and AES keys (and the raw key) tries each position in the process memory dump and is CPU bound. Option --jobs can be used to distribute this search over several processes, for example --jobs 8 to use 8 CPU cores. The dump is memory mapped (in stead of read into memory) and shared between the processes. The results are reported in the same order as with a single process. As soon as both the HMAC key and the AES key have been found, the search is stopped: other (false positive) AES keys found further in the process memory dump will not be reported.
+
+Before trying a 16-byte sequence as a key, the sequence is prefiltered: sequences with less than 10 unique byte values (like null bytes, pointers, ...) and sequences of printable ASCII characters are not tried. The probability that a random key (HMAC, AES or raw key) is pruned this way is less than 1 in a million. The prefilter is vectorized when NumPy is installed.
+Use option --noprefilter to try all sequences, and option --prefilterstats to report the number of pruned sequences and the measured time of the prefilter and the crypto operations, together with the estimated speedup.
+Only the first AES block of the encrypted data is decrypted to check the callback id.
+
 Beacon process memory can be encoded while the beacon is sleeping. This is done with a configuration option called a sleep mask. Since beacons sleep most of the time, it is very likely that you will take a process dump while a beacon is sleeping. This tool can not recover cryptographic keys from the process memory of a beacon with a sleep mask. If that is the case, use my tool cs-analyze-processdump.py first.
 
 '''
@@ -1281,20 +1293,42 @@ class cLogfile():
             self.Line('Finish', '%d error(s)' % self.errors, '%d second(s)' % (time.time() - self.starttime))
             self.oOutput.Close()
 
+BYTE_PREVALENCE_CACHE_SIZE = 0x100
+dBytePrevalenceCache = {}
+
+def NumPy():
+    # NumPy is only imported when it is needed: importing it takes more time than calculating the statistics of small data
+    try:
+        import numpy
+    except ImportError:
+        return None
+    return numpy
+
+# the prevalence is memoized by the SHA-256 of the data (for example, %ENTROPY%, %BYTESTATS% and %HISTOGRAM% count the bytes of the same data), the oldest entry is removed when the cache is full
+def CalculateBytePrevalence(data):
+    key = hashlib.sha256(data).digest()
+    if not key in dBytePrevalenceCache:
+        dPrevalence = {iter: 0 for iter in range(0x100)}
+        numpy = None
+        if len(data) >= 0x100000:
+            numpy = NumPy()
+        if numpy != None:
+            dPrevalence.update(enumerate(numpy.bincount(numpy.frombuffer(data, dtype=numpy.uint8), minlength=0x100).tolist()))
+        else:
+            dPrevalence.update(collections.Counter(bytearray(data)))
+        while len(dBytePrevalenceCache) >= BYTE_PREVALENCE_CACHE_SIZE:
+            dBytePrevalenceCache.pop(next(iter(dBytePrevalenceCache)), None)
+        dBytePrevalenceCache[key] = dPrevalence
+    return dict(dBytePrevalenceCache[key])
+
 def CalculateByteStatistics(dPrevalence=None, data=None):
     averageConsecutiveByteDifference = None
     if dPrevalence == None:
         dPrevalence = {iter: 0 for iter in range(0x100)}
-        sumDifferences = 0.0
-        previous = None
         if len(data) > 1:
-            for byte in data:
-                byte = C2IIP2(byte)
-                dPrevalence[byte] += 1
-                if previous != None:
-                    sumDifferences += abs(byte - previous)
-                previous = byte
-            averageConsecutiveByteDifference = sumDifferences /float(len(data)-1)
+            dPrevalence = CalculateBytePrevalence(data)
+            data = bytearray(data)
+            averageConsecutiveByteDifference = sum(map(abs, map(operator.sub, data[1:], data[:-1]))) / float(len(data) - 1)
     sumValues = sum(dPrevalence.values())
     countNullByte = dPrevalence[0]
     countControlBytes = 0
@@ -1563,6 +1597,204 @@ def AverageDifferenceConsecutiveBytes(data):
 def PrintableASCII(data):
     return ''.join([IFF(b >= 32 and b < 127, chr(b), '.') for b in data])
 
+SEARCH_CHUNK_SIZE = 0x10000
+KEY_MINIMUM_UNIQUE_BYTES = 10
+CS_FIXED_IV_CALLBACKID = struct.unpack('>I', CS_FIXED_IV[8:12])[0]
+oREPrintableKey = re.compile(b'[\x20-\x7E]{16}$')
+
+dSearchWorker = {}
+
+def SearchWorkerInitialize(filename, data, encryptedData, hmacSignatureMessage, prefilter):
+    if filename != None:
+        with open(filename, 'rb') as fIn:
+            data = mmap.mmap(fIn.fileno(), 0, access=mmap.ACCESS_READ)
+    dSearchWorker['data'] = data
+    dSearchWorker['encryptedData'] = encryptedData
+    dSearchWorker['hmacSignatureMessage'] = hmacSignatureMessage
+    dSearchWorker['prefilter'] = prefilter
+
+# random keys (like AES and HMAC keys) have at least 10 unique bytes (probability of less: 1e-8) and are not printable ASCII (probability: 1.3e-7)
+def KeyIsPlausible(key):
+    return len(set(key)) >= KEY_MINIMUM_UNIQUE_BYTES and oREPrintableKey.match(key) == None
+
+def CandidateKeyPositionsNumPy(numpy, data, start, stop):
+    block = numpy.frombuffer(data[start:stop + 15], dtype=numpy.uint8)
+    count = len(block) - 15
+    if count <= 0:
+        return [], 0
+    # a byte is the first occurrence of its value inside a window if the previous occurrence of its value is before the window
+    order = numpy.argsort(block, kind='stable')
+    same = block[order[1:]] == block[order[:-1]]
+    previous = numpy.full(len(block), -1, dtype=numpy.int64)
+    previous[order[1:][same]] = order[:-1][same]
+    windowStarts = numpy.arange(count)
+    uniqueBytes = numpy.zeros(count, dtype=numpy.int64)
+    for index in range(16):
+        uniqueBytes += previous[index:index + count] < windowStarts
+    notPrintable = numpy.concatenate(([0], numpy.cumsum((block < 0x20) | (block > 0x7E))))
+    printable = notPrintable[16:16 + count] == notPrintable[:count]
+    notNull = numpy.concatenate(([0], numpy.cumsum(block != 0)))
+    nullKeys = int(numpy.count_nonzero(notNull[16:16 + count] == notNull[:count]))
+    return (numpy.flatnonzero((uniqueBytes >= KEY_MINIMUM_UNIQUE_BYTES) & ~printable) + start).tolist(), nullKeys
+
+# null keys are never candidates, and are counted separately for the prefilter statistics (they are not tried without prefilter either)
+def CandidateKeyPositions(data, start, stop, prefilter):
+    if prefilter:
+        numpy = NumPy()
+        if numpy != None:
+            return CandidateKeyPositionsNumPy(numpy, data, start, stop)
+    result = []
+    nullKeys = 0
+    for iter in range(start, stop):
+        key = data[iter:iter + 16]
+        if len(key) < 16:
+            break
+        if key == b'\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00':
+            nullKeys += 1
+            continue
+        if prefilter and not KeyIsPlausible(key):
+            continue
+        result.append(iter)
+    return result, nullKeys
+
+def SearchKeys(data, start, stop, encryptedData, hmacSignatureMessage, prefilter):
+    hits = []
+    starttime = time.time()
+    positions, nullKeys = CandidateKeyPositions(data, start, stop, prefilter)
+    prefiltertime = time.time()
+    firstBlock = encryptedData[:16]
+    for iter in positions:
+        key = data[iter:iter + 16]
+#        if AverageDifferenceConsecutiveBytes(key) < 50.0:
+#            continue
+        hmacsSgnatureCalculated = hmac.new(key, encryptedData, hashlib.sha256).digest()[:16]
+        if hmacSignatureMessage == hmacsSgnatureCalculated:
+            hits.append(['HMAC', iter, key])
+
+        # the callback id is in the first block: CBC decryption of the first block is ECB decryption XOR IV
+        cypher = Crypto.Cipher.AES.new(key, Crypto.Cipher.AES.MODE_ECB)
+        callbackid = struct.unpack('>I', cypher.decrypt(firstBlock)[8:12])[0] ^ CS_FIXED_IV_CALLBACKID
+        if callbackid < 256:
+            hits.append(['AES', iter, key])
+    return hits, [stop - start, nullKeys, len(positions), prefiltertime - starttime, time.time() - prefiltertime]
+
+def SearchRawKey(data, start, stop, aeskey, hmackey, prefilter):
+    positions = []
+    for iter in CandidateKeyPositions(data, start, stop, prefilter)[0]:
+        key = data[iter:iter + 16]
+        sha256 = hashlib.sha256(key).digest()
+        if aeskey == sha256[:16] and hmackey == sha256[16:]:
+            positions.append(iter)
+    return positions
+
+def SearchWorker(job):
+    if job[0] == 'keys':
+        return SearchKeys(dSearchWorker['data'], job[1], job[2], dSearchWorker['encryptedData'], dSearchWorker['hmacSignatureMessage'], dSearchWorker['prefilter'])
+    else:
+        return SearchRawKey(dSearchWorker['data'], job[1], job[2], job[3], job[4], dSearchWorker['prefilter'])
+
+# the search range is split in chunks; with option --jobs the chunks are searched by a pool of processes and the results are processed in order of the chunks
+class cKeySearch(object):
+    def __init__(self, oOutput, options, data, filename, encryptedData, hmacSignatureMessage):
+        self.oOutput = oOutput
+        self.options = options
+        self.data = data
+        self.filename = filename
+        self.encryptedData = encryptedData
+        self.hmacSignatureMessage = hmacSignatureMessage
+        self.oPool = None
+        self.aeskey = None
+        self.hmackey = None
+        self.hmacaeskey = None
+        self.statistics = [0, 0, 0, 0.0, 0.0]
+
+    def Jobs(self, function, searchPosition, searchRange, *arguments):
+        stop = max(searchPosition, min(searchPosition + searchRange, len(self.data) - 15))
+        for start in range(searchPosition, stop, SEARCH_CHUNK_SIZE):
+            yield (function, start, min(start + SEARCH_CHUNK_SIZE, stop)) + arguments
+
+    def Map(self, jobs):
+        if self.options.jobs <= 1:
+            SearchWorkerInitialize(None, self.data, self.encryptedData, self.hmacSignatureMessage, not self.options.noprefilter)
+            return map(SearchWorker, jobs)
+        if self.oPool == None:
+            if self.filename == None:
+                initargs = (None, self.data, self.encryptedData, self.hmacSignatureMessage, not self.options.noprefilter)
+            else:
+                initargs = (self.filename, None, self.encryptedData, self.hmacSignatureMessage, not self.options.noprefilter)
+            self.oPool = multiprocessing.Pool(self.options.jobs, SearchWorkerInitialize, initargs)
+        return self.oPool.imap(SearchWorker, jobs)
+
+    def Terminate(self):
+        if self.oPool != None:
+            self.oPool.terminate()
+            self.oPool = None
+
+    def Found(self):
+        return self.hmackey != None and self.aeskey != None
+
+    def ProcessHits(self, hits):
+        for index, hit in enumerate(hits):
+            name, position, key = hit
+            if name == 'HMAC':
+                self.oOutput.Line('HMAC key position: 0x%08x' % position)
+                self.oOutput.Line('HMAC Key: %s' % binascii.b2a_hex(key).decode())
+#                self.oOutput.Line('%f' % AverageDifferenceConsecutiveBytes(key))
+                self.hmackey = key
+            else:
+                self.oOutput.Line('AES key position: 0x%08x' % position)
+                self.oOutput.Line('AES Key:  %s %s %f' % (binascii.b2a_hex(key).decode(), PrintableASCII(key), AverageDifferenceConsecutiveBytes(key)))
+                self.aeskey = key
+                if self.options.verbose:
+                    cypher = Crypto.Cipher.AES.new(key, Crypto.Cipher.AES.MODE_CBC, CS_FIXED_IV)
+                    self.oOutput.Line('Decrypted data:')
+                    self.oOutput.Line(cDump(cypher.decrypt(self.encryptedData)).HexAsciiDump(), eol='')
+            if index == len(hits) - 1 or hits[index + 1][1] != position:
+                if self.Found() and self.hmacaeskey == None:
+                    self.hmacaeskey = '%s:%s' % (binascii.b2a_hex(self.hmackey).decode(), binascii.b2a_hex(self.aeskey).decode())
+                    self.oOutput.Line('SHA256 raw key: %s' % self.hmacaeskey)
+
+    def Search(self, searchPosition, searchRange, fullsearch):
+        if self.options.jobs > 1 and self.Found():
+            return
+        starttime = time.time()
+        progressCounter = 0
+        iter = 0
+        for hits, statistics in self.Map(self.Jobs('keys', searchPosition, searchRange)):
+            self.statistics = [total + value for total, value in zip(self.statistics, statistics)]
+            if fullsearch and int((time.time() - starttime) / 60) > progressCounter:
+                progressCounter += 1
+                self.oOutput.Line('Progress: %d%% in %d seconds' % (float(iter) / float(searchRange) * 100.0, int(time.time() - starttime)))
+            iter += SEARCH_CHUNK_SIZE
+            self.ProcessHits(hits)
+            if self.options.jobs > 1 and self.Found():
+                self.Terminate()
+                break
+
+    def PrintStatistics(self):
+        positions, nullKeys, candidates, prefiltertime, cryptotime = self.statistics
+        if positions == 0:
+            return
+        self.oOutput.Line('Prefilter: %d positions, %d null keys, %d candidates, %d pruned (%.2f%%)' % (positions, nullKeys, candidates, positions - candidates, float(positions - candidates) / float(positions) * 100.0))
+        if candidates > 0:
+            # the time without prefilter is estimated with the measured crypto time per candidate: all non-null keys would be tried
+            estimatedtime = cryptotime / float(candidates) * float(positions - nullKeys)
+            self.oOutput.Line('Prefilter: %.2f seconds, crypto: %.2f seconds, estimated without prefilter: %.2f seconds, speedup: %.2fx' % (prefiltertime, cryptotime, estimatedtime, estimatedtime / max(prefiltertime + cryptotime, 0.000001)))
+
+    def SearchRawKey(self, searchPosition, searchRange):
+        for positions in self.Map(self.Jobs('rawkey', searchPosition, searchRange, self.aeskey, self.hmackey)):
+            for position in positions:
+                self.oOutput.Line('Raw key position: 0x%08x' % position)
+                self.oOutput.Line('Raw Key:  %s' % binascii.b2a_hex(self.data[position:position + 16]).decode())
+
+def MemoryMapBinaryFile(oBinaryFile):
+    if oBinaryFile.extracted or oBinaryFile.fIn == sys.stdin:
+        return None
+    try:
+        return mmap.mmap(oBinaryFile.fIn.fileno(), 0, access=mmap.ACCESS_READ)
+    except:
+        return None
+
 def ProcessBinaryFile(filename, content, cutexpression, flag, oOutput, oLogfile, options, oParserFlag):
     if content == None:
         try:
@@ -1571,15 +1803,23 @@ def ProcessBinaryFile(filename, content, cutexpression, flag, oOutput, oLogfile,
             oLogfile.LineError('Opening file %s %s' % (filename, repr(sys.exc_info()[1])))
             return
         oLogfile.Line('Success', 'Opening file %s' % filename)
-        try:
-            data = oBinaryFile.read()
-        except:
-            oLogfile.LineError('Reading file %s %s' % (filename, repr(sys.exc_info()[1])))
-            return
-        data = CutData(data, cutexpression)[0]
+        data = None
+        mmapFilename = None
+        if options.jobs > 1 and cutexpression == '':
+            data = MemoryMapBinaryFile(oBinaryFile)
+            if data != None:
+                mmapFilename = oBinaryFile.fIn.name
+        if data == None:
+            try:
+                data = oBinaryFile.read()
+            except:
+                oLogfile.LineError('Reading file %s %s' % (filename, repr(sys.exc_info()[1])))
+                return
+            data = CutData(data, cutexpression)[0]
         oBinaryFile.close()
     else:
         data = content
+        mmapFilename = None
 
     (flagoptions, flagargs) = oParserFlag.parse_args(flag.split(' '))
 
@@ -1660,59 +1900,22 @@ def ProcessBinaryFile(filename, content, cutexpression, flag, oOutput, oLogfile,
             if fullsearch:
                 oOutput.Line('Performing a full search')
                 searchPositions = [0]
-            starttime = time.time()
-            progressCounter = 0
-            for searchPosition in searchPositions:
-                searchRange = len(data)
-                if searchPosition != 0:
-                    oOutput.Line('Searching after sha256\\x00 string (0x%x)' % searchPosition)
-                    searchRange = 0x500000
-                for iter in range(searchRange):
-                    if fullsearch and int((time.time() - starttime) / 60) > progressCounter:
-                        progressCounter += 1
-                        oOutput.Line('Progress: %d%% in %d seconds' % (float(iter) / float(searchRange) * 100.0, int(time.time() - starttime)))
-                    iter = iter + searchPosition
-                    key = data[iter:iter + 16]
-                    if len(key) < 16:
-                        break
-                    if key == b'\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00':
-                        continue
-#                    if AverageDifferenceConsecutiveBytes(key) < 50.0:
-#                        continue
-                    hmacsSgnatureCalculated = hmac.new(key, encryptedData, hashlib.sha256).digest()[:16]
-                    if hmacSignatureMessage == hmacsSgnatureCalculated:
-                        oOutput.Line('HMAC key position: 0x%08x' % iter)
-                        oOutput.Line('HMAC Key: %s' % binascii.b2a_hex(key).decode())
-#                        oOutput.Line('%f' % AverageDifferenceConsecutiveBytes(key))
-                        hmackey = key
-
-                    cypher = Crypto.Cipher.AES.new(key, Crypto.Cipher.AES.MODE_CBC, CS_FIXED_IV)
-                    decryptedData = cypher.decrypt(encryptedData)
-                    callbackid = struct.unpack('>I', decryptedData[8:12])[0]
-                    if callbackid < 256:
-                        oOutput.Line('AES key position: 0x%08x' % iter)
-                        oOutput.Line('AES Key:  %s %s %f' % (binascii.b2a_hex(key).decode(), PrintableASCII(key), AverageDifferenceConsecutiveBytes(key)))
-                        aeskey = key
-                        if options.verbose:
-                            oOutput.Line('Decrypted data:')
-                            oOutput.Line(cDump(decryptedData).HexAsciiDump(), eol='')
-                    if hmackey != None and aeskey != None and hmacaeskey == None:
-                        hmacaeskey = '%s:%s' % (binascii.b2a_hex(hmackey).decode(), binascii.b2a_hex(aeskey).decode())
-                        oOutput.Line('SHA256 raw key: %s' % hmacaeskey)
-
-                oOutput.Line('Searching for raw key')
-                if hmackey != None and aeskey != None:
-                    for iter in range(searchRange):
-                        iter = iter + searchPosition
-                        key = data[iter:iter + 16]
-                        if len(key) < 16:
-                            break
-                        if key == b'\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00':
-                            continue
-                        sha256 = hashlib.sha256(key).digest()
-                        if aeskey == sha256[:16] and hmackey == sha256[16:]:
-                            oOutput.Line('Raw key position: 0x%08x' % iter)
-                            oOutput.Line('Raw Key:  %s' % binascii.b2a_hex(key).decode())
+            oKeySearch = cKeySearch(oOutput, options, data, mmapFilename, encryptedData, hmacSignatureMessage)
+            try:
+                for searchPosition in searchPositions:
+                    searchRange = len(data)
+                    if searchPosition != 0:
+                        oOutput.Line('Searching after sha256\\x00 string (0x%x)' % searchPosition)
+                        searchRange = 0x500000
+                    oKeySearch.Search(searchPosition, searchRange, fullsearch)
+
+                    oOutput.Line('Searching for raw key')
+                    if oKeySearch.Found():
+                        oKeySearch.SearchRawKey(searchPosition, searchRange)
+            finally:
+                oKeySearch.Terminate()
+            if options.prefilterstats:
+                oKeySearch.PrintStatistics()
 
         # ----------------------------------------------
     except:
@@ -1753,6 +1956,9 @@ https://DidierStevens.com'''
     oParser.add_option('-c', '--callback', type=str, default='', help='Encrypted callback data (hexadecimal)')
     oParser.add_option('-f', '--fullsearch', action='store_true', default=False, help='Search the complete memory dump (in combination with options -t and -c)')
     oParser.add_option('-d', '--donotfullsearch', action='store_true', default=False, help='Do not fallback to a fullsearch')
+    oParser.add_option('--jobs', type=int, default=1, help='Number of processes for the key search (default 1)')
+    oParser.add_option('--noprefilter', action='store_true', default=False, help='Do not prefilter candidate keys')
+    oParser.add_option('--prefilterstats', action='store_true', default=False, help='Report pruned candidate keys and speedup of the prefilter')
     oParser.add_option('-V', '--verbose', action='store_true', default=False, help='Verbose output')
     oParser.add_option('-o', '--output', type=str, default='', help='Output to file (# supported)')
     oParser.add_option('-p', '--password', default='infected', help='The ZIP password to be used (default infected)')
@@ -4,8 +4,8 @@ from __future__ import print_function
 
 __description__ = 'Analyze Cobalt Strike HTTP/DNS beacon traffic'
 __author__ = 'Didier Stevens'
-__version__ = '0.0.5'
-__date__ = '2022/02/15'
+__version__ = '0.0.6'
+__date__ = '2026/10/18'
 
 """
 
@@ -33,6 +33,7 @@ History:
   2021/11/26: merging HTTP and DNS
   2021/12/12: 0.0.4 bugfix HMAC invalid; extra constants https://github.com/DidierStevens/Beta/issues/5
   2022/02/15: 0.0.5 added error handling
+  2026/10/18: 0.0.6 added option --native: pcap/pcapng reader with TCP reassembly and HTTP parsing (no tshark)
 
 Todo:
   add support for non-default DNS labels
@@ -50,11 +51,14 @@ import struct
 import hashlib
 import hmac
 import base64
+import re
+import socket
+import zlib
+import gzip
 try:
     import pyshark
 except ImportError:
-    print('pyshark module required: pip install pyshark')
-    exit(-1)
+    pyshark = None
 try:
     import Crypto.Cipher.AES
 except ImportError:
@@ -68,6 +72,8 @@ Manual:
 This tool can decode (and decrypt if encrypted) Cobalt Strike network traffic.
 For HTTP and DNS beacons. HTTPS works too provided the TLS traffic is decrypted.
 
+By default, capture files are read with pyshark (tshark). With option --native, pcap and pcapng files (also gzip compressed) are read by this tool itself: TCP segments are reassembled per connection and HTTP requests and responses are parsed (Content-Length, chunked transfer encoding and gzip/deflate content encoding are supported). Option --native is for plaintext HTTP traffic (format http) only, option -Y is ignored. Format dns still requires pyshark.
+
 
 # https://github.com/nccgroup/pybeacon
 
@@ -770,51 +776,459 @@ class cCSParser(object):
 
         self.oOutput.Line('')
 
-def AnalyzeCaptureHTTP(filename, options):
-    oOutput = InstantiateCOutput(options)
-    oCSParser = cCSParser(options.rawkey, options.hmacaeskeys, True, True, options.transform, options.extract, oOutput)
-    dMethods = {}
+PCAP_LINKTYPE_NULL = 0
+PCAP_LINKTYPE_ETHERNET = 1
+PCAP_LINKTYPE_RAW = 101
+PCAP_LINKTYPE_LOOP = 108
+PCAP_LINKTYPE_LINUX_SLL = 113
+PCAP_LINKTYPE_IPV4 = 228
+PCAP_LINKTYPE_IPV6 = 229
+PCAP_LINKTYPE_LINUX_SLL2 = 276
+
+TCP_FLAG_FIN = 0x01
+TCP_FLAG_SYN = 0x02
+TCP_FLAG_RST = 0x04
+
+# reads pcap and pcapng files (optionally gzip compressed) one packet at a time
+class cPcapReader(object):
+    def __init__(self, filename):
+        self.fIn = open(filename, 'rb')
+        if self.fIn.read(2) == b'\x1F\x8B':
+            self.fIn.close()
+            self.fIn = gzip.open(filename, 'rb')
+        else:
+            self.fIn.seek(0)
 
-    capture = pyshark.FileCapture(filename, display_filter=options.displayfilter, use_json=True, include_raw=True)
-    for packet in capture:
-        if not hasattr(packet, 'http'):
-            continue
+    def Read(self, size):
+        data = self.fIn.read(size)
+        if len(data) < size:
+            raise EOFError
+        return data
 
-        if hasattr(packet.http, 'request') and packet.http.has_field('1\\r\\n'): # this is a bug in PyShark, should be fieldname request
-            dMethods[packet.number] = packet.http.get_field('1\\r\\n').method
+    # generator: yields (linktype, packet data)
+    def Packets(self):
+        try:
+            magic = self.Read(4)
+            if magic == b'\x0A\x0D\x0D\x0A':
+                for packet in self.PacketsPcapng(magic):
+                    yield packet
+            else:
+                for packet in self.PacketsPcap(magic):
+                    yield packet
+        except EOFError:
+            return
 
-        data_raw = None
-        if hasattr(packet.http, 'file_data_raw'):
-            data_raw = packet.http.file_data_raw
-        elif hasattr(packet.http, 'content-encoded_entity_body_(gzip)'):
-            data_raw = getattr(packet.http, 'content-encoded_entity_body_(gzip)').data.data_raw
+    def PacketsPcap(self, magic):
+        if magic in [b'\xD4\xC3\xB2\xA1', b'\x4D\x3C\xB2\xA1']:
+            endian = '<'
+        elif magic in [b'\xA1\xB2\xC3\xD4', b'\xA1\xB2\x3C\x4D']:
+            endian = '>'
         else:
-            continue
+            raise Exception('Unknown capture file format')
+        linktype = struct.unpack(endian + 'I', self.Read(20)[16:20])[0] & 0x0FFFFFFF
+        while True:
+            caplen = struct.unpack(endian + 'IIII', self.Read(16))[2]
+            yield linktype, self.Read(caplen)
 
-        if hasattr(packet.http, 'response'):
-            oOutput.Line('Packet number: %d' % packet.number)
-            if hasattr(packet.http, 'request_in') and len(packet.http.request_in.fields) > 0:
-                requestPacket = packet.http.request_in.fields[0].int_value
-                oOutput.Line('HTTP response (for request %d %s)' % (requestPacket, dMethods.get(requestPacket, '')))
+    def PacketsPcapng(self, blocktype):
+        linktypes = []
+        while True:
+            if blocktype == b'\x0A\x0D\x0D\x0A':
+                header = self.Read(8)
+                blocklength, byteordermagic = header[:4], header[4:]
+                if byteordermagic == b'\x4D\x3C\x2B\x1A':
+                    endian = '<'
+                elif byteordermagic == b'\x1A\x2B\x3C\x4D':
+                    endian = '>'
+                else:
+                    raise Exception('Unknown pcapng byte order')
+                self.Read(struct.unpack(endian + 'I', blocklength)[0] - 12)
+                linktypes = []
             else:
-                oOutput.Line('HTTP response')
-            try:
-                oCSParser.ProcessReplyPacketData(data_raw[0])
-            except Exception as e:
-                oOutput.Line('* An error occured')
-                oOutput.Line(e)
-
-        if hasattr(packet.http, 'request'):
-            oOutput.Line('Packet number: %d' % packet.number)
-            oOutput.Line('HTTP request %s' % dMethods.get(packet.number, ''))
-            oOutput.Line(packet.http.full_uri)
+                blocktype, blocklength = struct.unpack(endian + 'II', blocktype + self.Read(4))
+                body = self.Read(blocklength - 8)[:-4]
+                if blocktype == 1:
+                    linktypes.append(struct.unpack(endian + 'H', body[:2])[0])
+                elif blocktype == 6:
+                    interfaceid, caplen = struct.unpack(endian + 'I8xI', body[:16])
+                    yield linktypes[interfaceid], body[20:20 + caplen]
+                elif blocktype == 3:
+                    originallength = struct.unpack(endian + 'I', body[:4])[0]
+                    yield linktypes[0], body[4:4 + originallength]
+                elif blocktype == 2:
+                    interfaceid, caplen = struct.unpack(endian + 'H10xI', body[:16])
+                    yield linktypes[interfaceid], body[20:20 + caplen]
+            blocktype = self.Read(4)
+
+    def Close(self):
+        self.fIn.close()
+
+def PacketIP(linktype, data):
+    if linktype == PCAP_LINKTYPE_ETHERNET:
+        position = 12
+        ethertype = struct.unpack('>H', data[position:position + 2])[0]
+        while ethertype in [0x8100, 0x88A8, 0x9100]:
+            position += 4
+            ethertype = struct.unpack('>H', data[position:position + 2])[0]
+        if not ethertype in [0x0800, 0x86DD]:
+            return None
+        return data[position + 2:]
+    elif linktype in [PCAP_LINKTYPE_RAW, PCAP_LINKTYPE_IPV4, PCAP_LINKTYPE_IPV6, 12, 14]:
+        return data
+    elif linktype == PCAP_LINKTYPE_LINUX_SLL:
+        return data[16:]
+    elif linktype == PCAP_LINKTYPE_LINUX_SLL2:
+        return data[20:]
+    elif linktype in [PCAP_LINKTYPE_NULL, PCAP_LINKTYPE_LOOP]:
+        return data[4:]
+    return None
+
+# returns ((source address, source port), (destination address, destination port), sequence number, flags, payload) or None
+def PacketTCP(packet):
+    if len(packet) < 20:
+        return None
+    version = packet[0] >> 4
+    if version == 4:
+        headerlength = (packet[0] & 0x0F) * 4
+        totallength, fragment, protocol = struct.unpack('>H2xH1xB', packet[2:10])
+        if fragment & 0x3FFF != 0:
+            return None
+        if totallength == 0:
+            totallength = len(packet)
+        source = socket.inet_ntoa(packet[12:16])
+        destination = socket.inet_ntoa(packet[16:20])
+        segment = packet[headerlength:totallength]
+    elif version == 6:
+        payloadlength, protocol = struct.unpack('>HB', packet[4:7])
+        source = '[%s]' % socket.inet_ntop(socket.AF_INET6, packet[8:24])
+        destination = '[%s]' % socket.inet_ntop(socket.AF_INET6, packet[24:40])
+        position = 40
+        while protocol in [0, 43, 60]:
+            protocol = packet[position]
+            position += (packet[position + 1] + 1) * 8
+        segment = packet[position:40 + payloadlength]
+    else:
+        return None
+    if protocol != 6 or len(segment) < 20:
+        return None
+    sourceport, destinationport, sequence, offsetflags = struct.unpack('>HHI4xH', segment[:14])
+    return (source, sourceport), (destination, destinationport), sequence, offsetflags & 0x3F, segment[(offsetflags >> 12) * 4:]
+
+# reassembles one direction of a TCP connection: Add returns the data that is now in order
+class cTCPStream(object):
+    def __init__(self):
+        self.nextSequence = None
+        self.outOfOrder = {}
+
+    def Add(self, sequence, flags, payload):
+        if flags & TCP_FLAG_SYN:
+            self.nextSequence = (sequence + 1) & 0xFFFFFFFF
+            self.outOfOrder = {}
+            return b''
+        if self.nextSequence == None:
+            self.nextSequence = sequence
+        if len(payload) > 0 and len(payload) > len(self.outOfOrder.get(sequence, b'')):
+            self.outOfOrder[sequence] = payload
+        result = []
+        found = True
+        while found:
+            found = False
+            for sequence, payload in list(self.outOfOrder.items()):
+                distance = (sequence - self.nextSequence) & 0xFFFFFFFF
+                if distance != 0 and distance < 0x80000000:
+                    continue
+                del self.outOfOrder[sequence]
+                overlap = (self.nextSequence - sequence) & 0xFFFFFFFF
+                if overlap < len(payload):
+                    result.append(payload[overlap:])
+                    self.nextSequence = (self.nextSequence + len(payload) - overlap) & 0xFFFFFFFF
+                    found = True
+        return b''.join(result)
+
+# parses HTTP messages from one direction of a connection; data that does not start like an HTTP message is ignored
+class cHTTPParser(object):
+    oREStart = re.compile(b'(HTTP/|[A-Z]{1,16} )')
+    oREStartPartial = re.compile(b'[A-Z]{0,16}$')
+
+    def __init__(self, oConnection):
+        self.oConnection = oConnection
+        self.buffer = bytearray()
+        self.ignore = False
+        self.Reset()
+
+    def Reset(self):
+        self.headerEnd = None
+        self.mode = None
+        self.bodyLength = 0
+        self.chunkPosition = 0
+        self.chunks = []
+
+    def ParseHeaders(self):
+        position = self.buffer.find(b'\r\n\r\n')
+        if position == -1:
+            return False
+        self.headerEnd = position + 4
+        lines = bytes(self.buffer[:position]).decode('latin').split('\r\n')
+        self.startline = lines[0]
+        self.headers = []
+        for line in lines[1:]:
+            name, separator, value = line.partition(':')
+            self.headers.append([name.strip().lower(), value.strip()])
+        self.response = self.startline.startswith('HTTP/')
+        transferencoding = self.Header('transfer-encoding').lower()
+        contentlength = self.Header('content-length')
+        if self.response and (self.startline[9:12] in ['204', '304'] or self.startline[9:10] == '1' or self.oConnection.NextRequestMethod() == 'HEAD'):
+            self.mode = 'length'
+            self.bodyLength = 0
+        elif 'chunked' in transferencoding:
+            self.mode = 'chunked'
+            self.chunkPosition = self.headerEnd
+        elif contentlength.isdigit():
+            self.mode = 'length'
+            self.bodyLength = int(contentlength)
+        elif self.response:
+            self.mode = 'close'
+        else:
+            self.mode = 'length'
+            self.bodyLength = 0
+        return True
+
+    def Header(self, name):
+        for headername, value in self.headers:
+            if headername == name:
+                return value
+        return ''
+
+    def ParseChunks(self):
+        while True:
+            position = self.buffer.find(b'\r\n', self.chunkPosition)
+            if position == -1:
+                return None
+            chunksize = int(bytes(self.buffer[self.chunkPosition:position]).split(b';')[0].strip() or b'0', 16)
+            if chunksize == 0:
+                if self.buffer[position + 2:position + 4] == b'\r\n':
+                    return position + 4
+                trailerEnd = self.buffer.find(b'\r\n\r\n', position)
+                if trailerEnd == -1:
+                    return None
+                return trailerEnd + 4
+            if len(self.buffer) < position + 2 + chunksize + 2:
+                return None
+            self.chunks.append(bytes(self.buffer[position + 2:position + 2 + chunksize]))
+            self.chunkPosition = position + 2 + chunksize + 2
+
+    def Message(self, body, end):
+        message = [self.response, self.startline, self.headers, body]
+        del self.buffer[:end]
+        self.Reset()
+        return message
+
+    # returns the list of messages completed by data
+    def Feed(self, data):
+        messages = []
+        if self.ignore:
+            return messages
+        self.buffer.extend(data)
+        while len(self.buffer) > 0:
+            if self.headerEnd == None:
+                start = bytes(self.buffer[:17])
+                if not self.oREStart.match(start):
+                    if len(start) == 17 or not self.oREStartPartial.match(start):
+                        self.ignore = True
+                        self.buffer = bytearray()
+                    break
+                if not self.ParseHeaders():
+                    break
+            if self.mode == 'length':
+                if len(self.buffer) < self.headerEnd + self.bodyLength:
+                    break
+                messages.append(self.Message(bytes(self.buffer[self.headerEnd:self.headerEnd + self.bodyLength]), self.headerEnd + self.bodyLength))
+            elif self.mode == 'chunked':
+                end = self.ParseChunks()
+                if end == None:
+                    break
+                messages.append(self.Message(b''.join(self.chunks), end))
+            else:
+                break
+            self.oConnection.MessageParsed(messages[-1])
+        return messages
+
+    # returns the message delimited by closing the connection
+    def Close(self):
+        if self.headerEnd != None and self.mode == 'close':
+            message = self.Message(bytes(self.buffer[self.headerEnd:]), len(self.buffer))
+            self.oConnection.MessageParsed(message)
+            return [message]
+        return []
+
+class cHTTPConnection(object):
+    def __init__(self):
+        self.dStreams = {}
+        self.requests = []
+        self.closed = set()
+
+    def NextRequestMethod(self):
+        if self.requests == []:
+            return ''
+        return self.requests[0][1]
+
+    def MessageParsed(self, message):
+        if not message[0]:
+            self.requests.append([self.frameNumber, message[1].split(' ')[0]])
+
+    def Add(self, frameNumber, source, destination, sequence, flags, payload):
+        self.frameNumber = frameNumber
+        if not source in self.dStreams:
+            self.dStreams[source] = [cTCPStream(), cHTTPParser(self)]
+        oTCPStream, oHTTPParser = self.dStreams[source]
+        if oHTTPParser.ignore:
+            messages = []
+        else:
+            messages = oHTTPParser.Feed(oTCPStream.Add(sequence, flags, payload))
+        if flags & (TCP_FLAG_FIN | TCP_FLAG_RST):
+            messages.extend(oHTTPParser.Close())
+            self.closed.add(source)
+        result = []
+        for message in messages:
+            request = None
+            if message[0] and self.requests != []:
+                request = self.requests.pop(0)
+            result.append([frameNumber, message, request, destination])
+        return result
+
+    def Finished(self):
+        return len(self.closed) == 2
+
+def HTTPDecodeBody(headers, body):
+    contentencoding = ''
+    for name, value in headers:
+        if name == 'content-encoding':
+            contentencoding = value.lower()
+    try:
+        if contentencoding in ['gzip', 'x-gzip']:
+            return zlib.decompress(body, 16 + zlib.MAX_WBITS)
+        elif contentencoding == 'deflate':
             try:
-                oCSParser.ProcessPostPacketData(data_raw[0])
-            except Exception as e:
-                oOutput.Line('* An error occured')
-                oOutput.Line(e)
+                return zlib.decompress(body)
+            except zlib.error:
+                return zlib.decompress(body, -zlib.MAX_WBITS)
+    except zlib.error:
+        pass
+    return body
+
+# generator: yields [frame number, [response, startline, headers, body], [request frame number, request method] or None, (destination address, destination port)] for each HTTP message, in order of the frame that completes the message
+def HTTPMessagesNative(filename):
+    oPcapReader = cPcapReader(filename)
+    dConnections = {}
+    frameNumber = 0
+    for linktype, data in oPcapReader.Packets():
+        frameNumber += 1
+        try:
+            packet = PacketIP(linktype, data)
+            if packet == None:
+                continue
+            segment = PacketTCP(packet)
+        except (struct.error, IndexError, ValueError, socket.error):
+            continue
+        if segment == None:
+            continue
+        source, destination, sequence, flags, payload = segment
+        key = tuple(sorted([source, destination]))
+        if not key in dConnections:
+            if len(payload) == 0 and not flags & TCP_FLAG_SYN:
+                continue
+            dConnections[key] = cHTTPConnection()
+        oConnection = dConnections[key]
+        for result in oConnection.Add(frameNumber, source, destination, sequence, flags, payload):
+            yield result
+        if oConnection.Finished() or flags & TCP_FLAG_RST:
+            del dConnections[key]
+    oPcapReader.Close()
+
+def CheckPyshark():
+    if pyshark == None:
+        print('pyshark module required: pip install pyshark')
+        exit(-1)
+
+def ProcessHTTPResponse(oOutput, oCSParser, packetNumber, requestPacket, method, hexdata):
+    oOutput.Line('Packet number: %d' % packetNumber)
+    if requestPacket != None:
+        oOutput.Line('HTTP response (for request %d %s)' % (requestPacket, method))
+    else:
+        oOutput.Line('HTTP response')
+    try:
+        oCSParser.ProcessReplyPacketData(hexdata)
+    except Exception as e:
+        oOutput.Line('* An error occured')
+        oOutput.Line(e)
+
+def ProcessHTTPRequest(oOutput, oCSParser, packetNumber, method, uri, hexdata):
+    oOutput.Line('Packet number: %d' % packetNumber)
+    oOutput.Line('HTTP request %s' % method)
+    oOutput.Line(uri)
+    try:
+        oCSParser.ProcessPostPacketData(hexdata)
+    except Exception as e:
+        oOutput.Line('* An error occured')
+        oOutput.Line(e)
+
+def AnalyzeCaptureHTTPNative(filename, oOutput, oCSParser):
+    for frameNumber, message, request, destination in HTTPMessagesNative(filename):
+        response, startline, headers, body = message
+        body = HTTPDecodeBody(headers, body)
+        if len(body) == 0:
+            continue
+        if response:
+            if request == None:
+                ProcessHTTPResponse(oOutput, oCSParser, frameNumber, None, '', binascii.b2a_hex(body).decode())
+            else:
+                ProcessHTTPResponse(oOutput, oCSParser, frameNumber, request[0], request[1], binascii.b2a_hex(body).decode())
+        else:
+            method, uri = (startline.split(' ') + [''])[:2]
+            if not uri.startswith('http://') and not uri.startswith('https://'):
+                host = destination[0]
+                for name, value in headers:
+                    if name == 'host':
+                        host = value
+                uri = 'http://%s%s' % (host, uri)
+            ProcessHTTPRequest(oOutput, oCSParser, frameNumber, method, uri, binascii.b2a_hex(body).decode())
 
-    capture.close()
+def AnalyzeCaptureHTTP(filename, options):
+    oOutput = InstantiateCOutput(options)
+    oCSParser = cCSParser(options.rawkey, options.hmacaeskeys, True, True, options.transform, options.extract, oOutput)
+    dMethods = {}
+
+    if options.native:
+        AnalyzeCaptureHTTPNative(filename, oOutput, oCSParser)
+    else:
+        CheckPyshark()
+        capture = pyshark.FileCapture(filename, display_filter=options.displayfilter, use_json=True, include_raw=True)
+        for packet in capture:
+            if not hasattr(packet, 'http'):
+                continue
+
+            if hasattr(packet.http, 'request') and packet.http.has_field('1\\r\\n'): # this is a bug in PyShark, should be fieldname request
+                dMethods[packet.number] = packet.http.get_field('1\\r\\n').method
+
+            data_raw = None
+            if hasattr(packet.http, 'file_data_raw'):
+                data_raw = packet.http.file_data_raw
+            elif hasattr(packet.http, 'content-encoded_entity_body_(gzip)'):
+                data_raw = getattr(packet.http, 'content-encoded_entity_body_(gzip)').data.data_raw
+            else:
+                continue
+
+            if hasattr(packet.http, 'response'):
+                if hasattr(packet.http, 'request_in') and len(packet.http.request_in.fields) > 0:
+                    requestPacket = packet.http.request_in.fields[0].int_value
+                    ProcessHTTPResponse(oOutput, oCSParser, packet.number, requestPacket, dMethods.get(requestPacket, ''), data_raw[0])
+                else:
+                    ProcessHTTPResponse(oOutput, oCSParser, packet.number, None, '', data_raw[0])
+
+            if hasattr(packet.http, 'request'):
+                ProcessHTTPRequest(oOutput, oCSParser, packet.number, dMethods.get(packet.number, ''), packet.http.full_uri, data_raw[0])
+
+        capture.close()
 
     if len(oCSParser.dCommandsSummary) > 0:
         oOutput.Line('Commands summary:')
@@ -969,6 +1383,7 @@ def AnalyzeCaptureDNS(filename, options):
 
     if options.beaconid != '':
         dBeacons[options.beaconid.lower()] = 'option'
+    CheckPyshark()
     capture = pyshark.FileCapture(filename, display_filter=options.displayfilter, use_json=True)
     for packet in capture:
         if not hasattr(packet, 'dns'):
@@ -1159,6 +1574,7 @@ https://DidierStevens.com'''
     oParser.add_option('-e', '--extract', action='store_true', default=False, help='Extract payloads to disk')
     oParser.add_option('-r', '--rawkey', type=str, default='', help="CS beacon's raw key")
     oParser.add_option('-k', '--hmacaeskeys', type=str, default='', help="HMAC and AES keys in hexadecimal separated by :")
+    oParser.add_option('--native', action='store_true', default=False, help='Read pcap/pcapng files without tshark (format http only)')
     oParser.add_option('-Y', '--displayfilter', type=str, default='', help="Tshark display filter (default http/dns)")
     oParser.add_option('-t', '--transform', type=str, default='', help='Transformation instructions')
     oParser.add_option('-i', '--dnsidle', type=str, default='', help="DNS idle value")
@@ -2,8 +2,8 @@
 
 __description__ = 'This is essentialy a wrapper for the struct module'
 __author__ = 'Didier Stevens'
-__version__ = '0.0.14'
-__date__ = '2022/06/27'
+__version__ = '0.0.15'
+__date__ = '2026/10/18'
 
 """
 Source code put in public domain by Didier Stevens, no Copyright
@@ -51,6 +51,7 @@ History:
   2020/10/21: 0.0.14 Python 3 fix in cBinaryFile
   2022/06/15: update option find
   2022/06/27: Python 3 fix
+  2026/10/18: 0.0.15 faster byte statistics: CalculateBytePrevalence
 
 Todo:
 """
@@ -1282,6 +1283,34 @@ def FormatBytesData(data, position, options):
         return
     print(prefix + '16G: b %02X%02X%02X%02X-%02X%02X-%02X%02X-%02X%02X-%02X%02X%02X%02X%02X%02X m {%02X%02X%02X%02X-%02X%02X-%02X%02X-%02X%02X-%02X%02X%02X%02X%02X%02X}' % tuple(bytes[0:16] + bytes[3::-1] + bytes[5:3:-1] + bytes[7:5:-1] + bytes[8:16]))
 
+BYTE_PREVALENCE_CACHE_SIZE = 0x100
+dBytePrevalenceCache = {}
+
+def NumPy():
+    # NumPy is only imported when it is needed: importing it takes more time than calculating the statistics of small data
+    try:
+        import numpy
+    except ImportError:
+        return None
+    return numpy
+
+# the prevalence is memoized by the SHA-256 of the data (for example, %ENTROPY%, %BYTESTATS% and %HISTOGRAM% count the bytes of the same data), the oldest entry is removed when the cache is full
+def CalculateBytePrevalence(data):
+    key = hashlib.sha256(data).digest()
+    if not key in dBytePrevalenceCache:
+        dPrevalence = {iter: 0 for iter in range(0x100)}
+        numpy = None
+        if len(data) >= 0x100000:
+            numpy = NumPy()
+        if numpy != None:
+            dPrevalence.update(enumerate(numpy.bincount(numpy.frombuffer(data, dtype=numpy.uint8), minlength=0x100).tolist()))
+        else:
+            dPrevalence.update(collections.Counter(bytearray(data)))
+        while len(dBytePrevalenceCache) >= BYTE_PREVALENCE_CACHE_SIZE:
+            dBytePrevalenceCache.pop(next(iter(dBytePrevalenceCache)), None)
+        dBytePrevalenceCache[key] = dPrevalence
+    return dict(dBytePrevalenceCache[key])
+
 def CalculateByteStatistics(dPrevalence):
     sumValues = sum(dPrevalence.values())
     countNullByte = dPrevalence[0]
@@ -1379,9 +1408,7 @@ def ExtraInfoSHA256(data):
 def ExtraInfoENTROPY(data):
     if data == None:
         return ''
-    dPrevalence = {iter: 0 for iter in range(0x100)}
-    for char in data:
-        dPrevalence[P23Ord(char)] += 1
+    dPrevalence = CalculateBytePrevalence(data)
     sumValues, entropy, countUniqueBytes, countNullByte, countControlBytes, countWhitespaceBytes, countPrintableBytes, countHighBytes = CalculateByteStatistics(dPrevalence)
     return '%f' % entropy
 
@@ -1408,9 +1435,7 @@ def ExtraInfoTAILASCII(data):
 def ExtraInfoHISTOGRAM(data):
     if data == None:
         return ''
-    dPrevalence = {iter: 0 for iter in range(0x100)}
-    for char in data:
-        dPrevalence[ord(char)] += 1
+    dPrevalence = CalculateBytePrevalence(data)
     result = []
     count = 0
     minimum = None
@@ -1435,9 +1460,7 @@ def ExtraInfoHISTOGRAM(data):
 def ExtraInfoBYTESTATS(data):
     if data == None:
         return ''
-    dPrevalence = {iter: 0 for iter in range(0x100)}
-    for char in data:
-        dPrevalence[ord(char)] += 1
+    dPrevalence = CalculateBytePrevalence(data)
     sumValues, entropy, countUniqueBytes, countNullByte, countControlBytes, countWhitespaceBytes, countPrintableBytes, countHighBytes = CalculateByteStatistics(dPrevalence)
     return '%d,%d,%d,%d,%d' % (countNullByte, countControlBytes, countWhitespaceBytes, countPrintableBytes, countHighBytes)
 
@@ -4,8 +4,8 @@ from __future__ import print_function
 
 __description__ = 'Crack MS Office document password'
 __author__ = 'Didier Stevens'
-__version__ = '0.0.5'
-__date__ = '2020/03/29'
+__version__ = '0.0.8'
+__date__ = '2026/10/18'
 
 """
 Source code put in the public domain by Didier Stevens, no Copyright
@@ -18,6 +18,9 @@ History:
   2019/01/22: 0.0.3 fixed agile decryption (Crypto version 4.4: Agile Encryption) bug by adding file.decrypt ...
   2019/08/31: 0.0.4 added option -r
   2020/03/29: 0.0.5 added -p #f
+  2026/10/18: 0.0.6 added option --jobs; passwords are tested with the password verifier only
+  2026/10/18: 0.0.7 password lists are streamed and deduplicated; added option --checkpoint
+  2026/10/18: 0.0.8 checkpoint file is replaced atomically, a corrupt checkpoint file is ignored
 
 Todo:
 """
@@ -29,6 +32,10 @@ import zipfile
 import sys
 import os
 import textwrap
+import multiprocessing
+import collections
+import hashlib
+import json
 if sys.version_info[0] >= 3:
     from io import BytesIO as DataIO
 else:
@@ -40,8 +47,16 @@ except:
     print('This program requires module msoffcrypto.')
     print("You can get it from GitHub: https://github.com/nolze/msoffcrypto-tool\n")
     exit(-1)
+try:
+    from msoffcrypto.method.ecma376_agile import ECMA376Agile
+    from msoffcrypto.method.ecma376_standard import ECMA376Standard
+except ImportError:
+    ECMA376Agile = None
+    ECMA376Standard = None
 
 MALWARE_PASSWORD = 'infected'
+CRACK_CHUNK_SIZE = 10
+CHECKPOINT_INTERVAL = 60
 
 def PrintManual():
     manual = '''
@@ -62,11 +77,16 @@ One use case for option -e, is an email with password protected attachment: the
 Option -r will apply rules to the list of passwords to create derived passwords. The only rule for the moment is swapcase: swap the case of the password.
 For example, list [Secret PASSWORD] becomes list [Secret PASSWORD sECRET password] when option -r is used.
 
+A password list file (option -p) is read one line at a time, it is not loaded into memory. Passwords (including passwords derived by rules) are tested only once: duplicates are skipped. To remember which passwords have been tested, a set is kept in memory.
+Option --checkpoint can be used with long dictionary attacks to be able to resume them. Every minute (and when the tool is interrupted with Ctrl-C), the position in the password list (line number and rule number) is written to the checkpoint file given with option --checkpoint. When the tool is started again with the same checkpoint file, document and password options, the dictionary attack resumes after the last tested password. The checkpoint file is deleted when the dictionary attack ends. The checkpoint file is written to a temporary file first (checkpoint file + .tmp), that then replaces the checkpoint file. A corrupt checkpoint file is ignored with a warning: the dictionary attack starts from the beginning.
+
 When a password has been found, option -c can be used to run the program again with the cracked password, and thus avoid the delay caused by the dictionary attack.
 
 The tool can also decrypt the provided MS Office document if the password is recovered: use option -o to decrypt the document and give the filename for the decrypted document. If you provide - as filename, the decrypted document will be outputed to stdout.
 
 Since this is a Python tool based on a Python library, don't except fast password recovery. This is more a convenience program.
+Passwords are tested with the password verifier stored in the encryption header of the document: the document itself is only decrypted once the password has been found. For agile encryption (Office 2010 and later), each password requires 100000 SHA-512 iterations, this is CPU bound.
+Option --jobs can be used to distribute the dictionary attack over several processes, for example --jobs 8 to use 8 CPU cores. Each process parses the encryption header once, and tests batches of passwords. Progress and estimated time are reported for all processes together. As soon as a process finds the password, all processes are stopped.
 
 '''
     for line in manual.split('\n'):
@@ -93,12 +113,46 @@ def File2Strings(filename):
     except:
         return None
     try:
-        return map(lambda line:line.rstrip('\n\r'), f.readlines())
+        return list(map(lambda line:line.rstrip('\n\r'), f.readlines()))
     except:
         return None
     finally:
         f.close()
 
+# generator: yields the lines of a text file (optionally gzip compressed) one at a time
+def File2StringsStream(filename):
+    if os.path.splitext(filename)[1].lower() == '.gz':
+        f = gzip.GzipFile(filename, 'rb')
+    else:
+        f = open(filename, 'r')
+    try:
+        for line in f:
+            if not isinstance(line, str):
+                line = line.decode('latin')
+            yield line.rstrip('\n\r')
+    finally:
+        f.close()
+
+def CountLines(filename):
+    if os.path.splitext(filename)[1].lower() == '.gz':
+        f = gzip.GzipFile(filename, 'rb')
+    else:
+        f = open(filename, 'rb')
+    try:
+        count = 0
+        last = b'\n'
+        while True:
+            data = f.read(0x100000)
+            if len(data) == 0:
+                break
+            count += data.count(b'\n')
+            last = data[-1:]
+        if last != b'\n':
+            count += 1
+        return count
+    finally:
+        f.close()
+
 def GetDictionary(passwordfile, filename):
     if passwordfile == '#f':
         result = []
@@ -108,7 +162,7 @@ def GetDictionary(passwordfile, filename):
                 result.append(password[iIter2:])
         return result
     elif passwordfile != '':
-        return File2Strings(passwordfile)
+        return File2StringsStream(passwordfile)
     else:
 # https://github.com/magnumripper/JohnTheRipper/blob/bleeding-jumbo/run/password.lst
         return [
@@ -3677,8 +3731,10 @@ def RemoveQuotes(word):
 
 def DeduplicateAndPreserveOrder(list):
     result = []
+    seen = set()
     for element in list:
-        if not element in result:
+        if not element in seen:
+            seen.add(element)
             result.append(element)
     return result
 
@@ -3693,14 +3749,131 @@ def ExtractPasswords(filename):
             probablyPasswords.extend(words[index+1:index+5])
     return DeduplicateAndPreserveOrder(Unquoted(probablyPasswords) + probablyPasswords + Unquoted(words) + words)
 
-def ApplyRules(passwords):
-    result = []
+RULES = [lambda password: password, lambda password: password.swapcase()]
 
-    for password in passwords:
-        result.append(password)
-        result.append(password.swapcase())
-    
-    return result
+# generator: yields ((line number, rule number), password) for each password not yet tested; passwords up to and including position skip are not yielded
+def CandidatePasswords(passwords, rules, skip):
+    seen = set()
+    for line, password in enumerate(passwords):
+        for ruleNumber, rule in enumerate(rules):
+            candidate = rule(password)
+            if candidate in seen:
+                continue
+            seen.add(candidate)
+            if skip != None and (line, ruleNumber) <= skip:
+                continue
+            yield (line, ruleNumber), candidate
+
+class cCheckpoint(object):
+    def __init__(self, filename, identification):
+        self.filename = filename
+        self.identification = identification
+        self.savetime = time.time()
+
+    # returns (position, number of passwords tested) of the checkpoint, or (None, 0) if there is no matching checkpoint
+    def Load(self):
+        if self.filename == '' or not os.path.exists(self.filename):
+            return None, 0
+        try:
+            with open(self.filename, 'r') as fIn:
+                checkpoint = json.load(fIn)
+            if checkpoint.get('identification') != self.identification:
+                print('Checkpoint file %s is for another dictionary attack, starting from the beginning' % self.filename)
+                return None, 0
+            return tuple(checkpoint['position']), checkpoint['tested']
+        except (ValueError, KeyError, TypeError, AttributeError):
+            print('Warning: checkpoint file %s is corrupt, starting from the beginning' % self.filename)
+            return None, 0
+
+    def Save(self, position, tested, force=False):
+        if self.filename == '' or position == None:
+            return
+        if not force and time.time() - self.savetime < CHECKPOINT_INTERVAL:
+            return
+        # the checkpoint is written to a temporary file that replaces the checkpoint file, so that an interrupted write does not corrupt the checkpoint file
+        filenameTemporary = self.filename + '.tmp'
+        with open(filenameTemporary, 'w') as fOut:
+            json.dump({'identification': self.identification, 'position': list(position), 'tested': tested}, fOut)
+        os.replace(filenameTemporary, self.filename)
+        self.savetime = time.time()
+
+    def Remove(self):
+        if self.filename != '' and os.path.exists(self.filename):
+            os.remove(self.filename)
+
+# tests a password with the password verifier stored in the encryption header, without decrypting the document
+def VerifyPassword(file, password):
+    try:
+        fileFormat = getattr(file, 'format', '')
+        encryptionType = getattr(file, 'type', '')
+        if fileFormat == 'ooxml' and encryptionType == 'agile' and hasattr(ECMA376Agile, 'verify_password'):
+            info = file.info
+            return ECMA376Agile.verify_password(password, info['passwordSalt'], info['passwordHashAlgorithm'], info['encryptedVerifierHashInput'], info['encryptedVerifierHashValue'], info['spinValue'], info['passwordKeyBits'])
+        file.load_key(password=password)
+        if fileFormat == 'ooxml' and encryptionType == 'standard' and hasattr(ECMA376Standard, 'verifykey'):
+            return ECMA376Standard.verifykey(file.secret_key, file.info['verifier']['encryptedVerifier'], file.info['verifier']['encryptedVerifierHash'])
+        elif fileFormat == 'ooxml':
+            file.decrypt(DataIO())
+        # the other formats (doc, xls, ppt) verify the password in load_key
+        return True
+    except KeyboardInterrupt:
+        raise
+    except:
+        return False
+
+dCrackWorker = {}
+
+def CrackWorkerInitialize(data):
+    dCrackWorker['file'] = msoffcrypto.OfficeFile(DataIO(data))
+
+# returns (number of passwords tested, password found or None)
+def CrackWorker(batch):
+    for index, candidate in enumerate(batch):
+        position, password = candidate
+        if VerifyPassword(dCrackWorker['file'], password):
+            return index + 1, password
+    return len(batch), None
+
+# the candidate passwords are split in batches; with option --jobs the batches are tested by a pool of processes and the results are processed in order of the batches
+# only a few batches per process are submitted ahead, so that the password list is consumed as it is tested
+class cPasswordSearch(object):
+    def __init__(self, data, jobs):
+        self.data = data
+        self.jobs = jobs
+        self.oPool = None
+
+    def Batches(self, candidates):
+        batch = []
+        for candidate in candidates:
+            batch.append(candidate)
+            if len(batch) == CRACK_CHUNK_SIZE:
+                yield batch
+                batch = []
+        if batch != []:
+            yield batch
+
+    # generator: yields (batch, (number of passwords tested, password found or None))
+    def Map(self, candidates):
+        if self.jobs <= 1:
+            CrackWorkerInitialize(self.data)
+            for batch in self.Batches(candidates):
+                yield batch, CrackWorker(batch)
+            return
+        self.oPool = multiprocessing.Pool(self.jobs, CrackWorkerInitialize, (self.data, ))
+        pending = collections.deque()
+        for batch in self.Batches(candidates):
+            pending.append((batch, self.oPool.apply_async(CrackWorker, (batch, ))))
+            if len(pending) >= self.jobs * 4:
+                batch, result = pending.popleft()
+                yield batch, result.get()
+        while len(pending) > 0:
+            batch, result = pending.popleft()
+            yield batch, result.get()
+
+    def Terminate(self):
+        if self.oPool != None:
+            self.oPool.terminate()
+            self.oPool = None
 
 def Crack(filename, options):
     if filename == '':
@@ -3726,27 +3899,45 @@ def Crack(filename, options):
         else:
             passwords = ExtractPasswords(options.extractpasswords)
         if options.rules:
-            passwords = ApplyRules(passwords)
-        total = len(passwords)
+            rules = RULES
+        else:
+            rules = RULES[:1]
+        if isinstance(passwords, list):
+            total = len(passwords) * len(rules)
+        else:
+            total = CountLines(options.passwordlist) * len(rules)
+        identification = {'document': hashlib.md5(oDataIO.getvalue()).hexdigest(), 'passwordlist': options.passwordlist, 'extractpasswords': options.extractpasswords, 'rules': options.rules}
+        oCheckpoint = cCheckpoint(options.checkpoint, identification)
+        position, index = oCheckpoint.Load()
+        if position != None and options.output != '-':
+            print('Resuming after line %d rule %d (%d passwords tested)' % (position[0] + 1, position[1] + 1, index))
+        tested = 0
         starttime = time.time()
-        for index, password in enumerate(passwords):
-            if index == 0:
-                eta = ''
+        oPasswordSearch = cPasswordSearch(oDataIO.getvalue(), options.jobs)
+        finished = False
+        try:
+            for batch, result in oPasswordSearch.Map(CandidatePasswords(passwords, rules, position)):
+                count, password = result
+                index += count
+                tested += count
+                position = batch[count - 1][0]
+                if index // 100 > (index - count) // 100 and options.output != '-':
+                    seconds = int(float((time.time() - starttime) / float(tested)) * float(max(total - index, 0)))
+                    eta = 'estimation %d seconds left, finished %s' % (seconds, FormatTime(time.time() + seconds))
+                    print('%d/%d %s' % (index, total, eta))
+                if password != None:
+                    file.load_key(password=password)
+                    if options.output != '-':
+                        print('Password found: %s' % password)
+                    break
+                oCheckpoint.Save(position, index)
+            finished = True
+        finally:
+            oPasswordSearch.Terminate()
+            if finished:
+                oCheckpoint.Remove()
             else:
-                seconds = int(float((time.time() - starttime) / float(index)) * float(total - index))
-                eta = 'estimation %d seconds left, finished %s' % (seconds, FormatTime(time.time() + seconds))
-            if (index + 1) % 100 == 0 and options.output != '-':
-                print('%d/%d %s' % (index + 1, total, eta))
-            try:
-                file.load_key(password=password)
-                file.decrypt(DataIO())
-            except KeyboardInterrupt:
-                raise
-            except:
-                continue
-            if options.output != '-':
-                print('Password found: %s' % password)
-            break
+                oCheckpoint.Save(position, index, True)
     else:
         file.load_key(password=options.crackedpassword)
 
@@ -3774,6 +3965,8 @@ https://DidierStevens.com'''
     oParser.add_option('-e', '--extractpasswords', default='', help='A text file to extract passwords from')
     oParser.add_option('-c', '--crackedpassword', default='', help='The password to use')
     oParser.add_option('-r', '--rules', action='store_true', default=False, help='Apply password rules')
+    oParser.add_option('--checkpoint', default='', help='Checkpoint file to resume the dictionary attack')
+    oParser.add_option('--jobs', type=int, default=1, help='Number of processes for the dictionary attack (default 1)')
     oParser.add_option('--password', default=MALWARE_PASSWORD, help='The ZIP password to be used for the malware ZIP container (default %s)' % MALWARE_PASSWORD)
     oParser.add_option('-o', '--output', default='', help='Output filename for decrypted file (- for stdout)')
     (options, args) = oParser.parse_args()
@@ -2,8 +2,8 @@
 
 __description__ = 'Analyze OLE files (Compound Binary Files)'
 __author__ = 'Didier Stevens'
-__version__ = '0.0.72'
-__date__ = '2023/02/25'
+__version__ = '0.0.74'
+__date__ = '2026/10/18'
 
 """
 
@@ -121,12 +121,15 @@ History:
   2022/09/04: 0.0.70 bumping version for update to plugin(s), no changes to oledump.py
   2022/11/09: 0.0.71 bumping version for update to plugin(s), no changes to oledump.py
   2023/02/25: 0.0.72 added cStruct
+  2026/10/18: 0.0.73 faster byte statistics: CalculateBytePrevalence
+  2026/10/18: 0.0.74 OLEGetStreams: streams are read when needed (cOLEStream), one at a time
 
 Todo:
 
 """
 
 import optparse
+import collections
 import sys
 import math
 import os
@@ -1604,6 +1607,34 @@ def ExtraInfoSHA1(data):
 def ExtraInfoSHA256(data):
     return hashlib.sha256(data).hexdigest()
 
+BYTE_PREVALENCE_CACHE_SIZE = 0x100
+dBytePrevalenceCache = {}
+
+def NumPy():
+    # NumPy is only imported when it is needed: importing it takes more time than calculating the statistics of small data
+    try:
+        import numpy
+    except ImportError:
+        return None
+    return numpy
+
+# the prevalence is memoized by the SHA-256 of the data (for example, %ENTROPY%, %BYTESTATS% and %HISTOGRAM% count the bytes of the same data), the oldest entry is removed when the cache is full
+def CalculateBytePrevalence(data):
+    key = hashlib.sha256(data).digest()
+    if not key in dBytePrevalenceCache:
+        dPrevalence = {iter: 0 for iter in range(0x100)}
+        numpy = None
+        if len(data) >= 0x100000:
+            numpy = NumPy()
+        if numpy != None:
+            dPrevalence.update(enumerate(numpy.bincount(numpy.frombuffer(data, dtype=numpy.uint8), minlength=0x100).tolist()))
+        else:
+            dPrevalence.update(collections.Counter(bytearray(data)))
+        while len(dBytePrevalenceCache) >= BYTE_PREVALENCE_CACHE_SIZE:
+            dBytePrevalenceCache.pop(next(iter(dBytePrevalenceCache)), None)
+        dBytePrevalenceCache[key] = dPrevalence
+    return dict(dBytePrevalenceCache[key])
+
 def CalculateByteStatistics(dPrevalence):
     sumValues = sum(dPrevalence.values())
     countNullByte = dPrevalence[0]
@@ -1629,9 +1660,7 @@ def CalculateByteStatistics(dPrevalence):
     return sumValues, entropy, countNullByte, countControlBytes, countWhitespaceBytes, countPrintableBytes, countHighBytes
 
 def ExtraInfoENTROPY(data):
-    dPrevalence = {iter: 0 for iter in range(0x100)}
-    for char in data:
-        dPrevalence[P23Ord(char)] += 1
+    dPrevalence = CalculateBytePrevalence(data)
     sumValues, entropy, countNullByte, countControlBytes, countWhitespaceBytes, countPrintableBytes, countHighBytes = CalculateByteStatistics(dPrevalence)
     return '%f' % entropy
 
@@ -1656,9 +1685,7 @@ def ExtraInfoTAILASCII(data):
     return ''.join([IFF(P23Ord(b) >= 32 and P23Ord(b) < 127, P23Chr(b), '.') for b in data[-16:]])
 
 def ExtraInfoHISTOGRAM(data):
-    dPrevalence = {iter: 0 for iter in range(0x100)}
-    for char in data:
-        dPrevalence[P23Ord(char)] += 1
+    dPrevalence = CalculateBytePrevalence(data)
     result = []
     count = 0
     minimum = None
@@ -1681,9 +1708,7 @@ def ExtraInfoHISTOGRAM(data):
     return ','.join(result)
 
 def ExtraInfoBYTESTATS(data):
-    dPrevalence = {iter: 0 for iter in range(0x100)}
-    for char in data:
-        dPrevalence[P23Ord(char)] += 1
+    dPrevalence = CalculateBytePrevalence(data)
     sumValues, entropy, countNullByte, countControlBytes, countWhitespaceBytes, countPrintableBytes, countHighBytes = CalculateByteStatistics(dPrevalence)
     return '%d,%d,%d,%d,%d' % (countNullByte, countControlBytes, countWhitespaceBytes, countPrintableBytes, countHighBytes)
 
@@ -1768,27 +1793,59 @@ def GetUnusedData(ole, fname):
         else:
             lendata = len(data)
 
+# stream, storage or root entry of an OLE file: name, type and size are available immediately, the content is only read when method Stream is called, and it is read only once
+class cOLEStream(object):
+    def __init__(self, ole, orphan, fname, entry_type, entry_metadata, direntry, unuseddata):
+        self.ole = ole
+        self.orphan = orphan
+        self.fname = fname
+        self.entry_type = entry_type
+        self.entry_metadata = entry_metadata
+        self.direntry = direntry
+        self.unuseddata = unuseddata
+        if entry_type == 2:
+            self.size = direntry.size
+        else:
+            self.size = 0
+        self.stream = None
+        self.sizeUnusedData = 0
+
+    def Stream(self):
+        if self.stream == None:
+            if self.entry_type == 5:
+                self.stream = ''
+            elif self.entry_type != 2:
+                self.stream = b''
+            elif self.orphan:
+                self.stream = self.ole._open(self.direntry.isectStart, self.direntry.size).read()
+            else:
+                self.stream = self.ole.openstream(self.fname).read()
+                if self.unuseddata:
+                    unusedData = GetUnusedData(self.ole, self.fname)
+                    self.sizeUnusedData = len(unusedData)
+                    self.stream += unusedData
+        return self.stream
+
+    def SizeUnusedData(self):
+        self.Stream()
+        return self.sizeUnusedData
+
+# generator: yields a cOLEStream object for each entry; all entries (orphans included) are looked up before the first one is yielded, and an entry is not referenced anymore after it has been yielded, so that the content of only one stream is kept in memory
 def OLEGetStreams(ole, storages, unuseddata):
-    olestreams = []
+    olestreams = collections.deque()
     if storages:
-        olestreams.append([0, [ole.root.name], ole.root.entry_type, [ole.root.clsid, ole.root.createTime, ole.root.modifyTime], '', 0])
+        olestreams.append(cOLEStream(ole, 0, [ole.root.name], ole.root.entry_type, [ole.root.clsid, ole.root.createTime, ole.root.modifyTime], ole.root, unuseddata))
     for fname in ole.listdir(storages=storages):
-        unusedData = b''
-        if ole.get_type(fname) == 1:
-            data = b''
-        else:
-            data = ole.openstream(fname).read()
-            if unuseddata:
-                unusedData = GetUnusedData(ole, fname)
         direntry = ole.direntries[ole._find(fname)]
-        olestreams.append([0, fname, ole.get_type(fname), [ole.getclsid(fname), direntry.createTime, direntry.modifyTime], data + unusedData, len(unusedData)])
+        olestreams.append(cOLEStream(ole, 0, fname, ole.get_type(fname), [ole.getclsid(fname), direntry.createTime, direntry.modifyTime], direntry, unuseddata))
     for sid in range(len(ole.direntries)):
         entry = ole.direntries[sid]
         if entry is None:
             entry = ole._load_direntry(sid)
             if entry.entry_type == 2:
-                olestreams.append([1, entry.name, entry.entry_type, ['', 0, 0], ole._open(entry.isectStart, entry.size).read(), 0])
-    return olestreams
+                olestreams.append(cOLEStream(ole, 1, entry.name, entry.entry_type, ['', 0, 0], entry, unuseddata))
+    while len(olestreams) > 0:
+        yield olestreams.popleft()
 
 def SelectPart(stream, part, moduleinfodata):
     if part == '':
@@ -1911,14 +1968,14 @@ def OLESub(ole, data, prefix, rules, options):
         object = []
         counter = 1
         if options.vbadecompress:
-            for orphan, fname, entry_type, entry_metadata, stream, sizeUnusedData in OLEGetStreams(ole, options.storages, options.unuseddata):
-                vbacode = SearchAndDecompress(stream, '')
+            for oOLEStream in OLEGetStreams(ole, options.storages, options.unuseddata):
+                vbacode = SearchAndDecompress(oOLEStream.Stream(), '')
                 if vbacode != '':
-                    object.append({'id': counter, 'name': PrintableName(fname), 'content': C2SIP3(binascii.b2a_base64(vbacode.encode())).strip('\n')})
+                    object.append({'id': counter, 'name': PrintableName(oOLEStream.fname), 'content': C2SIP3(binascii.b2a_base64(vbacode.encode())).strip('\n')})
                 counter += 1
         else:
-            for orphan, fname, entry_type, entry_metadata, stream, sizeUnusedData in OLEGetStreams(ole, options.storages, options.unuseddata):
-                object.append({'id': counter, 'name': PrintableName(fname), 'content': C2SIP3(binascii.b2a_base64(stream)).strip('\n')})
+            for oOLEStream in OLEGetStreams(ole, options.storages, options.unuseddata):
+                object.append({'id': counter, 'name': PrintableName(oOLEStream.fname), 'content': C2SIP3(binascii.b2a_base64(oOLEStream.Stream())).strip('\n')})
                 counter += 1
         print(json.dumps({'version': 2, 'id': 'didierstevens.com', 'type': 'content', 'fields': ['id', 'name', 'content'], 'items': object}))
         return (returnCode, 0)
@@ -1936,7 +1993,10 @@ def OLESub(ole, data, prefix, rules, options):
         for oPluginOle in objectsPluginOle:
             oPluginOle.PreProcess()
 
-        for orphan, fname, entry_type, entry_metadata, stream, sizeUnusedData in OLEGetStreams(ole, options.storages, options.unuseddata):
+        for oOLEStream in OLEGetStreams(ole, options.storages, options.unuseddata):
+            orphan, fname, entry_type, entry_metadata = oOLEStream.orphan, oOLEStream.fname, oOLEStream.entry_type, oOLEStream.entry_metadata
+            # the indicators and the return code depend on the content of each stream
+            stream = oOLEStream.Stream()
             indicator = ' '
             macroPresent = False
             if options.info:
@@ -1953,7 +2013,7 @@ def OLESub(ole, data, prefix, rules, options):
                 indicator = '.'
             elif entry_type == 2:
                 if options.unuseddata:
-                    lengthString = '%d(%d)' % (len(stream), sizeUnusedData)
+                    lengthString = '%d(%d)' % (len(stream), oOLEStream.SizeUnusedData())
                     lengthString = '%12s' % lengthString
                 else:
                     lengthString = '%7d' % len(stream)
@@ -2108,9 +2168,10 @@ def OLESub(ole, data, prefix, rules, options):
         else:
             selection = options.select
             part = ''
-        for orphan, fname, entry_type, entry_metadata, stream, sizeUnusedData in OLEGetStreams(ole, options.storages, options.unuseddata):
+        for oOLEStream in OLEGetStreams(ole, options.storages, options.unuseddata):
+            fname = oOLEStream.fname
             if selection == 'a' or ('%s%d' % (prefix, counter)) == selection.upper() or prefix == 'A' and str(counter) == selection or PrintableName(fname).lower() == selection.lower():
-                StdoutWriteChunked(HeadTail(DumpFunction(DecompressFunction(DecodeFunction(decoders, options, CutData(SelectPart(stream, part, dModuleinfo.get(''.join([c + '\x00' for c in fname[-1]]), None)), options.cut)[0]))), options.headtail))
+                StdoutWriteChunked(HeadTail(DumpFunction(DecompressFunction(DecodeFunction(decoders, options, CutData(SelectPart(oOLEStream.Stream(), part, dModuleinfo.get(''.join([c + '\x00' for c in fname[-1]]), None)), options.cut)[0]))), options.headtail))
                 selectionCounter += 1
                 if selection != 'a':
                     break
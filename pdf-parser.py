@@ -2,8 +2,8 @@
 
 __description__ = 'pdf-parser, use it to parse a PDF document'
 __author__ = 'Didier Stevens'
-__version__ = '0.7.8'
-__date__ = '2023/01/03'
+__version__ = '0.7.9'
+__date__ = '2026/10/18'
 __minimum_python_version__ = (2, 5, 1)
 __maximum_python_version__ = (3, 11, 1)
 
@@ -74,6 +74,8 @@ History:
   2022/05/24: bug fixes
   2022/11/09: V0.7.7 added support for environment variable DSS_DEFAULT_HASH_ALGORITHMS
   2023/01/03: V0.7.8 added unreferenced objects to statistics
+  2026/10/18: V0.7.9 added cPDFTokenizerBuffer (memory-mapped, regex based tokenizer) and option --legacytokenizer
+  2026/10/18: added option --index
 
 Todo:
   - handle printf todo
@@ -91,6 +93,8 @@ import zipfile
 import time
 import os
 import textwrap
+import mmap
+import json
 if sys.version_info[0] >= 3:
     from io import StringIO
     import urllib.request
@@ -135,6 +139,11 @@ https://blog.didierstevens.com/2010/09/26/free-malicious-pdf-analysis-e-book/
 
 Option -o is used to select objects by id. Provide a single id or multiple ids separated by a comma (,).
 
+Option --index can be used together with option -o, -r or --searchstream to avoid parsing the complete PDF document for each query.
+An index of the indirect objects is created by parsing the xref tables and xref streams (objects inside /ObjStm objects are indexed too, use option -O to select these). When the xref is missing or broken, the index is created by scanning the file for "N G obj".
+Selected objects are then parsed directly at their position in the file.
+The index is stored in a file with the same name as the PDF file and extension .pdf-parser.idx, and is reused as long as the SHA-256 of the PDF file does not change. Referenced objects (option -r) are added to the index the first time they are needed.
+
 When environment variable PDFPARSER_OPTIONS is defined, the options it defines are added implicitely to the command line arguments.
 Use this to define options you want included with each use of pdf-parser.py.
 Like option -O, to parse stream objects (/ObjStm).
@@ -230,6 +239,16 @@ class cPDFDocument:
         self.ungetted = []
         self.position = -1
 
+    def ReadAll(self):
+        try:
+            data = mmap.mmap(self.infile.fileno(), 0, access=mmap.ACCESS_READ)
+        except:
+            data = self.infile.read()
+            if sys.version_info[0] > 2 and type(data) != bytes:
+                data = data.encode('latin')
+        self.infile.close()
+        return data
+
     def byte(self):
         if len(self.ungetted) != 0:
             self.position += 1
@@ -342,11 +361,53 @@ class cPDFTokenizer:
     def unget(self, byte):
         self.ungetted.append(byte)
 
+# cPDFTokenizerBuffer produces the same tokens as cPDFTokenizer, but it works on the complete file (memory-mapped when possible) with a precompiled regular expression in stead of reading and classifying the file byte per byte
+# whitespace run | regular run | delimiters: <<, >>, comment (up to and including end-of-line, \r\n or \n\n) or single delimiter
+reTokens = re.compile(br'([\x00\x09\x0A\x0C\x0D\x20]+)|([^\x00\x09\x0A\x0C\x0D\x20()<>\[\]{}/%]+)|(<<|>>|%[^\x0A\x0D]*(?:[\x0A\x0D]\x0A?)?|[()<>\[\]{}/])')
+dTokenClasses = {1: CHAR_WHITESPACE, 2: CHAR_REGULAR, 3: CHAR_DELIMITER}
+
+class cPDFTokenizerBuffer:
+    def __init__(self, file, position=0):
+        if isinstance(file, cPDFIndex):
+            self.data = file.data
+        else:
+            self.data = cPDFDocument(file).ReadAll()
+        if sys.version_info[0] > 2:
+            self.oTokens = ((dTokenClasses[oMatch.lastindex], oMatch.group().decode('latin1')) for oMatch in reTokens.finditer(self.data, position))
+        else:
+            self.oTokens = ((dTokenClasses[oMatch.lastindex], oMatch.group()) for oMatch in reTokens.finditer(self.data, position))
+        self.ungetted = []
+
+    def Token(self):
+        if len(self.ungetted) != 0:
+            return self.ungetted.pop()
+        return next(self.oTokens, None)
+
+    def TokenIgnoreWhiteSpace(self):
+        token = self.Token()
+        while token != None and token[0] == CHAR_WHITESPACE:
+            token = self.Token()
+        return token
+
+    def Tokens(self):
+        tokens = []
+        token = self.Token()
+        while token != None:
+            tokens.append(token)
+            token = self.Token()
+        return tokens
+
+    def unget(self, byte):
+        self.ungetted.append(byte)
+
 class cPDFParser:
-    def __init__(self, file, verbose=False, extract=None, objstm=None):
+    def __init__(self, file, verbose=False, extract=None, objstm=None, legacytokenizer=False, position=0):
         self.context = CONTEXT_NONE
         self.content = []
-        self.oPDFTokenizer = cPDFTokenizer(file)
+        if legacytokenizer:
+            self.oPDFTokenizer = cPDFTokenizer(file)
+        else:
+            self.oPDFTokenizer = cPDFTokenizerBuffer(file, position)
         self.verbose = verbose
         self.extract = extract
         self.objstm = objstm
@@ -1327,6 +1388,26 @@ def ParseINIFile():
                 keywords.append(key)
     return keywords
 
+def ObjStmSynthesizedPDF(object, nocanonicalizedoutput):
+    oPDFParseDictionary = cPDFParseDictionary(object.ContainsStream(), nocanonicalizedoutput)
+    numberOfObjects = int(oPDFParseDictionary.Get('/N')[0])
+    offsetFirstObject = int(oPDFParseDictionary.Get('/First')[0])
+    indexes = list(map(int, C2SIP3(object.Stream())[:offsetFirstObject].strip().split(' ')))
+    if len(indexes) % 2 != 0 or len(indexes) / 2 != numberOfObjects:
+        raise Exception('Error in index of /ObjStm stream')
+    streamObject = C2SIP3(object.Stream()[offsetFirstObject:])
+    synthesizedPDF = ''
+    while len(indexes) > 0:
+        objectNumber = indexes[0]
+        offset = indexes[1]
+        indexes = indexes[2:]
+        if len(indexes) >= 2:
+            offsetNextObject = indexes[1]
+        else:
+            offsetNextObject = len(streamObject)
+        synthesizedPDF += '%d 0 obj\n%s\nendobj\n' % (objectNumber, streamObject[offset:offsetNextObject])
+    return synthesizedPDF
+
 def MatchObjectID(id, selection):
     return str(id) in selection.split(',')
 
@@ -1390,6 +1471,325 @@ def CalculateChosenHash(data):
     dHashes[hashes[0]].update(data)
     return dHashes[hashes[0]].hexdigest(), hashes[0]
 
+def PNGPredictorDecode(data, columns):
+    data = bytearray(C2BIP3(data))
+    result = bytearray()
+    previous = bytearray(columns)
+    for rowStart in range(0, len(data) - columns, columns + 1):
+        predictor = data[rowStart]
+        row = data[rowStart + 1:rowStart + 1 + columns]
+        for i in range(len(row)):
+            left = IFF(i > 0, lambda: row[i - 1], 0)
+            up = previous[i]
+            if predictor == 1:
+                row[i] = (row[i] + left) & 0xFF
+            elif predictor == 2:
+                row[i] = (row[i] + up) & 0xFF
+            elif predictor == 3:
+                row[i] = (row[i] + (left + up) // 2) & 0xFF
+            elif predictor == 4:
+                upLeft = IFF(i > 0, lambda: previous[i - 1], 0)
+                estimate = left + up - upLeft
+                distanceLeft = abs(estimate - left)
+                distanceUp = abs(estimate - up)
+                distanceUpLeft = abs(estimate - upLeft)
+                if distanceLeft <= distanceUp and distanceLeft <= distanceUpLeft:
+                    row[i] = (row[i] + left) & 0xFF
+                elif distanceUp <= distanceUpLeft:
+                    row[i] = (row[i] + up) & 0xFF
+                else:
+                    row[i] = (row[i] + upLeft) & 0xFF
+        result += row
+        previous = row
+    return bytes(result)
+
+def DictionaryIntegers(value):
+    if value == None:
+        return []
+    return [int(item) for item in value if item.strip() != '' and IsNumeric(item)]
+
+INDEX_VERSION = 1
+reIndirectObject = re.compile(br'(?<![^\x00\x09\x0A\x0C\x0D\x20()<>\[\]{}/%])(\d+)[\x00\x09\x0A\x0C\x0D\x20]+(\d+)[\x00\x09\x0A\x0C\x0D\x20]+obj(?![^\x00\x09\x0A\x0C\x0D\x20()<>\[\]{}/%])')
+reXrefSubsection = re.compile(br'[\x00\x09\x0A\x0C\x0D\x20]*(\d+)[\x00\x09\x0A\x0C\x0D\x20]+(\d+)[\x00\x09\x0A\x0C\x0D\x20]*[\x0A\x0D]')
+reXrefEntry = re.compile(br'[\x00\x09\x0A\x0C\x0D\x20]*(\d{1,10})[\x00\x09\x0A\x0C\x0D\x20]+(\d{1,5})[\x00\x09\x0A\x0C\x0D\x20]+([nf])')
+reStartxref = re.compile(br'startxref[\x00\x09\x0A\x0C\x0D\x20]+(\d+)')
+reTrailer = re.compile(br'(?<![^\x00\x09\x0A\x0C\x0D\x20()<>\[\]{}/%])trailer(?![^\x00\x09\x0A\x0C\x0D\x20()<>\[\]{}/%])')
+
+# cPDFIndex locates indirect objects via the xref tables and xref streams (or a regex scan for broken PDF files) so that selected objects can be parsed without parsing the complete file
+# the index is cached in a sidecar file (filename + .pdf-parser.idx), that is only used when the SHA-256 of the file matches
+class cPDFIndex:
+    def __init__(self, file, nocanonicalizedoutput):
+        self.nocanonicalizedoutput = nocanonicalizedoutput
+        self.data = cPDFDocument(file).ReadAll()
+        self.sha256 = hashlib.sha256(self.data).hexdigest()
+        if file.lower().startswith('http://') or file.lower().startswith('https://'):
+            self.cachefilename = None
+        else:
+            self.cachefilename = file + '.pdf-parser.idx'
+        self.modified = False
+        self.index = self.LoadCache()
+        if self.index == None:
+            self.index = self.Build()
+            self.modified = True
+
+    def LoadCache(self):
+        if self.cachefilename == None:
+            return None
+        try:
+            fCache = open(self.cachefilename, 'r')
+            try:
+                index = json.load(fCache)
+            finally:
+                fCache.close()
+        except:
+            return None
+        if index.get('version') != INDEX_VERSION or index.get('sha256') != self.sha256:
+            return None
+        return index
+
+    def SaveCache(self):
+        if self.cachefilename == None or not self.modified:
+            return
+        try:
+            fCache = open(self.cachefilename, 'w')
+            try:
+                json.dump(self.index, fCache)
+            finally:
+                fCache.close()
+        except:
+            pass
+
+    def ParseObjectAt(self, offset):
+        object = cPDFParser(self, position=offset).GetObject()
+        if object != None and object.type == PDF_ELEMENT_INDIRECT_OBJECT:
+            return object
+        return None
+
+    def ParseTrailerAt(self, offset):
+        object = cPDFParser(self, position=offset).GetObject()
+        if object != None and object.type == PDF_ELEMENT_TRAILER:
+            return cPDFParseDictionary(object.content[1:], self.nocanonicalizedoutput)
+        return None
+
+    def IsObjectAt(self, offset, id):
+        oMatch = reIndirectObject.match(self.data, offset)
+        return oMatch != None and int(oMatch.group(1)) == id
+
+    def ParseXrefTable(self, offset, objects, trailers):
+        position = offset + len('xref')
+        while True:
+            oMatch = reXrefSubsection.match(self.data, position)
+            if oMatch == None:
+                break
+            start = int(oMatch.group(1))
+            position = oMatch.end()
+            for number in range(int(oMatch.group(2))):
+                oMatch = reXrefEntry.match(self.data, position)
+                if oMatch == None:
+                    return None
+                position = oMatch.end()
+                if oMatch.group(3) == b'n':
+                    objects.add((start + number, int(oMatch.group(2)), int(oMatch.group(1))))
+        oMatch = reTrailer.search(self.data, position)
+        if oMatch == None:
+            return None
+        trailers.add(oMatch.start())
+        return self.ParseTrailerAt(oMatch.start())
+
+    def ParseXrefStream(self, offset, objects, compressed):
+        object = self.ParseObjectAt(offset)
+        if object == None or not object.ContainsStream():
+            return None
+        objects.add((object.id, object.version, offset))
+        oPDFParseDictionary = cPDFParseDictionary(object.ContainsStream(), self.nocanonicalizedoutput)
+        widths = DictionaryIntegers(oPDFParseDictionary.Get('/W'))
+        if len(widths) != 3:
+            return None
+        indexes = DictionaryIntegers(oPDFParseDictionary.Get('/Index'))
+        if indexes == []:
+            size = DictionaryIntegers(oPDFParseDictionary.Get('/Size'))
+            if size == []:
+                return None
+            indexes = [0, size[0]]
+        data = object.Stream()
+        if data == 'No filters':
+            data = C2BIP3(object.Stream(False))
+        if not isinstance(data, bytes):
+            return None
+        decodeParms = oPDFParseDictionary.Get('/DecodeParms')
+        if decodeParms != None and type(decodeParms[0]) == tuple:
+            dDecodeParms = dict(decodeParms)
+            if DictionaryIntegers(dDecodeParms.get('/Predictor', ['1']))[0] >= 10:
+                data = PNGPredictorDecode(data, DictionaryIntegers(dDecodeParms.get('/Columns', ['1']))[0])
+        data = bytearray(data)
+        entryLength = sum(widths)
+        position = 0
+        for start, count in zip(indexes[0::2], indexes[1::2]):
+            for number in range(count):
+                if position + entryLength > len(data):
+                    return oPDFParseDictionary
+                fields = []
+                for width in widths:
+                    value = 0
+                    for byte in data[position:position + width]:
+                        value = value * 256 + byte
+                    fields.append(value)
+                    position += width
+                if widths[0] == 0:
+                    fields[0] = 1
+                if fields[0] == 1:
+                    objects.add((start + number, fields[2], fields[1]))
+                elif fields[0] == 2:
+                    compressed.add((start + number, fields[1], fields[2]))
+        return oPDFParseDictionary
+
+    def ParseXrefs(self):
+        objects = set()
+        compressed = set()
+        trailers = set()
+        oMatch = None
+        for oMatch in reStartxref.finditer(self.data):
+            pass
+        if oMatch == None:
+            return None
+        offsets = [int(oMatch.group(1))]
+        visited = set()
+        while offsets != []:
+            offset = offsets.pop()
+            if offset in visited or offset >= len(self.data):
+                continue
+            visited.add(offset)
+            while offset < len(self.data) and CharacterClass(bytearray(self.data[offset:offset + 1])[0]) == CHAR_WHITESPACE:
+                offset += 1
+            if self.data[offset:offset + 4] == b'xref':
+                oPDFParseDictionary = self.ParseXrefTable(offset, objects, trailers)
+            elif reIndirectObject.match(self.data, offset):
+                oPDFParseDictionary = self.ParseXrefStream(offset, objects, compressed)
+            else:
+                return None
+            if oPDFParseDictionary == None or oPDFParseDictionary.parsed == None:
+                return None
+            for key in ['/Prev', '/XRefStm']:
+                offsets += DictionaryIntegers(oPDFParseDictionary.Get(key))[0:1]
+        for id, version, offset in objects:
+            if not self.IsObjectAt(offset, id):
+                return None
+        return objects, compressed, trailers
+
+    def ScanObjects(self):
+        objects = set()
+        end = 0
+        for oMatch in reIndirectObject.finditer(self.data):
+            if oMatch.start() < end:
+                continue
+            objects.add((int(oMatch.group(1)), int(oMatch.group(2)), oMatch.start()))
+            end = self.data.find(b'endobj', oMatch.end())
+            if end == -1:
+                end = len(self.data)
+        trailers = set(oMatch.start() for oMatch in reTrailer.finditer(self.data))
+        return objects, set(), trailers
+
+    def ObjStmMembers(self, offset):
+        object = self.ParseObjectAt(offset)
+        try:
+            oPDFParser = cPDFParser(StringIO(ObjStmSynthesizedPDF(object, self.nocanonicalizedoutput)), objstm=(object.id, object.version))
+        except:
+            return
+        index = 0
+        while True:
+            member = oPDFParser.GetObject()
+            if member == None:
+                break
+            if member.type == PDF_ELEMENT_INDIRECT_OBJECT:
+                yield index, member
+                index += 1
+
+    def Build(self):
+        result = self.ParseXrefs()
+        objectsScan, compressed, trailers = self.ScanObjects()
+        if result == None:
+            method = 'scan'
+            objects = objectsScan
+        else:
+            method = 'xref'
+            objects, compressed, trailers = result
+            # objects not in the xref are added, so that the same objects are found as when parsing the complete file
+            objects = objects | objectsScan
+        objects = sorted(objects, key=lambda object: object[2])
+        objstmIDs = set(objstmID for id, objstmID, index in compressed)
+        entries = []
+        members = []
+        for id, version, offset in objects:
+            end = self.data.find(b'endobj', offset)
+            if end == -1:
+                end = len(self.data)
+            entries.append([id, version, offset, self.data.find(b'stream', offset, end) != -1])
+            if id in objstmIDs or self.data.find(b'/ObjStm', offset, end) != -1:
+                for index, member in self.ObjStmMembers(offset):
+                    members.append([member.id, id, offset, index])
+        return {'version': INDEX_VERSION, 'sha256': self.sha256, 'method': method, 'objects': entries, 'objstm': members, 'trailers': sorted(trailers), 'references': {}}
+
+    def References(self, key, GetObject):
+        if not key in self.index['references']:
+            object = GetObject()
+            if object == None:
+                self.index['references'][key] = []
+            else:
+                self.index['references'][key] = sorted(set(reference[0] for reference in object.GetReferences()))
+            self.modified = True
+        return self.index['references'][key]
+
+    def Locations(self, options):
+        locations = []
+        for id, version, offset, stream in self.index['objects']:
+            if options.object:
+                selected = MatchObjectID(id, options.object)
+            elif options.reference:
+                selected = options.reference in self.References(str(offset), lambda: self.ParseObjectAt(offset))
+            else:
+                selected = stream
+            if selected:
+                locations.append((offset, -1, PDF_ELEMENT_INDIRECT_OBJECT))
+        if options.objstm and not options.searchstream:
+            for id, objstmID, offset, index in self.index['objstm']:
+                if options.object:
+                    selected = MatchObjectID(id, options.object)
+                else:
+                    selected = options.reference in self.References('%d:%d' % (offset, index), lambda: self.ObjStmMember(offset, index))
+                if selected:
+                    locations.append((offset, index, PDF_ELEMENT_INDIRECT_OBJECT))
+        if options.reference:
+            for offset in self.index['trailers']:
+                locations.append((offset, -1, PDF_ELEMENT_TRAILER))
+        return sorted(locations)
+
+    def ObjStmMember(self, offset, index):
+        for indexMember, member in self.ObjStmMembers(offset):
+            if indexMember == index:
+                return member
+        return None
+
+    def GetObjects(self, options):
+        for offset, index, type in self.Locations(options):
+            if type == PDF_ELEMENT_TRAILER:
+                object = cPDFParser(self, position=offset).GetObject()
+                if object != None and object.type != PDF_ELEMENT_TRAILER:
+                    object = None
+            elif index == -1:
+                object = self.ParseObjectAt(offset)
+            else:
+                object = self.ObjStmMember(offset, index)
+            if object != None:
+                yield object
+        self.SaveCache()
+
+class cPDFIndexParser:
+    def __init__(self, oPDFIndex, options):
+        self.oObjects = oPDFIndex.GetObjects(options)
+
+    def GetObject(self):
+        return next(self.oObjects, None)
+
 def Main():
     """pdf-parser, use it to parse a PDF document
     """
@@ -1426,6 +1826,8 @@ def Main():
     oParser.add_option('--decoders', type=str, default='', help='decoders to load (separate decoders with a comma , ; @file supported)')
     oParser.add_option('--decoderoptions', type=str, default='', help='options for the decoder')
     oParser.add_option('-k', '--key', help='key to search in dictionaries')
+    oParser.add_option('--index', action='store_true', default=False, help='use an index (cached in file.pdf-parser.idx) to select objects with options -o, -r and --searchstream')
+    oParser.add_option('--legacytokenizer', action='store_true', default=False, help='use the byte per byte tokenizer in stead of the buffered tokenizer')
     (options, args) = oParser.parse_args(GetArguments())
 
     if options.man:
@@ -1445,7 +1847,12 @@ def Main():
         decoders = []
         LoadDecoders(options.decoders, True)
 
-        oPDFParser = cPDFParser(args[0], options.verbose, options.extract)
+        oPDFIndex = None
+        if options.index and (options.object or options.reference or options.searchstream) and not (options.search or options.key or options.elements or options.stats or options.legacytokenizer):
+            oPDFIndex = cPDFIndex(args[0], options.nocanonicalizedoutput)
+            oPDFParser = cPDFIndexParser(oPDFIndex, options)
+        else:
+            oPDFParser = cPDFParser(args[0], options.verbose, options.extract, legacytokenizer=options.legacytokenizer)
         cntComment = 0
         cntXref = 0
         cntTrailer = 0
@@ -1551,26 +1958,10 @@ def Main():
                 if object == None:
                     oPDFParserOBJSTM = None
                     object = oPDFParser.GetObject()
-            if options.objstm and hasattr(object, 'GetType') and EqualCanonical(object.GetType(), '/ObjStm') and object.ContainsStream():
+            if options.objstm and oPDFIndex == None and hasattr(object, 'GetType') and EqualCanonical(object.GetType(), '/ObjStm') and object.ContainsStream():
                 # parsing objects inside an /ObjStm object by extracting & parsing the stream content to create a synthesized PDF document, that is then parsed by cPDFParser
-                oPDFParseDictionary = cPDFParseDictionary(object.ContainsStream(), options.nocanonicalizedoutput)
-                numberOfObjects = int(oPDFParseDictionary.Get('/N')[0])
-                offsetFirstObject = int(oPDFParseDictionary.Get('/First')[0])
-                indexes = list(map(int, C2SIP3(object.Stream())[:offsetFirstObject].strip().split(' ')))
-                if len(indexes) % 2 != 0 or len(indexes) / 2 != numberOfObjects:
-                    raise Exception('Error in index of /ObjStm stream')
-                streamObject = C2SIP3(object.Stream()[offsetFirstObject:])
-                synthesizedPDF = ''
-                while len(indexes) > 0:
-                    objectNumber = indexes[0]
-                    offset = indexes[1]
-                    indexes = indexes[2:]
-                    if len(indexes) >= 2:
-                        offsetNextObject = indexes[1]
-                    else:
-                        offsetNextObject = len(streamObject)
-                    synthesizedPDF += '%d 0 obj\n%s\nendobj\n' % (objectNumber, streamObject[offset:offsetNextObject])
-                oPDFParserOBJSTM = cPDFParser(StringIO(synthesizedPDF), options.verbose, options.extract, (object.id, object.version))
+                synthesizedPDF = ObjStmSynthesizedPDF(object, options.nocanonicalizedoutput)
+                oPDFParserOBJSTM = cPDFParser(StringIO(synthesizedPDF), options.verbose, options.extract, (object.id, object.version), options.legacytokenizer)
             if object != None:
                 if options.stats:
                     if object.type == PDF_ELEMENT_COMMENT:
@@ -2,8 +2,8 @@
 
 __description__ = 'Tool to test a PDF file'
 __author__ = 'Didier Stevens'
-__version__ = '0.2.8'
-__date__ = '2020/11/21'
+__version__ = '0.2.9'
+__date__ = '2026/10/18'
 
 """
 
@@ -57,6 +57,8 @@ History:
   2019/09/30: V0.2.6 color bugfix, thanks to Leo
   2019/11/05: V0.2.7 fixed plugin path when compiled with pyinstaller
   2020/11/21: V0.2.8 added data argument to PDFiD function
+  2026/10/18: V0.2.9 added FastScan: regex based scan of the complete file (byte per byte loop is still used for option disarm)
+  2026/10/18: added option -j --jobs
 
 Todo:
   - update XML example (entropy, EOF)
@@ -77,6 +79,8 @@ import zipfile
 import collections
 import glob
 import fnmatch
+import bisect
+import multiprocessing
 if sys.version_info[0] >= 3:
     import urllib.request as urllib23
 else:
@@ -155,6 +159,13 @@ class cBinaryFile:
         self.ungetted = []
         return result
 
+    def read(self):
+        data = bytearray(reversed(self.ungetted))
+        data.extend(self.infile.read())
+        self.ungetted = []
+        self.infile.close()
+        return bytes(data)
+
     def unget(self, byte):
         self.ungetted.append(byte)
 
@@ -389,6 +400,133 @@ def ParseINIFile():
                 keywords.append(key)
     return keywords
 
+# characters that PDFiD considers part of a word (same test as in the byte per byte loop of function PDFiD)
+WORD_CHARACTERS = ''.join([chr(byte) for byte in range(256) if chr(byte).upper() >= 'A' and chr(byte).upper() <= 'Z' or chr(byte).upper() >= '0' and chr(byte).upper() <= '9'])
+
+def RegexCharacterClass(characters):
+    return '[' + ''.join([re.escape(character) for character in characters]) + ']'
+
+def CompileScanRegex(keywords):
+    # group 1: a name, with its characters, #xx hexcodes and lone # characters (these end the word but not the name)
+    # group 2: a word outside a name that is a keyword, stream/endstream or a long number (for /Colors > 2^24)
+    wordClass = RegexCharacterClass(WORD_CHARACTERS)
+    words = [keyword for keyword in keywords + ['stream', 'endstream'] if not keyword.startswith('/') and keyword != '' and all([character in WORD_CHARACTERS for character in keyword])]
+    words = sorted(set(words), key=len, reverse=True)
+    regex = '(/(?:%s+|#[0-9A-Fa-f]{2}|#)*)|(?<!%s)(%s)(?!%s)' % (wordClass, wordClass, '|'.join([re.escape(word) for word in words] + ['[0-9]{8,}']), wordClass)
+    return re.compile(C2BIP3(regex))
+
+oREHexcodeOrHash = re.compile(C2BIP3('#([0-9A-Fa-f]{2})|#'))
+
+def DecodeName(name, position, hexcodePositions):
+    # returns a list of (word, hexcode, position of character ending the word)
+    if not '#' in name:
+        return [(name, False, position + len(name))]
+    segments = []
+    word = ''
+    hexcode = False
+    start = 0
+    for oMatch in oREHexcodeOrHash.finditer(C2BIP3(name)):
+        word += name[start:oMatch.start()]
+        start = oMatch.end()
+        if oMatch.group(1) == None:
+            segments.append((word, hexcode, position + oMatch.start()))
+            word = ''
+            hexcode = False
+        else:
+            word += chr(int(name[oMatch.start() + 1:oMatch.end()], 16))
+            hexcode = True
+            hexcodePositions.add(position + oMatch.start() + 1)
+            hexcodePositions.add(position + oMatch.start() + 2)
+    word += name[start:]
+    segments.append((word, hexcode, position + len(name)))
+    return segments
+
+def FastScan(data, keywords, words, allNames, oCVE_2009_3459, dates, oPDFDate, oEntropy, oPDFEOF, insideStream):
+    # equivalent to the byte per byte loop of function PDFiD (without disarm), but using regular expressions on the complete data
+    if sys.version_info[0] > 2:
+        Decode = lambda data: data.decode('latin1')
+    else:
+        Decode = lambda data: data
+    lastName = ''
+    lastNames = []
+    hexcodePositions = set()
+    streamStart = None
+    streamRegions = []
+    for oMatch in CompileScanRegex(keywords).finditer(data):
+        if oMatch.lastindex == 1:
+            segments = DecodeName(Decode(oMatch.group(1))[1:], oMatch.start() + 1, hexcodePositions)
+            for index, (word, hexcode, end) in enumerate(segments):
+                if word == '':
+                    continue
+                if index == len(segments) - 1 and end < len(data):
+                    oCVE_2009_3459.Check(lastName, word)
+                if '/' + word in words:
+                    words['/' + word][0] += 1
+                    if hexcode:
+                        words['/' + word][1] += 1
+                elif allNames:
+                    words['/' + word] = [1, 0]
+                    if hexcode:
+                        words['/' + word][1] += 1
+                lastName = '/' + word
+                lastNames.append((end, lastName))
+        else:
+            word = Decode(oMatch.group(2))
+            if oMatch.end() < len(data):
+                oCVE_2009_3459.Check(lastName, word)
+            if word in words:
+                words[word][0] += 1
+            if word == 'stream' and not insideStream:
+                insideStream = True
+                streamStart = oMatch.end()
+            elif word == 'endstream' and insideStream:
+                insideStream = False
+                streamRegions.append((streamStart, oMatch.start()))
+    if insideStream:
+        streamRegions.append((streamStart, len(data)))
+
+    if oPDFDate != None:
+        ends = [end for end, name in lastNames]
+        for oMatch in re.finditer(C2BIP3('D:'), data):
+            if oMatch.start() in hexcodePositions:
+                continue
+            oPDFDate.state = 0
+            for position in range(oMatch.start(), min(oMatch.start() + 32, len(data))):
+                char = Decode(data[position:position + 1])
+                if char == 'D' and position != oMatch.start():
+                    break
+                if oPDFDate.parse(char) != None:
+                    index = bisect.bisect_right(ends, position)
+                    if index == 0:
+                        dates.append([oPDFDate.date, ''])
+                    else:
+                        dates.append([oPDFDate.date, lastNames[index - 1][1]])
+                if oPDFDate.state == 0:
+                    break
+
+    if oEntropy != None:
+        for byte, count in collections.Counter(bytearray(data)).items():
+            oEntropy.allBucket[byte] += count
+        for byte, count in collections.Counter(bytearray(b''.join([data[start:end] for start, end in streamRegions]))).items():
+            oEntropy.streamBucket[byte] += count
+
+    if oPDFEOF != None:
+        position = 0
+        while position < len(data):
+            if oPDFEOF.token == '':
+                next = data.find(C2BIP3('%'), position)
+                if next == -1:
+                    next = len(data)
+                if oPDFEOF.cntEOFs > 0:
+                    oPDFEOF.cntCharsAfterLastEOF += next - position
+                position = next
+                if position == len(data):
+                    break
+            oPDFEOF.parse(Decode(data[position:position + 1]))
+            position += 1
+
+    return insideStream
+
 def PDFiD(file, allNames=False, extraData=False, disarm=False, force=False, data=None):
     """Example of XML output:
     <PDFiD ErrorOccured="False" ErrorMessage="" Filename="test.pdf" Header="%PDF-1.1" IsPDF="True" Version="0.0.4" Entropy="4.28">
@@ -489,64 +627,67 @@ def PDFiD(file, allNames=False, extraData=False, disarm=False, force=False, data
             att = xmlDoc.createAttribute('Header')
             att.nodeValue = repr(pdfHeader[0:10]).strip("'")
             xmlDoc.documentElement.setAttributeNode(att)
-        byte = oBinaryFile.byte()
-        while byte != None:
-            char = chr(byte)
-            charUpper = char.upper()
-            if charUpper >= 'A' and charUpper <= 'Z' or charUpper >= '0' and charUpper <= '9':
-                word += char
-                wordExact.append(char)
-            elif slash == '/' and char == '#':
-                d1 = oBinaryFile.byte()
-                if d1 != None:
-                    d2 = oBinaryFile.byte()
-                    if d2 != None and (chr(d1) >= '0' and chr(d1) <= '9' or chr(d1).upper() >= 'A' and chr(d1).upper() <= 'F') and (chr(d2) >= '0' and chr(d2) <= '9' or chr(d2).upper() >= 'A' and chr(d2).upper() <= 'F'):
-                        word += chr(int(chr(d1) + chr(d2), 16))
-                        wordExact.append(int(chr(d1) + chr(d2), 16))
-                        hexcode = True
-                        if oEntropy != None:
-                            oEntropy.add(d1, insideStream)
-                            oEntropy.add(d2, insideStream)
-                        if oPDFEOF != None:
-                            oPDFEOF.parse(d1)
-                            oPDFEOF.parse(d2)
+        if disarm:
+            byte = oBinaryFile.byte()
+            while byte != None:
+                char = chr(byte)
+                charUpper = char.upper()
+                if charUpper >= 'A' and charUpper <= 'Z' or charUpper >= '0' and charUpper <= '9':
+                    word += char
+                    wordExact.append(char)
+                elif slash == '/' and char == '#':
+                    d1 = oBinaryFile.byte()
+                    if d1 != None:
+                        d2 = oBinaryFile.byte()
+                        if d2 != None and (chr(d1) >= '0' and chr(d1) <= '9' or chr(d1).upper() >= 'A' and chr(d1).upper() <= 'F') and (chr(d2) >= '0' and chr(d2) <= '9' or chr(d2).upper() >= 'A' and chr(d2).upper() <= 'F'):
+                            word += chr(int(chr(d1) + chr(d2), 16))
+                            wordExact.append(int(chr(d1) + chr(d2), 16))
+                            hexcode = True
+                            if oEntropy != None:
+                                oEntropy.add(d1, insideStream)
+                                oEntropy.add(d2, insideStream)
+                            if oPDFEOF != None:
+                                oPDFEOF.parse(d1)
+                                oPDFEOF.parse(d2)
+                        else:
+                            oBinaryFile.unget(d2)
+                            oBinaryFile.unget(d1)
+                            (word, wordExact, hexcode, lastName, insideStream) = UpdateWords(word, wordExact, slash, words, hexcode, allNames, lastName, insideStream, oEntropy, fOut)
+                            if disarm:
+                                fOut.write(C2BIP3(char))
                     else:
-                        oBinaryFile.unget(d2)
                         oBinaryFile.unget(d1)
                         (word, wordExact, hexcode, lastName, insideStream) = UpdateWords(word, wordExact, slash, words, hexcode, allNames, lastName, insideStream, oEntropy, fOut)
                         if disarm:
                             fOut.write(C2BIP3(char))
                 else:
-                    oBinaryFile.unget(d1)
+                    oCVE_2009_3459.Check(lastName, word)
+
                     (word, wordExact, hexcode, lastName, insideStream) = UpdateWords(word, wordExact, slash, words, hexcode, allNames, lastName, insideStream, oEntropy, fOut)
+                    if char == '/':
+                        slash = '/'
+                    else:
+                        slash = ''
                     if disarm:
                         fOut.write(C2BIP3(char))
-            else:
-                oCVE_2009_3459.Check(lastName, word)
-
-                (word, wordExact, hexcode, lastName, insideStream) = UpdateWords(word, wordExact, slash, words, hexcode, allNames, lastName, insideStream, oEntropy, fOut)
-                if char == '/':
-                    slash = '/'
-                else:
-                    slash = ''
-                if disarm:
-                    fOut.write(C2BIP3(char))
 
-            if oPDFDate != None and oPDFDate.parse(char) != None:
-                dates.append([oPDFDate.date, lastName])
+                if oPDFDate != None and oPDFDate.parse(char) != None:
+                    dates.append([oPDFDate.date, lastName])
 
-            if oEntropy != None:
-                oEntropy.add(byte, insideStream)
+                if oEntropy != None:
+                    oEntropy.add(byte, insideStream)
 
-            if oPDFEOF != None:
-                oPDFEOF.parse(char)
+                if oPDFEOF != None:
+                    oPDFEOF.parse(char)
 
-            byte = oBinaryFile.byte()
-        (word, wordExact, hexcode, lastName, insideStream) = UpdateWords(word, wordExact, slash, words, hexcode, allNames, lastName, insideStream, oEntropy, fOut)
+                byte = oBinaryFile.byte()
+            (word, wordExact, hexcode, lastName, insideStream) = UpdateWords(word, wordExact, slash, words, hexcode, allNames, lastName, insideStream, oEntropy, fOut)
+        else:
+            insideStream = FastScan(oBinaryFile.read(), keywords, words, allNames, oCVE_2009_3459, dates, oPDFDate, oEntropy, oPDFEOF, insideStream)
 
         # check to see if file ended with %%EOF.  If so, we can reset charsAfterLastEOF and add one to EOF count.  This is never performed in
         # the parse function because it never gets called due to hitting the end of file.
-        if byte == None and oPDFEOF != None:
+        if oPDFEOF != None:
             if oPDFEOF.token == '%%EOF':
                 oPDFEOF.cntEOFs += 1
                 oPDFEOF.cntCharsAfterLastEOF = 0
@@ -753,7 +894,9 @@ def MakeCSVLine(fields, separator=';', quote='"'):
     return formatstring % tuple(strings)
 
 def ProcessFile(filename, options, plugins):
-    xmlDoc = PDFiD(filename, options.all, options.extra, options.disarm, options.force)
+    ProcessXMLDoc(filename, PDFiD(filename, options.all, options.extra, options.disarm, options.force), options, plugins)
+
+def ProcessXMLDoc(filename, xmlDoc, options, plugins):
     if plugins == [] and options.select == '':
         Print(PDFiD2String(xmlDoc, options.nozero, options.force), options)
         return
@@ -827,6 +970,54 @@ def Scan(directory, options, plugins):
 #        print(sys.exc_info()[2])
 #        print traceback.format_exc()
 
+def ScanFilenames(directory):
+    try:
+        if os.path.isdir(directory):
+            if hasattr(os, 'scandir'):
+                entries = [entry.path for entry in os.scandir(directory)]
+            else:
+                entries = [os.path.join(directory, entry) for entry in os.listdir(directory)]
+            for entry in entries:
+                for filename in ScanFilenames(entry):
+                    yield filename
+        else:
+            yield directory
+    except Exception as e:
+        print(e)
+
+def PDFiDWorker(arguments):
+    filename, allNames, extraData, disarm, force = arguments
+    return PDFiD(filename, allNames, extraData, disarm, force)
+
+def ProcessFilesParallel(filenames, options, plugins):
+    # PDFiD runs in a pool of worker processes, the results are processed (plugins, output) in the original order by this process
+    # the number of files being processed at the same time is limited, so that memory use does not grow with the number of files
+    oPool = multiprocessing.Pool(options.jobs)
+    inFlight = collections.deque()
+    maximumInFlight = options.jobs * 4
+    try:
+        for filename in filenames:
+            inFlight.append((filename, oPool.apply_async(PDFiDWorker, ((filename, options.all, options.extra, options.disarm, options.force),))))
+            while len(inFlight) >= maximumInFlight or len(inFlight) > 0 and inFlight[0][1].ready():
+                ProcessResultParallel(inFlight.popleft(), options, plugins)
+        while len(inFlight) > 0:
+            ProcessResultParallel(inFlight.popleft(), options, plugins)
+        oPool.close()
+    except:
+        oPool.terminate()
+        raise
+    finally:
+        oPool.join()
+
+def ProcessResultParallel(result, options, plugins):
+    filename, oAsyncResult = result
+    try:
+        ProcessXMLDoc(filename, oAsyncResult.get(), options, plugins)
+    except Exception as e:
+        if not options.scan:
+            raise
+        print(e)
+
 #function derived from: http://blog.9bplus.com/pdfidpy-output-to-json
 def PDFiD2JSON(xmlDoc, force):
     #Get Top Layer Data
@@ -1019,6 +1210,12 @@ def PDFiDMain(filenames, options):
         elif options.select != '':
             Print('Filename', options)
 
+    if options.jobs > 1 and filenames != ['']:
+        if options.scan:
+            filenames = (filenameScan for filename in filenames for filenameScan in ScanFilenames(filename))
+        ProcessFilesParallel(filenames, options, plugins)
+        return
+
     for filename in filenames:
         if options.scan:
             Scan(filename, options, plugins)
@@ -1053,6 +1250,7 @@ https://DidierStevens.com'''
     oParser.add_option('--pluginoptions', type=str, default='', help='options for the plugin')
     oParser.add_option('-l', '--literalfilenames', action='store_true', default=False, help='take filenames literally, no wildcard matching')
     oParser.add_option('--recursedir', action='store_true', default=False, help='Recurse directories (wildcards and here files (@...) allowed)')
+    oParser.add_option('-j', '--jobs', type=int, default=1, help='number of worker processes to analyze files (default 1)')
     (options, args) = oParser.parse_args()
 
     if len(args) == 0:
@@ -4,8 +4,8 @@ from __future__ import print_function
 
 __description__ = 'Template binary file argument'
 __author__ = 'Didier Stevens'
-__version__ = '0.0.9'
-__date__ = '2023/02/13'
+__version__ = '0.0.10'
+__date__ = '2026/10/18'
 
 """
 Source code put in the public domain by Didier Stevens, no Copyright
@@ -52,6 +52,7 @@ History:
   2022/10/13: 0.0.8 updated CalculateByteStatistics
   2023/01/21: added pyzipper, updated cDump, added cStruct, FindAll, cEnumeration, cMagicValue, CalculateChosenHash
   2023/02/13: 0.0.9 bugfix cutdata
+  2026/10/18: 0.0.10 faster CalculateByteStatistics: CalculateBytePrevalence, run lengths with regular expressions
 
 Todo:
   Document flag arguments in man page
@@ -69,6 +70,7 @@ import textwrap
 import re
 import struct
 import string
+import operator
 import math
 import fnmatch
 import json
@@ -1444,51 +1446,56 @@ class cLogfile():
             self.Line('Finish', '%d error(s)' % self.errors, '%d second(s)' % (time.time() - self.starttime))
             self.oOutput.Close()
 
+BYTE_PREVALENCE_CACHE_SIZE = 0x100
+dBytePrevalenceCache = {}
+
+def NumPy():
+    # NumPy is only imported when it is needed: importing it takes more time than calculating the statistics of small data
+    try:
+        import numpy
+    except ImportError:
+        return None
+    return numpy
+
+# the prevalence is memoized by the SHA-256 of the data (for example, %ENTROPY%, %BYTESTATS% and %HISTOGRAM% count the bytes of the same data), the oldest entry is removed when the cache is full
+def CalculateBytePrevalence(data):
+    key = hashlib.sha256(data).digest()
+    if not key in dBytePrevalenceCache:
+        dPrevalence = {iter: 0 for iter in range(0x100)}
+        numpy = None
+        if len(data) >= 0x100000:
+            numpy = NumPy()
+        if numpy != None:
+            dPrevalence.update(enumerate(numpy.bincount(numpy.frombuffer(data, dtype=numpy.uint8), minlength=0x100).tolist()))
+        else:
+            dPrevalence.update(collections.Counter(bytearray(data)))
+        while len(dBytePrevalenceCache) >= BYTE_PREVALENCE_CACHE_SIZE:
+            dBytePrevalenceCache.pop(next(iter(dBytePrevalenceCache)), None)
+        dBytePrevalenceCache[key] = dPrevalence
+    return dict(dBytePrevalenceCache[key])
+
+oREPrintableRun = re.compile(b'[\x20-\x7E]+')
+oREBASE64Run = re.compile(b'[a-zA-Z0-9+/]+')
+oREHEXRun = re.compile(b'[a-fA-F0-9]+')
+
+def LongestRun(oRE, data):
+    return max([0] + [len(run) for run in oRE.findall(data)])
+
 def CalculateByteStatistics(dPrevalence=None, data=None):
     longestString = 0
     longestBASE64String = 0
     longestHEXString = 0
-    base64digits = b'abcdefghijklmnopqrstuvwxyzABCDEFGHIJKLMNOPQRSTUVWXYZ0123456789+/'
-    hexdigits = b'abcdefABCDEF0123456789'
     averageConsecutiveByteDifference = None
     if dPrevalence == None:
         dPrevalence = {iter: 0 for iter in range(0x100)}
-        sumDifferences = 0.0
-        previous = None
         if len(data) > 1:
-            lengthString = 0
-            lengthBASE64String = 0
-            lengthHEXString = 0
-            for byte in data:
-                byte = C2IIP2(byte)
-                dPrevalence[byte] += 1
-                if previous != None:
-                    sumDifferences += abs(byte - previous)
-                    if byte >= 0x20 and byte < 0x7F:
-                        lengthString += 1
-                    else:
-                        longestString = max(longestString, lengthString)
-                        lengthString = 0
-                    if byte in base64digits:
-                        lengthBASE64String += 1
-                    else:
-                        longestBASE64String = max(longestBASE64String, lengthBASE64String)
-                        lengthBASE64String = 0
-                    if byte in hexdigits:
-                        lengthHEXString += 1
-                    else:
-                        longestHEXString = max(longestHEXString, lengthHEXString)
-                        lengthHEXString = 0
-                else:
-                    if byte >= 0x20 and byte < 0x7F:
-                        lengthString = 1
-                    if byte in hexdigits:
-                        lengthHEXString = 1
-                previous = byte
-            averageConsecutiveByteDifference = sumDifferences /float(len(data)-1)
-            longestString = max(longestString, lengthString)
-            longestBASE64String = max(longestBASE64String, lengthBASE64String)
-            longestHEXString = max(longestHEXString, lengthHEXString)
+            dPrevalence = CalculateBytePrevalence(data)
+            data = bytearray(data)
+            averageConsecutiveByteDifference = sum(map(abs, map(operator.sub, data[1:], data[:-1]))) / float(len(data) - 1)
+            # the first byte does not start a BASE64 run
+            longestString = LongestRun(oREPrintableRun, bytes(data))
+            longestBASE64String = LongestRun(oREBASE64Run, bytes(data[1:]))
+            longestHEXString = LongestRun(oREHEXRun, bytes(data))
     sumValues = sum(dPrevalence.values())
     countNullByte = dPrevalence[0]
     countControlBytes = 0
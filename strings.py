@@ -4,8 +4,8 @@ from __future__ import print_function
 
 __description__ = 'Strings command in Python'
 __author__ = 'Didier Stevens'
-__version__ = '0.0.8'
-__date__ = '2022/07/30'
+__version__ = '0.0.12'
+__date__ = '2026/10/18'
 
 """
 Source code put in the public domain by Didier Stevens, no Copyright
@@ -33,11 +33,17 @@ History:
   2020/12/10: 0.0.6 added option -a
   2021/01/05: 0.0.7 added : to option -P
   2022/07/30: 0.0.8 added option -N and goodware fix
+  2026/10/18: 0.0.9 faster byte statistics: CalculateBytePrevalence
+  2026/10/18: 0.0.10 ASCII and UNICODE strings are extracted in a single pass with cached compiled regular expressions; strings are processed with generators
+  2026/10/18: 0.0.11 added goodware strings index (options --buildgoodwareindex and --goodwareindex)
+  2026/10/18: 0.0.12 goodware strings index: strings with the same hash are compared when the index is built
 
 Todo:
 """
 
 import optparse
+import operator
+import hashlib
 import sys
 import os
 import zipfile
@@ -55,6 +61,8 @@ import fnmatch
 import json
 import time
 import pickle
+import mmap
+import shutil
 if sys.version_info[0] >= 3:
     from io import BytesIO as DataIO
 else:
@@ -100,6 +108,11 @@ You can also provide your own regular expression to specify which character sequ
 Option -p excludes all import strings found in PE files (this requires module pefile).
 
 To exclude known strings from "goodware", i.e. not malware, use option -g with yarGEN's database.
+Loading yarGEN's database (good-strings.db) takes time and memory. Option --buildgoodwareindex builds an index file (good-strings.idx) from the database, that is used by option -g when it exists. This index file is a hash table that is memory-mapped: it is opened without loading and it does not use memory to hold the strings.
+strings.py --buildgoodwareindex
+builds the index from good-strings.db. Other files can be provided as arguments: a file with extension .db is read as a yarGEN database, other files are read as text files with one string per line. When the index file already exists, it is updated: strings from the provided files are added to the index.
+strings.py --buildgoodwareindex my-good-strings.txt
+Option --goodwareindex can be used to specify another index file than good-strings.idx (in the folder of strings.py).
 
 The selection of strings to output can be inverted with option -v.
 
@@ -311,6 +324,10 @@ QUOTE = '"'
 REGEX_STANDARD = '[\x09\x20-\x7E]'
 REGEX_WHITESPACE = '[\x09-\x0D\x20-\x7E]'
 FILENAME_GOODWAREDB = 'good-strings.db'
+FILENAME_GOODWAREINDEX = 'good-strings.idx'
+GOODWAREINDEX_MAGIC = b'GWSIDX01'
+GOODWAREINDEX_HEADER = '<8sQQ'
+GOODWAREINDEX_SLOT = '<QQ'
 
 def PrintError(*args, **kwargs):
     print(*args, file=sys.stderr, **kwargs)
@@ -1339,20 +1356,42 @@ class cLogfile():
             self.Line('Finish', '%d error(s)' % self.errors, '%d second(s)' % (time.time() - self.starttime))
             self.oOutput.Close()
 
+BYTE_PREVALENCE_CACHE_SIZE = 0x100
+dBytePrevalenceCache = {}
+
+def NumPy():
+    # NumPy is only imported when it is needed: importing it takes more time than calculating the statistics of small data
+    try:
+        import numpy
+    except ImportError:
+        return None
+    return numpy
+
+# the prevalence is memoized by the SHA-256 of the data (for example, %ENTROPY%, %BYTESTATS% and %HISTOGRAM% count the bytes of the same data), the oldest entry is removed when the cache is full
+def CalculateBytePrevalence(data):
+    key = hashlib.sha256(data).digest()
+    if not key in dBytePrevalenceCache:
+        dPrevalence = {iter: 0 for iter in range(0x100)}
+        numpy = None
+        if len(data) >= 0x100000:
+            numpy = NumPy()
+        if numpy != None:
+            dPrevalence.update(enumerate(numpy.bincount(numpy.frombuffer(data, dtype=numpy.uint8), minlength=0x100).tolist()))
+        else:
+            dPrevalence.update(collections.Counter(bytearray(data)))
+        while len(dBytePrevalenceCache) >= BYTE_PREVALENCE_CACHE_SIZE:
+            dBytePrevalenceCache.pop(next(iter(dBytePrevalenceCache)), None)
+        dBytePrevalenceCache[key] = dPrevalence
+    return dict(dBytePrevalenceCache[key])
+
 def CalculateByteStatistics(dPrevalence=None, data=None):
     averageConsecutiveByteDifference = None
     if dPrevalence == None:
         dPrevalence = {iter: 0 for iter in range(0x100)}
-        sumDifferences = 0.0
-        previous = None
         if len(data) > 1:
-            for byte in data:
-                byte = C2IIP2(byte)
-                dPrevalence[byte] += 1
-                if previous != None:
-                    sumDifferences += abs(byte - previous)
-                previous = byte
-            averageConsecutiveByteDifference = sumDifferences /float(len(data)-1)
+            dPrevalence = CalculateBytePrevalence(data)
+            data = bytearray(data)
+            averageConsecutiveByteDifference = sum(map(abs, map(operator.sub, data[1:], data[:-1]))) / float(len(data) - 1)
     sumValues = sum(dPrevalence.values())
     countNullByte = dPrevalence[0]
     countControlBytes = 0
@@ -1408,69 +1447,139 @@ def ParsePascalOption(pascal):
         correction = int(splitResult[1])
     return structFormat, correction
 
-def ExtractStringsASCII(data, options):
+dCompiledRegexes = {}
+
+def CompileRegex(regex):
+    if not regex in dCompiledRegexes:
+        dCompiledRegexes[regex] = re.compile(C2BIP3(regex))
+    return dCompiledRegexes[regex]
+
+def RegexCharacters(options):
     if options.regex != '':
-        regex = options.regex + '{%d,}'
+        return options.regex
     elif options.whitespace:
-        regex = REGEX_WHITESPACE + '{%d,}'
+        return REGEX_WHITESPACE
     else:
-        regex = REGEX_STANDARD + '{%d,}'
+        return REGEX_STANDARD
 
+def RegexASCII(options):
+    regex = RegexCharacters(options) + '{%d,}'
     if options.null:
         regex += '\x00'
+    return regex % options.bytes
 
-    if options.pascal != '':
-        structFormat, correction = ParsePascalOption(options.pascal)
-        structFormatLength = struct.calcsize(structFormat)
-        foundStrings = []
-
-        for oMatch in re.finditer(C2BIP3(regex % options.bytes), data):
-            if oMatch.start(0) >= structFormatLength:
-                foundString = oMatch.group(0)
-                if struct.unpack(structFormat, data[oMatch.start(0) - structFormatLength:oMatch.start(0)])[0] + correction == len(foundString):
-                    foundStrings.append(foundString)
-        return foundStrings
-    elif options.null:
-        return [str[:-1] for str in re.findall(C2BIP3(regex % options.bytes), data)]
-    else:
-        return re.findall(C2BIP3(regex % options.bytes), data)
-
-def ExtractStringsUNICODE(data, options):
-    if options.regex != '':
-        regex = '((' + options.regex + '\x00){%d,})'
-    elif options.whitespace:
-        regex = '((' + REGEX_WHITESPACE + '\x00){%d,})'
+def RegexUNICODE(options):
+    if options.regex == '' and options.bytes > 0:
+        # same as ((characters\x00){n,}), but a regular expression that starts with a character class is searched much faster
+        regex = '(%s\x00(?:%s\x00){%d,})' % (RegexCharacters(options), RegexCharacters(options), options.bytes - 1)
     else:
-        regex = '((' + REGEX_STANDARD + '\x00){%d,})'
-
-
+        regex = '((' + RegexCharacters(options) + '\x00){%d,})' % options.bytes
     if options.null:
         regex += '\x00'
+    return regex
+
+def RegexASCIIAndUNICODE(options):
+    # same as (?P<unicode>RegexUNICODE)|RegexASCII, but starting with the character class (for speed)
+    characters = RegexCharacters(options)
+    null = IFF(options.null, '\x00', '')
+    return '%s(?:(?P<unicode>\x00(?:%s\x00){%d,})%s|%s{%d,}%s)' % (characters, characters, options.bytes - 1, null, characters, options.bytes - 1, null)
 
+def PascalCheck(data, position, foundString, options):
     if options.pascal == '':
-        return [foundunicodestring.replace(C2BIP3('\x00'), C2BIP3('')) for foundunicodestring, dummy in re.findall(C2BIP3(regex % options.bytes), data)]
+        return True
+    structFormat, correction = ParsePascalOption(options.pascal)
+    structFormatLength = struct.calcsize(structFormat)
+    if position < structFormatLength:
+        return False
+    return struct.unpack(structFormat, data[position - structFormatLength:position])[0] + correction == len(foundString)
+
+def FoundStringASCII(data, oMatch, options):
+    # returns None if the string is not selected (option pascal)
+    foundString = oMatch.group(0)
+    if options.pascal != '':
+        if PascalCheck(data, oMatch.start(0), foundString, options):
+            return foundString
+        return None
+    elif options.null:
+        return foundString[:-1]
     else:
-        structFormat, correction = ParsePascalOption(options.pascal)
-        structFormatLength = struct.calcsize(structFormat)
-        foundStrings = []
+        return foundString
 
-        for oMatch in re.finditer(C2BIP3(regex % options.bytes), data):
-            if oMatch.start(0) >= structFormatLength:
-                foundString = oMatch.group(0).replace(C2BIP3('\x00'), C2BIP3(''))
-                if struct.unpack(structFormat, data[oMatch.start(0) - structFormatLength:oMatch.start(0)])[0] + correction == len(foundString):
-                    foundStrings.append(foundString)
-        return foundStrings
+def FoundStringUNICODE(data, oMatch, end, options):
+    # end is the end of the UNICODE string, without terminating NULL bytes (option null); returns None if the string is not selected (option pascal)
+    if options.regex == '':
+        # the character class does not contain NULL bytes: every other byte is a NULL byte
+        foundString = data[oMatch.start(0):end:2]
+    else:
+        foundString = data[oMatch.start(0):end].replace(C2BIP3('\x00'), C2BIP3(''))
+    if PascalCheck(data, oMatch.start(0), foundString, options):
+        return foundString
+    return None
+
+def ExtractStringsASCII(data, options):
+    for oMatch in CompileRegex(RegexASCII(options)).finditer(data):
+        foundString = FoundStringASCII(data, oMatch, options)
+        if foundString != None:
+            yield oMatch.start(0), foundString
+
+def ExtractStringsUNICODE(data, options):
+    for oMatch in CompileRegex(RegexUNICODE(options)).finditer(data):
+        foundString = FoundStringUNICODE(data, oMatch, oMatch.end(1), options)
+        if foundString != None:
+            yield oMatch.start(0), foundString
+
+def ExtractStringsASCIIAndUNICODE(data, options):
+    # single pass through data with a regular expression that matches UNICODE and ASCII strings, generator of (position, type, string) tuples
+    # an ASCII string followed by a UNICODE string shares its last character with the UNICODE string: after an ASCII string, a UNICODE string is looked for at its last character
+    # with a user provided regular expression or strings of 1 character, ASCII and UNICODE strings can overlap in other ways: then 2 passes are done
+    if options.regex != '' or options.bytes < 2:
+        for position, foundString in ExtractStringsASCII(data, options):
+            yield position, 'ascii', foundString
+        for position, foundString in ExtractStringsUNICODE(data, options):
+            yield position, 'unicode', foundString
+        return
+    oREUNICODE = CompileRegex(RegexUNICODE(options))
+    oREASCIIAndUNICODE = CompileRegex(RegexASCIIAndUNICODE(options))
+    position = 0
+    while True:
+        oMatch = oREASCIIAndUNICODE.search(data, position)
+        if oMatch == None:
+            return
+        position = oMatch.end(0)
+        if oMatch.group('unicode') != None:
+            foundString = FoundStringUNICODE(data, oMatch, oMatch.end('unicode'), options)
+            if foundString != None:
+                yield oMatch.start(0), 'unicode', foundString
+        else:
+            foundString = FoundStringASCII(data, oMatch, options)
+            if foundString != None:
+                yield oMatch.start(0), 'ascii', foundString
+            oMatch = oREUNICODE.match(data, oMatch.end(0) - IFF(options.null, 2, 1))
+            if oMatch != None:
+                position = oMatch.end(0)
+                foundString = FoundStringUNICODE(data, oMatch, oMatch.end(1), options)
+                if foundString != None:
+                    yield oMatch.start(0), 'unicode', foundString
 
 def ExtractStrings(data, options):
+    # generator: ASCII strings are produced while the data is searched, UNICODE strings are produced after all ASCII strings
     if options.type == 'all':
-        return ExtractStringsASCII(data, options) + ExtractStringsUNICODE(data, options)
+        foundStringsUNICODE = []
+        for position, type, foundString in ExtractStringsASCIIAndUNICODE(data, options):
+            if type == 'ascii':
+                yield foundString
+            else:
+                foundStringsUNICODE.append(foundString)
+        for foundString in foundStringsUNICODE:
+            yield foundString
     elif options.type == 'ascii':
-        return ExtractStringsASCII(data, options)
+        for position, foundString in ExtractStringsASCII(data, options):
+            yield foundString
     elif options.type == 'unicode':
-        return ExtractStringsUNICODE(data, options)
+        for position, foundString in ExtractStringsUNICODE(data, options):
+            yield foundString
     else:
         print('Unknown type option: %s' % options.type)
-        return []
 
 def ConsecutiveLettersLength(data):
     return max([0] + [len(letters) for letters in re.findall(C2BIP3(r'[a-z]+'), data, re.I)])
@@ -1510,9 +1619,143 @@ def StringsSub(extractedString, filename, oOutput, dUnique, oExtraSensical, opti
 def Filter(extractedStrings, imported):
     if imported == [] or imported == None:
         return extractedStrings
-    return [extractedString for extractedString in extractedStrings if not extractedString in imported]
+    return (extractedString for extractedString in extractedStrings if not extractedString in imported)
+
+def GoodwareHash(string):
+    return struct.unpack('<Q', hashlib.md5(string).digest()[:8])[0] or 1
 
-def LoadGoodwareStrings():
+class cGoodwareIndex():
+    # file: header, hash table with slots (hash, offset of string), strings (32-bit length + string)
+    # hash 0 is an empty slot, open addressing with linear probing
+
+    def __init__(self, filename):
+        self.fIndex = open(filename, 'rb')
+        self.data = mmap.mmap(self.fIndex.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, self.slots, self.count = struct.unpack_from(GOODWAREINDEX_HEADER, self.data, 0)
+        if magic != GOODWAREINDEX_MAGIC:
+            self.Close()
+            raise Exception('Not a goodware strings index file: %s' % filename)
+        self.offsetStrings = struct.calcsize(GOODWAREINDEX_HEADER) + self.slots * struct.calcsize(GOODWAREINDEX_SLOT)
+
+    def String(self, offset):
+        position = self.offsetStrings + offset
+        length = struct.unpack_from('<I', self.data, position)[0]
+        return self.data[position + 4:position + 4 + length]
+
+    # strings with the same hash are in different slots: on a hash hit, the string is compared
+    def __contains__(self, string):
+        hash = GoodwareHash(string)
+        slot = hash & (self.slots - 1)
+        while True:
+            slotHash, offset = struct.unpack_from(GOODWAREINDEX_SLOT, self.data, struct.calcsize(GOODWAREINDEX_HEADER) + slot * struct.calcsize(GOODWAREINDEX_SLOT))
+            if slotHash == 0:
+                return False
+            if slotHash == hash and self.String(offset) == string:
+                return True
+            slot = (slot + 1) & (self.slots - 1)
+
+    def Hashes(self):
+        # generator of (hash, offset of string)
+        for slot in range(self.slots):
+            slotHash, offset = struct.unpack_from(GOODWAREINDEX_SLOT, self.data, struct.calcsize(GOODWAREINDEX_HEADER) + slot * struct.calcsize(GOODWAREINDEX_SLOT))
+            if slotHash != 0:
+                yield slotHash, offset
+
+    def CopyStrings(self, fOut):
+        position = self.offsetStrings
+        while position < len(self.data):
+            fOut.write(self.data[position:position + 0x100000])
+            position += 0x100000
+        return len(self.data) - self.offsetStrings
+
+    def Close(self):
+        self.data.close()
+        self.fIndex.close()
+
+def GoodwareFilenameIndex(options):
+    if options.goodwareindex != '':
+        return options.goodwareindex
+    return os.path.join(os.path.dirname(sys.argv[0]), FILENAME_GOODWAREINDEX)
+
+def GoodwareSourceStrings(filename):
+    if filename.lower().endswith('.db'):
+        fDB = gzip.GzipFile(filename, 'rb')
+        collection = pickle.loads(fDB.read())
+        fDB.close()
+        for key in collection.keys():
+            yield key.encode()
+    else:
+        with open(filename, 'rb') as fText:
+            for line in fText:
+                line = line.rstrip(b'\r\n')
+                if line != b'':
+                    yield line
+
+def ReadGoodwareString(fStrings, offset):
+    position = fStrings.tell()
+    fStrings.seek(offset)
+    length = struct.unpack('<I', fStrings.read(4))[0]
+    string = fStrings.read(length)
+    fStrings.seek(position)
+    return string
+
+def BuildGoodwareIndex(filenames, filenameIndex):
+    # strings of an existing index are kept (they are copied, not hashed again), new strings are appended
+    # dHashes: hash -> list of offsets of strings; strings with the same hash are compared, so that a hash collision does not drop a string
+    dHashes = {}
+    count = 0
+    filenameTemporary = filenameIndex + '.tmp'
+    fStrings = open(filenameTemporary + '.strings', 'w+b')
+    offset = 0
+    if os.path.exists(filenameIndex):
+        oGoodwareIndex = cGoodwareIndex(filenameIndex)
+        for hash, offsetString in oGoodwareIndex.Hashes():
+            dHashes.setdefault(hash, []).append(offsetString)
+            count += 1
+        offset = oGoodwareIndex.CopyStrings(fStrings)
+        oGoodwareIndex.Close()
+    countExisting = count
+    for filename in filenames:
+        for string in GoodwareSourceStrings(filename):
+            hash = GoodwareHash(string)
+            if hash in dHashes and string in [ReadGoodwareString(fStrings, offsetString) for offsetString in dHashes[hash]]:
+                continue
+            dHashes.setdefault(hash, []).append(offset)
+            fStrings.write(struct.pack('<I', len(string)) + string)
+            offset += 4 + len(string)
+            count += 1
+    fStrings.close()
+
+    slots = 1
+    while slots < count * 2:
+        slots *= 2
+    table = bytearray(slots * struct.calcsize(GOODWAREINDEX_SLOT))
+    for hash, offsetsString in dHashes.items():
+        for offsetString in offsetsString:
+            slot = hash & (slots - 1)
+            while struct.unpack_from('<Q', table, slot * struct.calcsize(GOODWAREINDEX_SLOT))[0] != 0:
+                slot = (slot + 1) & (slots - 1)
+            struct.pack_into(GOODWAREINDEX_SLOT, table, slot * struct.calcsize(GOODWAREINDEX_SLOT), hash, offsetString)
+
+    with open(filenameTemporary, 'wb') as fIndex:
+        fIndex.write(struct.pack(GOODWAREINDEX_HEADER, GOODWAREINDEX_MAGIC, slots, count))
+        fIndex.write(table)
+        with open(filenameTemporary + '.strings', 'rb') as fStrings:
+            shutil.copyfileobj(fStrings, fIndex)
+    os.remove(filenameTemporary + '.strings')
+    if os.path.exists(filenameIndex):
+        os.remove(filenameIndex)
+    os.rename(filenameTemporary, filenameIndex)
+    return countExisting, count - countExisting
+
+def LoadGoodwareStrings(options):
+    filenameIndex = GoodwareFilenameIndex(options)
+    if os.path.exists(filenameIndex):
+        try:
+            return cGoodwareIndex(filenameIndex)
+        except:
+            print('Error opening goodware strings index file: %s' % filenameIndex)
+            return None
     filename = os.path.join(os.path.dirname(sys.argv[0]), FILENAME_GOODWAREDB)
     try:
         fDB = gzip.GzipFile(filename, 'rb')
@@ -1559,7 +1802,8 @@ def ProcessBinaryFile(filename, content, cutexpression, goodware, oLogfile, opti
                 pass
 
         selectedStrings = Filter(ExtractStrings(data, options), imported)
-        return Filter(selectedStrings, goodware)
+        for selectedString in Filter(selectedStrings, goodware):
+            yield selectedString
         # ----------------------------------------------
     except:
         oLogfile.LineError('Processing file %s %s' % (filename, repr(sys.exc_info()[1])))
@@ -1580,7 +1824,7 @@ def ProcessBinaryFiles(filenames, oLogfile, options):
 
     goodware = None
     if options.goodwarestrings:
-        goodware = LoadGoodwareStrings()
+        goodware = LoadGoodwareStrings(options)
 
     selectedStrings = []
     if options.jsoninput:
@@ -1651,6 +1895,8 @@ https://DidierStevens.com'''
     oParser.add_option('-r', '--regex', default='', help='Regex to be used to match characters')
     oParser.add_option('-p', '--pefile', action='store_true', default=False, help='Parse file as PE file and remove imported symbols')
     oParser.add_option('-g', '--goodwarestrings', action='store_true', default=False, help='Use the goodware strings db to filter out strings')
+    oParser.add_option('--buildgoodwareindex', action='store_true', default=False, help='Build or update the goodware strings index')
+    oParser.add_option('--goodwareindex', type=str, default='', help='Goodware strings index file (default good-strings.idx)')
     oParser.add_option('-f', '--filename', action='store_true', default=False, help='Include filename (as prefix)')
     oParser.add_option('-T', '--trim', type=int, default=0, help='Trim strings to given maximum length')
     oParser.add_option('-P', '--pascal', default='', help='Counter format for pascal strings')
@@ -1676,6 +1922,13 @@ https://DidierStevens.com'''
         print('Error: option -j can not be used with files')
         return
 
+    if options.buildgoodwareindex:
+        if args == []:
+            args = [os.path.join(os.path.dirname(sys.argv[0]), FILENAME_GOODWAREDB)]
+        countExisting, countAdded = BuildGoodwareIndex(args, GoodwareFilenameIndex(options))
+        print('Goodware strings index %s: %d strings (%d added)' % (GoodwareFilenameIndex(options), countExisting + countAdded, countAdded))
+        return
+
     oLogfile = cLogfile(options.logfile, options.logcomment)
     oExpandFilenameArguments = cExpandFilenameArguments(args, options.literalfilenames, options.recursedir, options.checkfilenames, '#c#')
     oLogfile.Line('FilesCount', str(len(oExpandFilenameArguments.Filenames())))
@@ -4,8 +4,8 @@ from __future__ import print_function
 
 __description__ = 'Bruteforce a file for encodings and search'
 __author__ = 'Didier Stevens'
-__version__ = '0.0.1'
-__date__ = '2020/08/16'
+__version__ = '0.0.6'
+__date__ = '2026/10/18'
 
 """
 Source code put in the public domain by Didier Stevens, no Copyright
@@ -14,12 +14,19 @@ Use at your own risk
 
 History:
   2020/08/16: start
+  2026/10/18: 0.0.2 faster byte statistics: CalculateBytePrevalence
+  2026/10/18: 0.0.3 decoding with bytes.translate tables; added ROL, ROR and ADD encodings (option -e) and multi-byte keys (option -k)
+  2026/10/18: 0.0.4 added option -P: search for patterns with an Aho-Corasick automaton
+  2026/10/18: 0.0.5 multi-byte keys: key lengths must be shorter than the data, at most MAXIMUM_KEY_COMBINATIONS keys per key length
+  2026/10/18: 0.0.6 DecodersPrintable: parameter Warning renamed to warningFunction
 
 Todo:
 
 """
 
 import optparse
+import operator
+import hashlib
 import sys
 import os
 import zipfile
@@ -36,6 +43,7 @@ import math
 import fnmatch
 import json
 import time
+import itertools
 if sys.version_info[0] >= 3:
     from io import BytesIO as DataIO
 else:
@@ -51,7 +59,19 @@ Manual:
 
 This tool is a work in progress. It will have many of the features of XORsearch.exe (a binary program written in C), and some new features.
 
-For the moment, it only tries all XOR encodings with a one-byte key, and can only detect printable results (-t printable).
+For the moment, it can only detect printable results (-t printable).
+By default, it tries all XOR encodings with a one-byte key. Option -e (encodings) selects the encodings to try: a comma-separated list of xor, rol, ror and add (default xor). Example: -e xor,rol,add
+XOR and ADD keys are one byte long, unless option -k (keylength) is used: -k 4 tries all XOR (and ADD) keys of 1, 2, 3 and 4 bytes long. Multi-byte keys that are a repetition of a shorter key are not reported. Key lengths that are not shorter than the data are skipped. For short data, many combinations of key bytes decode to printable bytes: at most 4096 keys are reported per key length, and a warning is displayed when this limit is reached.
+Each byte value is decoded via a translation table, and the search for a byte that does not decode to a printable character stops at the first such byte: most keys are rejected after a couple of bytes.
+
+Option -d decodes the data with the given key: "XOR 0x41", "XOR 0x414243", "ADD 0x10", "ROL 3", "ROR 1".
+
+Option -P (patternfile) searches for strings in stead of printable content. The pattern file is a text file with one string per line (empty lines are ignored). Each string is encoded with each one-byte key of the selected encodings (option -e), and all these encoded strings are searched for in a single pass through the data with an Aho-Corasick automaton. Each hit is reported with the encoding and key, the position and the string. Example:
+xorsearch.py -P patterns.txt -e xor,rol sample.vir
+File: sample.vir
+XOR 0x2a 0x0000004e: This program
+ROL 1 0x00001a20: http
+Option -k is not used with option -P.
 
 It reads one or more files or stdin and TBC. This tool is very versatile when it comes to handling files, later full details will be provided.
 
@@ -1343,20 +1363,42 @@ class cLogfile():
             self.Line('Finish', '%d error(s)' % self.errors, '%d second(s)' % (time.time() - self.starttime))
             self.oOutput.Close()
 
+BYTE_PREVALENCE_CACHE_SIZE = 0x100
+dBytePrevalenceCache = {}
+
+def NumPy():
+    # NumPy is only imported when it is needed: importing it takes more time than calculating the statistics of small data
+    try:
+        import numpy
+    except ImportError:
+        return None
+    return numpy
+
+# the prevalence is memoized by the SHA-256 of the data (for example, %ENTROPY%, %BYTESTATS% and %HISTOGRAM% count the bytes of the same data), the oldest entry is removed when the cache is full
+def CalculateBytePrevalence(data):
+    key = hashlib.sha256(data).digest()
+    if not key in dBytePrevalenceCache:
+        dPrevalence = {iter: 0 for iter in range(0x100)}
+        numpy = None
+        if len(data) >= 0x100000:
+            numpy = NumPy()
+        if numpy != None:
+            dPrevalence.update(enumerate(numpy.bincount(numpy.frombuffer(data, dtype=numpy.uint8), minlength=0x100).tolist()))
+        else:
+            dPrevalence.update(collections.Counter(bytearray(data)))
+        while len(dBytePrevalenceCache) >= BYTE_PREVALENCE_CACHE_SIZE:
+            dBytePrevalenceCache.pop(next(iter(dBytePrevalenceCache)), None)
+        dBytePrevalenceCache[key] = dPrevalence
+    return dict(dBytePrevalenceCache[key])
+
 def CalculateByteStatistics(dPrevalence=None, data=None):
     averageConsecutiveByteDifference = None
     if dPrevalence == None:
         dPrevalence = {iter: 0 for iter in range(0x100)}
-        sumDifferences = 0.0
-        previous = None
         if len(data) > 1:
-            for byte in data:
-                byte = C2IIP2(byte)
-                dPrevalence[byte] += 1
-                if previous != None:
-                    sumDifferences += abs(byte - previous)
-                previous = byte
-            averageConsecutiveByteDifference = sumDifferences /float(len(data)-1)
+            dPrevalence = CalculateBytePrevalence(data)
+            data = bytearray(data)
+            averageConsecutiveByteDifference = sum(map(abs, map(operator.sub, data[1:], data[:-1]))) / float(len(data) - 1)
     sumValues = sum(dPrevalence.values())
     countNullByte = dPrevalence[0]
     countControlBytes = 0
@@ -1402,14 +1444,166 @@ def InstantiateCOutput(options):
         filenameOption = options.output
     return cOutput(filenameOption)
 
-def ContentCheckIsPrintable(data):
-    for byte in data:
-        if byte < 0x20 or byte >= 0x7F:
-            return False
-    return True
+def IsPrintable(byte):
+    return byte >= 0x20 and byte < 0x7F
+
+def TableXOR(key):
+    return [byte ^ key for byte in range(0x100)]
+
+def TableROL(key):
+    return [((byte << key) | (byte >> (8 - key))) & 0xFF for byte in range(0x100)]
+
+def TableROR(key):
+    return TableROL(8 - key)
+
+def TableADD(key):
+    return [(byte + key) & 0xFF for byte in range(0x100)]
+
+# encoding: (function returning the decoding table for a key, keys to try, format of key, multi-byte keys possible)
+dEncodings = {
+    'xor': (TableXOR, range(0x100), '0x%02x', True),
+    'rol': (TableROL, range(1, 8), '%d', False),
+    'ror': (TableROR, range(1, 8), '%d', False),
+    'add': (TableADD, range(1, 0x100), '0x%02x', True),
+}
+
+class cDecoder():
+    # keys contains one key per byte of a multi-byte key
 
-def ContentCheck(data, type):
-    return ContentCheckIsPrintable(data)
+    def __init__(self, encoding, keys):
+        self.encoding = encoding
+        self.keys = keys
+        self.tables = [bytes(bytearray(dEncodings[encoding][0](key))) for key in keys]
+
+    def __str__(self):
+        if len(self.keys) == 1:
+            return '%s %s' % (self.encoding.upper(), dEncodings[self.encoding][2] % self.keys[0])
+        else:
+            return '%s 0x%s' % (self.encoding.upper(), ''.join(['%02x' % key for key in self.keys]))
+
+    def Decode(self, data):
+        if len(self.tables) == 1:
+            return data.translate(self.tables[0])
+        result = bytearray(len(data))
+        for index, table in enumerate(self.tables):
+            result[index::len(self.tables)] = data[index::len(self.tables)].translate(table)
+        return bytes(result)
+
+dRegexNotPrintable = {}
+
+def RegexNotPrintable(encoding, key):
+    # regular expression matching the bytes that do not decode to a printable byte
+    if not (encoding, key) in dRegexNotPrintable:
+        table = dEncodings[encoding][0](key)
+        dRegexNotPrintable[(encoding, key)] = re.compile(C2BIP3('[%s]' % ''.join(['\\x%02x' % byte for byte in range(0x100) if not IsPrintable(table[byte])])))
+    return dRegexNotPrintable[(encoding, key)]
+
+def KeysPrintable(data, encoding):
+    return [key for key in dEncodings[encoding][1] if RegexNotPrintable(encoding, key).search(data) == None]
+
+def IsRepeatedKey(keys):
+    for length in range(1, len(keys)):
+        if len(keys) % length == 0 and keys == keys[:length] * (len(keys) // length):
+            return True
+    return False
+
+MAXIMUM_KEY_COMBINATIONS = 0x1000
+
+def DecodersPrintable(data, encoding, keylength, warningFunction=None):
+    # generator of decoders that decode data to printable bytes; for multi-byte keys, each byte of the key is searched separately (one byte of data out of keylength bytes)
+    # the multi-byte keys are the combinations of the key bytes found for each position: per key length, at most MAXIMUM_KEY_COMBINATIONS combinations are generated
+    for key in KeysPrintable(data, encoding):
+        yield cDecoder(encoding, [key])
+    if not dEncodings[encoding][3]:
+        return
+    for length in range(2, min(keylength, len(data) - 1) + 1):
+        keysPerPosition = []
+        for position in range(length):
+            keys = KeysPrintable(data[position::length], encoding)
+            if keys == []:
+                break
+            keysPerPosition.append(keys)
+        if len(keysPerPosition) < length:
+            continue
+        countCombinations = 1
+        for keys in keysPerPosition:
+            countCombinations *= len(keys)
+        if countCombinations > MAXIMUM_KEY_COMBINATIONS and warningFunction != None:
+            warningFunction('Warning: %s key length %d: %d combinations of key bytes (%s per position), only the first %d are tried' % (encoding, length, countCombinations, ' x '.join(['%d' % len(keys) for keys in keysPerPosition]), MAXIMUM_KEY_COMBINATIONS))
+        for keys in itertools.islice(itertools.product(*keysPerPosition), MAXIMUM_KEY_COMBINATIONS):
+            keys = list(keys)
+            if not IsRepeatedKey(keys):
+                yield cDecoder(encoding, keys)
+
+class cAhoCorasick():
+    # Aho-Corasick automaton: all added patterns are found in one pass through the data
+
+    def __init__(self):
+        self.goto = [{}]
+        self.fail = [0]
+        self.output = [[]]
+
+    def Add(self, pattern, value):
+        state = 0
+        for byte in bytearray(pattern):
+            if not byte in self.goto[state]:
+                self.goto.append({})
+                self.fail.append(0)
+                self.output.append([])
+                self.goto[state][byte] = len(self.goto) - 1
+            state = self.goto[state][byte]
+        self.output[state].append((len(pattern), value))
+
+    def Build(self):
+        queue = collections.deque(self.goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for byte, nextState in self.goto[state].items():
+                queue.append(nextState)
+                fail = self.fail[state]
+                while fail != 0 and not byte in self.goto[fail]:
+                    fail = self.fail[fail]
+                self.fail[nextState] = self.goto[fail].get(byte, 0)
+                self.output[nextState] = self.output[nextState] + self.output[self.fail[nextState]]
+
+    def Search(self, data):
+        # generator of (position, value) tuples
+        goto = self.goto
+        fail = self.fail
+        output = self.output
+        state = 0
+        for position, byte in enumerate(bytearray(data)):
+            while state != 0 and not byte in goto[state]:
+                state = fail[state]
+            state = goto[state].get(byte, 0)
+            if output[state]:
+                for length, value in output[state]:
+                    yield position - length + 1, value
+
+def EncodePatterns(patterns, encodings):
+    # Aho-Corasick automaton with each pattern encoded with each one-byte key of each encoding
+    oAhoCorasick = cAhoCorasick()
+    for encoding in encodings:
+        for key in dEncodings[encoding][1]:
+            table = dEncodings[encoding][0](key)
+            inverse = [0] * 0x100
+            for byte in range(0x100):
+                inverse[table[byte]] = byte
+            inverse = bytes(bytearray(inverse))
+            oDecoder = cDecoder(encoding, [key])
+            for pattern in patterns:
+                oAhoCorasick.Add(pattern.translate(inverse), (oDecoder, pattern))
+    oAhoCorasick.Build()
+    return oAhoCorasick
+
+def ParseDecodeCommand(command):
+    oMatch = re.match(r'^(xor|add) 0x((?:[0-9a-f][0-9a-f])+)$', command.lower())
+    if oMatch != None:
+        return cDecoder(oMatch.group(1), list(bytearray(binascii.a2b_hex(oMatch.group(2)))))
+    oMatch = re.match(r'^(rol|ror) ([1-7])$', command.lower())
+    if oMatch != None:
+        return cDecoder(oMatch.group(1), [int(oMatch.group(2))])
+    return None
 
 def StartsWithGetRemainder(strIn, strStart):
     if strIn.startswith(strStart):
@@ -1439,20 +1633,21 @@ def ProcessBinaryFile(filename, content, cutexpression, flag, oOutput, oLogfile,
 
     try:
         # ----- Put your data processing code here -----
-        if options.type == 'printable':
+        if options.patternfile != '':
+            oOutput.Line('File: %s%s' % (filename, IFF(oBinaryFile.extracted, ' (extracted)', '')))
+            for position, (oDecoder, pattern) in options.oAhoCorasick.Search(data):
+                oOutput.Line('%s 0x%08x: %s' % (oDecoder, position, pattern.decode('latin1')))
+        elif options.type == 'printable':
             oOutput.Line('File: %s%s' % (filename, IFF(oBinaryFile.extracted, ' (extracted)', '')))
-            for key in range(0, 0x100):
-                dataDecoded = bytes([byte ^ key for byte in data])
-                if ContentCheck(dataDecoded, 'printable'):
-                    oOutput.Line('XOR 0x%02x: %s' % (key, repr(dataDecoded[:40])))
+            for encoding in options.encodings.split(','):
+                for oDecoder in DecodersPrintable(data, encoding, options.keylength, warningFunction=oOutput.Line):
+                    oOutput.Line('%s: %s' % (oDecoder, repr(oDecoder.Decode(data[:40]))))
         else:
-            check, operand = StartsWithGetRemainder(options.decode.lower(), 'xor 0x')
-            if not check:
-                oOutput.Line('Supported decode command: "XOR 0x??"')
+            oDecoder = ParseDecodeCommand(options.decode)
+            if oDecoder == None:
+                oOutput.Line('Supported decode commands: "XOR 0x??", "ADD 0x??", "ROL ?", "ROR ?" (XOR and ADD keys can be longer than one byte: "XOR 0x????...")')
                 return
-            key = int(operand, 16)
-            dataDecoded = bytes([byte ^ key for byte in data])
-            oOutput.Line(dataDecoded.decode())
+            oOutput.Line(oDecoder.Decode(data).decode())
                 
 #        if flagoptions.length:
 #            oOutput.Line('%s len(data) = %d' % (filename, len(data)))
@@ -1496,6 +1691,9 @@ https://DidierStevens.com'''
     oParser.add_option('-m', '--man', action='store_true', default=False, help='Print manual')
     oParser.add_option('-d', '--decode', type=str, default='', help='Decode (XOR key)')
     oParser.add_option('-t', '--type', type=str, default='', help='Content type (printable)')
+    oParser.add_option('-e', '--encodings', type=str, default='xor', help='Encodings to try: xor,rol,ror,add (default xor)')
+    oParser.add_option('-P', '--patternfile', type=str, default='', help='File with strings to search for')
+    oParser.add_option('-k', '--keylength', type=int, default=1, help='Maximum length of XOR and ADD keys (default 1)')
     oParser.add_option('-o', '--output', type=str, default='', help='Output to file (# supported)')
     oParser.add_option('-p', '--password', default='infected', help='The ZIP password to be used (default infected)')
     oParser.add_option('-n', '--noextraction', action='store_true', default=False, help='Do not extract from archive file')
@@ -1518,14 +1716,34 @@ https://DidierStevens.com'''
         print('Error: option -j can not be used with files')
         return
 
-    if options.decode == '' and options.type == '' or options.decode != '' and options.type != '':
-        print('Use option -t or -d')
+    if len([option for option in [options.decode, options.type, options.patternfile] if option != '']) != 1:
+        print('Use option -t, -d or -P')
         return
 
     if options.type != '' and options.type != 'printable':
         print('Only "printable" is supported for option -t in this version')
         return
 
+    for encoding in options.encodings.split(','):
+        if not encoding in dEncodings:
+            print('Unknown encoding: %s' % encoding)
+            return
+
+    if options.keylength < 1:
+        print('Key length must be at least 1, not %d' % options.keylength)
+        return
+
+    if options.patternfile != '':
+        patterns = File2Strings(options.patternfile)
+        if patterns == None:
+            print('Error reading pattern file: %s' % options.patternfile)
+            return
+        patterns = [C2BIP3(pattern) for pattern in patterns if pattern != '']
+        if patterns == []:
+            print('No patterns in pattern file: %s' % options.patternfile)
+            return
+        options.oAhoCorasick = EncodePatterns(patterns, options.encodings.split(','))
+
     oLogfile = cLogfile(options.logfile, options.logcomment)
     oExpandFilenameArguments = cExpandFilenameArguments(args, options.literalfilenames, options.recursedir, options.checkfilenames, '#c#', '#f#')
     oLogfile.Line('FilesCount', str(len(oExpandFilenameArguments.Filenames())))
@@ -2,8 +2,8 @@
 
 __description__ = 'ZIP dump utility'
 __author__ = 'Didier Stevens'
-__version__ = '0.0.24'
-__date__ = '2022/12/28'
+__version__ = '0.0.35'
+__date__ = '2026/10/18'
 
 """
 
@@ -61,11 +61,23 @@ History:
   2022/12/14: added option write
   2022/12/19: 0.0.24 added values hash and hashvir for option write
   2022/12/28: updated man
+  2026/10/18: 0.0.25 faster byte statistics: CalculateBytePrevalence
+  2026/10/18: 0.0.26 dictionary attack: ZipCrypto and AES verifier engine, added option --jobs
+  2026/10/18: 0.0.27 option find: records are parsed in place (memoryview) and listed as they are found
+  2026/10/18: 0.0.28 added option --threads
+  2026/10/18: 0.0.29 added option --centraldirectory; listing without options -e and -E does not read the contained files
+  2026/10/18: 0.0.30 dictionary attack: ZipCrypto passwords are verified with the CRC of the complete file (stored, bzip2, lzma)
+  2026/10/18: 0.0.31 dump of files larger than 64 MB in chunks
+  2026/10/18: 0.0.32 option --centraldirectory: AES and other compression methods are read with module zipfile, unsupported files are reported (only with option --centraldirectory)
+  2026/10/18: 0.0.33 dictionary attack: ZipCrypto, large files are first tested with the start of the file and other files, Ctrl-C is no longer ignored
+  2026/10/18: 0.0.34 option --centraldirectory: ZIP64 end of central directory record is located with the ZIP64 locator (extensible data)
+  2026/10/18: 0.0.35 option --threads: the ZIP file objects opened by the threads are closed
 
 Todo:
 """
 
 import optparse
+import collections
 import hashlib
 import signal
 import sys
@@ -82,6 +94,18 @@ import zlib
 import codecs
 import json
 import struct
+import hmac
+import multiprocessing
+import multiprocessing.pool
+import threading
+try:
+    import bz2
+except ImportError:
+    pass
+try:
+    import lzma
+except ImportError:
+    pass
 try:
     import pyzipper as zipfile
 except ImportError:
@@ -190,6 +214,23 @@ Example:
 C:\Demo>zipdump.py --passwordfilestop . secret.zip
 Password: letmein
 
+The dictionary attack is performed on the first file in the ZIP file (for ZipCrypto: the smallest encrypted file). The encryption header of this file is read once, and passwords are tested without module zipfile.
+For ZipCrypto, the 12-byte encryption header is decrypted with each password: its last byte (check byte) rejects 255 out of 256 wrong passwords. Passwords that pass this test, are tested with the check bytes of up to 4 other encrypted files and with the start of the file (first 1 KB): a valid deflate stream, a bzip2 header or an lzma header. Then, files up to 64 KB are verified by decrypting and decompressing the complete file and checking its CRC. For larger files, only passwords that pass these tests are verified (once) by decrypting the complete file and checking its CRC (for files up to 16 MB). This last verification is slow (about 1 second per MB): it is rarely needed, except for a large stored file without other encrypted files, where 1 out of 256 passwords passes the tests. Larger stored files and files compressed with another method, are tested with module zipfile, that only checks the check byte.
+For AES (WinZip AE-1 and AE-2), the key derived with PBKDF2 from each password is tested with the 2-byte password verifier. Passwords that pass this test, are verified with the HMAC of the encrypted data (for files up to 16 MB). AES does not require module pyzipper for the dictionary attack.
+A dictionary attack can be interrupted with Ctrl-C.
+Option --jobs can be used to distribute the dictionary attack over several processes, for example --jobs 4 to use 4 CPU cores. As soon as a process finds the password, all processes are stopped.
+
+Option --threads can be used to decompress, hash and analyze (options -e and -E) or dump (options -X, -A, -D, ...) the contained files with several threads, for example --threads 4. Decompression (zlib) and hashing (hashlib) are done by Python modules that can use several CPU cores from different threads. The output is identical and in the same order as without option --threads. To limit memory usage, contained files are only processed concurrently as long as their total size is less than 64 MB: larger files are processed one at a time. Option --threads is not used for YARA rules (option -y).
+Contained files are read completely into memory to be analyzed or dumped, except for the dump of files larger than 64 MB (options -d, -x and -a, without options -c and -t): these are decompressed, dumped and written in chunks of 1 MB. With option --centraldirectory, large encrypted files are read completely.
+
+Option --centraldirectory is intended for very large ZIP files (for example, ZIP files of several GB, or with a million contained files). zipdump uses module zipfile to read the complete central directory (the list of contained files) into memory before producing output. With option --centraldirectory, zipdump seeks to the end of central directory record (ZIP64 included), and reads the central directory from disk in chunks of 1 MB: each contained file is reported as soon as its record is read. Since the rows are not collected first, the columns are not aligned (use option -S for a separated output). Contained files are only read when they are selected for analysis (options -e and -E) or for a dump (options -d, -x, -a, ...): listing time and memory usage depend only on the number of contained files.
+Option --centraldirectory does not use module zipfile to read contained files with compression methods store, deflate, bzip2 and lzma and ZipCrypto encryption. Contained files with AES encryption or another compression method are read with module zipfile (or pyzipper): then module zipfile reads the complete central directory, once. Contained files that module zipfile can not read either, are reported with an error message (in the MD5 column with option -e) and zipdump continues with the next file. A single ZIP file inside the ZIP file is not opened (like option -r), and options -y, -j, -W, -P and --passwordfilestop can not be used together with option --centraldirectory.
+Example:
+C:\Demo>zipdump.py --centraldirectory example.zip
+Index Filename Encrypted Timestamp
+1 Dialog42.exe 0 2012-02-25 12:08:26
+2 readme.txt 0 2015-11-24 19:40:12
+
 If the ZIP file contains a single ZIP file, the contained ZIP file will be considered to be the ZIP file to analyze. To prevent this, use option -r. Option -r handles the contained ZIP file as a regular file.
 
 Option -z can be used to include the name of the zipfile in the report:
@@ -1151,6 +1192,34 @@ def Magic(data):
             magicHex += '%02x' % P23Ord(data[iter])
     return magicPrintable, magicHex
 
+BYTE_PREVALENCE_CACHE_SIZE = 0x100
+dBytePrevalenceCache = {}
+
+def NumPy():
+    # NumPy is only imported when it is needed: importing it takes more time than calculating the statistics of small data
+    try:
+        import numpy
+    except ImportError:
+        return None
+    return numpy
+
+# the prevalence is memoized by the SHA-256 of the data (for example, %ENTROPY%, %BYTESTATS% and %HISTOGRAM% count the bytes of the same data), the oldest entry is removed when the cache is full
+def CalculateBytePrevalence(data):
+    key = hashlib.sha256(data).digest()
+    if not key in dBytePrevalenceCache:
+        dPrevalence = {iter: 0 for iter in range(0x100)}
+        numpy = None
+        if len(data) >= 0x100000:
+            numpy = NumPy()
+        if numpy != None:
+            dPrevalence.update(enumerate(numpy.bincount(numpy.frombuffer(data, dtype=numpy.uint8), minlength=0x100).tolist()))
+        else:
+            dPrevalence.update(collections.Counter(bytearray(data)))
+        while len(dBytePrevalenceCache) >= BYTE_PREVALENCE_CACHE_SIZE:
+            dBytePrevalenceCache.pop(next(iter(dBytePrevalenceCache)), None)
+        dBytePrevalenceCache[key] = dPrevalence
+    return dict(dBytePrevalenceCache[key])
+
 def CalculateByteStatistics(dPrevalence):
     sumValues = sum(dPrevalence.values())
     countNullByte = dPrevalence[0]
@@ -1178,11 +1247,7 @@ def CalculateByteStatistics(dPrevalence):
     return sumValues, entropy, countUniqueBytes, countNullByte, countControlBytes, countWhitespaceBytes, countPrintableBytes, countHighBytes
 
 def CalculateFileMetaData(data):
-    dPrevalence = {}
-    for iter in range(256):
-        dPrevalence[iter] = 0
-    for char in data:
-        dPrevalence[P23Ord(char)] += 1
+    dPrevalence = CalculateBytePrevalence(data)
 
     fileSize, entropy, countUniqueBytes, countNullByte, countControlBytes, countWhitespaceBytes, countPrintableBytes, countHighBytes = CalculateByteStatistics(dPrevalence)
     magicPrintable, magicHex = Magic(data[0:4])
@@ -1384,9 +1449,7 @@ def ExtraInfoSHA256(data):
 def ExtraInfoENTROPY(data):
     if data == None:
         return ''
-    dPrevalence = {iter: 0 for iter in range(0x100)}
-    for char in data:
-        dPrevalence[P23Ord(char)] += 1
+    dPrevalence = CalculateBytePrevalence(data)
     sumValues, entropy, countUniqueBytes, countNullByte, countControlBytes, countWhitespaceBytes, countPrintableBytes, countHighBytes = CalculateByteStatistics(dPrevalence)
     return '%f' % entropy
 
@@ -1413,9 +1476,7 @@ def ExtraInfoTAILASCII(data):
 def ExtraInfoHISTOGRAM(data):
     if data == None:
         return ''
-    dPrevalence = {iter: 0 for iter in range(0x100)}
-    for char in data:
-        dPrevalence[P23Ord(char)] += 1
+    dPrevalence = CalculateBytePrevalence(data)
     result = []
     count = 0
     minimum = None
@@ -1440,9 +1501,7 @@ def ExtraInfoHISTOGRAM(data):
 def ExtraInfoBYTESTATS(data):
     if data == None:
         return ''
-    dPrevalence = {iter: 0 for iter in range(0x100)}
-    for char in data:
-        dPrevalence[P23Ord(char)] += 1
+    dPrevalence = CalculateBytePrevalence(data)
     sumValues, entropy, countUniqueBytes, countNullByte, countControlBytes, countWhitespaceBytes, countPrintableBytes, countHighBytes = CalculateByteStatistics(dPrevalence)
     return '%d,%d,%d,%d,%d' % (countNullByte, countControlBytes, countWhitespaceBytes, countPrintableBytes, countHighBytes)
 
@@ -1508,6 +1567,15 @@ def PrintOutput(output, outputExtraInfo, extra, separator, quote, fOut):
             for i in range(len(stringsOutput)):
                 Print(' '.join([Format(stringsOutput[i][j], lengthsMax[j]) for j in range(len(stringsOutput[i]))]) + ' ' + outputExtraInfo[i], fOut)
 
+# prints a row of the file listing as soon as it is available: without separator, the columns are not aligned
+def PrintOutputRow(row, extrainfo, extra, separator, quote, fOut):
+    if extra.startswith('!'):
+        Print(extrainfo, fOut)
+    elif separator != '':
+        Print(MakeCSVLine(row, separator, quote) + separator + extrainfo, fOut)
+    else:
+        Print(' '.join(map(ToString, row)) + ' ' + extrainfo, fOut)
+
 def IsNumeric(value):
     if value == '':
         return False
@@ -5077,17 +5145,287 @@ def GetDictionary(passwordfile):
           'notused',
           'sss']
 
-def DictionaryAttack(passwordfile, oZipfile, fOut, stop):
+ZIP_ATTACK_CHUNK_SIZE = 1000
+ZIP_ATTACK_DATA_LIMIT = 0x1000000
+ZIPCRYPTO_VERIFY_SIZE = 0x400
+ZIPCRYPTO_FULL_VERIFY_SIZE = 0x10000
+ZIPCRYPTO_OTHER_FILES = 4
+
+def ZipCryptoCRC32Table():
+    table = []
+    for index in range(256):
+        crc = index
+        for iter in range(8):
+            if crc & 1:
+                crc = (crc >> 1) ^ 0xEDB88320
+            else:
+                crc >>= 1
+        table.append(crc)
+    return table
+
+ZIPCRYPTO_CRC32TABLE = ZipCryptoCRC32Table()
+
+# decrypts data with the ZipCrypto keys derived from password; with check == True, only the encryption header is decrypted and None is returned if the check byte is wrong
+def ZipCryptoDecrypt(password, data, checkbyte=None):
+    crctable = ZIPCRYPTO_CRC32TABLE
+    key0 = 0x12345678
+    key1 = 0x23456789
+    key2 = 0x34567890
+    for byte in bytearray(password):
+        key0 = (key0 >> 8) ^ crctable[(key0 ^ byte) & 0xFF]
+        key1 = ((key1 + (key0 & 0xFF)) * 134775813 + 1) & 0xFFFFFFFF
+        key2 = (key2 >> 8) ^ crctable[(key2 ^ (key1 >> 24)) & 0xFF]
+    result = bytearray()
+    for byte in bytearray(data):
+        temp = key2 | 2
+        byte ^= ((temp * (temp ^ 1)) >> 8) & 0xFF
+        result.append(byte)
+        key0 = (key0 >> 8) ^ crctable[(key0 ^ byte) & 0xFF]
+        key1 = ((key1 + (key0 & 0xFF)) * 134775813 + 1) & 0xFFFFFFFF
+        key2 = (key2 >> 8) ^ crctable[(key2 ^ (key1 >> 24)) & 0xFF]
+        if checkbyte != None and len(result) == 12 and byte != checkbyte:
+            return None
+    return bytes(result)
+
+# returns (decompressed data, True if this is the complete file); data is the complete compressed file if complete == True, otherwise the start of it
+def ZipDecompress(compression, data, complete):
+    if compression == zipfile.ZIP_STORED:
+        return data, complete
+    elif compression == zipfile.ZIP_DEFLATED:
+        oDecompress = zlib.decompressobj(-15)
+        decompressed = oDecompress.decompress(data)
+        if oDecompress.eof:
+            if oDecompress.unused_data != b'':
+                raise zlib.error('data after deflate stream')
+            return decompressed, True
+        if complete:
+            raise zlib.error('incomplete deflate stream')
+        return decompressed, False
+    elif compression == zipfile.ZIP_BZIP2 and 'bz2' in sys.modules:
+        oDecompress = bz2.BZ2Decompressor()
+        decompressed = oDecompress.decompress(data)
+        if complete and not oDecompress.eof:
+            raise EOFError('incomplete bzip2 stream')
+        return decompressed, oDecompress.eof
+    elif compression == zipfile.ZIP_LZMA and 'lzma' in sys.modules:
+        # ZIP LZMA header: version (2 bytes), length of properties (2 bytes), properties; converted to an lzma alone header with unknown size
+        lengthProperties = struct.unpack('<H', data[2:4])[0]
+        oDecompress = lzma.LZMADecompressor(lzma.FORMAT_ALONE)
+        decompressed = oDecompress.decompress(data[4:4 + lengthProperties] + b'\xFF' * 8 + data[4 + lengthProperties:])
+        return decompressed, complete
+    return None, False
+
+# generator: yields the decompressed data of the compressed chunks of a complete file, in pieces of at most ZIP_DUMP_CHUNK_SIZE bytes
+def ZipDecompressChunks(compression, chunks):
+    if compression == zipfile.ZIP_STORED:
+        for chunk in chunks:
+            yield chunk
+        return
+    if compression == zipfile.ZIP_DEFLATED:
+        oDecompress = zlib.decompressobj(-15)
+        for chunk in chunks:
+            while True:
+                decompressed = oDecompress.decompress(chunk, ZIP_DUMP_CHUNK_SIZE)
+                if decompressed != b'':
+                    yield decompressed
+                chunk = oDecompress.unconsumed_tail
+                if chunk == b'' and len(decompressed) < ZIP_DUMP_CHUNK_SIZE:
+                    break
+        if not oDecompress.eof:
+            raise zlib.error('incomplete deflate stream')
+        return
+    if compression == zipfile.ZIP_BZIP2:
+        oDecompress = bz2.BZ2Decompressor()
+    else:
+        oDecompress = lzma.LZMADecompressor(lzma.FORMAT_ALONE)
+    first = True
+    for chunk in chunks:
+        if first and compression == zipfile.ZIP_LZMA:
+            lengthProperties = struct.unpack('<H', chunk[2:4])[0]
+            chunk = chunk[4:4 + lengthProperties] + b'\xFF' * 8 + chunk[4 + lengthProperties:]
+        first = False
+        decompressed = oDecompress.decompress(chunk, ZIP_DUMP_CHUNK_SIZE)
+        if decompressed != b'':
+            yield decompressed
+        while not oDecompress.eof and not oDecompress.needs_input:
+            decompressed = oDecompress.decompress(b'', ZIP_DUMP_CHUNK_SIZE)
+            if decompressed != b'':
+                yield decompressed
+
+# True if ZipDecompress can decompress files compressed with this method
+def ZipDecompressSupported(compression):
+    return compression in [zipfile.ZIP_STORED, zipfile.ZIP_DEFLATED] or compression == zipfile.ZIP_BZIP2 and 'bz2' in sys.modules or compression == zipfile.ZIP_LZMA and 'lzma' in sys.modules
+
+# returns the check byte of a ZipCrypto encrypted file
+def ZipCryptoCheckByte(oZipInfo):
+    if oZipInfo.flag_bits & 0x08:
+        return (oZipInfo.date_time[3] << 3) | (oZipInfo.date_time[4] >> 3)
+    else:
+        return oZipInfo.CRC >> 24
+
+# returns the file data of a contained file (at most size bytes), or None
+def ZipAttackReadData(oZipfile, oZipInfo, size):
+    oZipfile.fp.seek(oZipInfo.header_offset)
+    header = oZipfile.fp.read(30)
+    if len(header) != 30 or header[0:4] != b'PK\x03\x04':
+        return None
+    filenamelength, extralength = struct.unpack('<HH', header[26:30])
+    oZipfile.fp.seek(oZipInfo.header_offset + 30 + filenamelength + extralength)
+    return oZipfile.fp.read(min(oZipInfo.compress_size, size))
+
+# returns the data of the AES extra field (0x9901), or None
+def ZipExtraFieldAES(extra):
+    while len(extra) >= 4:
+        fieldid, fieldlength = struct.unpack('<HH', extra[:4])
+        if fieldid == 0x9901 and fieldlength >= 7:
+            return extra[4:4 + fieldlength]
+        extra = extra[4 + fieldlength:]
+    return None
+
+def IsZipCrypto(oZipInfo):
+    return oZipInfo.flag_bits & 0x41 == 0x01 and oZipInfo.compress_type != 99 and ZipExtraFieldAES(oZipInfo.extra) == None
+
+# returns the values needed to test passwords without module zipfile: [method, compression, file CRC, complete, check values, raw file data], or None if the file is not encrypted with ZipCrypto or AES
+# with ZipCrypto, the smallest encrypted file of the ZIP file is tested (it can be verified completely), and the encryption headers of a few other encrypted files are used to reject passwords
+def ZipAttackHeader(oZipfile):
+    oZipInfo = oZipfile.infolist()[0]
+    if oZipInfo.flag_bits & 0x41 != 0x01 or not hasattr(oZipfile, 'fp') or oZipfile.fp == None:
+        return None
+    # AES: extra field 0x9901 (compress_type is 99, or the actual compression method with pyzipper)
+    fieldAES = ZipExtraFieldAES(oZipInfo.extra)
+    if fieldAES != None:
+        strength, compression = struct.unpack('<BH', fieldAES[4:7])
+        if not strength in [1, 2, 3]:
+            return None
+        saltlength = 4 + 4 * strength
+        keylength = 8 + 8 * strength
+        data = ZipAttackReadData(oZipfile, oZipInfo, ZIP_ATTACK_DATA_LIMIT)
+        if data == None or len(data) < saltlength + 2 + 10:
+            return None
+        complete = len(data) == oZipInfo.compress_size
+        return ['aes', compression, oZipInfo.CRC, complete, [data[:saltlength], data[saltlength:saltlength + 2], keylength], data[saltlength + 2:]]
+    oZipInfos = [oZipInfo for oZipInfo in oZipfile.infolist() if IsZipCrypto(oZipInfo) and ZipDecompressSupported(oZipInfo.compress_type)]
+    if oZipInfos == []:
+        return None
+    oZipInfos.sort(key=lambda oZipInfo: oZipInfo.compress_size)
+    oZipInfo = oZipInfos[0]
+    data = ZipAttackReadData(oZipfile, oZipInfo, ZIP_ATTACK_DATA_LIMIT)
+    if data == None or len(data) < 12:
+        return None
+    complete = len(data) == oZipInfo.compress_size
+    # files larger than ZIP_ATTACK_DATA_LIMIT can only be tested with the start of the file, that is not enough for stored files
+    if not complete and oZipInfo.compress_type == zipfile.ZIP_STORED:
+        return None
+    others = []
+    for oZipInfoOther in oZipInfos[1:1 + ZIPCRYPTO_OTHER_FILES]:
+        header = ZipAttackReadData(oZipfile, oZipInfoOther, 12)
+        if header != None and len(header) == 12:
+            others.append([header, ZipCryptoCheckByte(oZipInfoOther)])
+    return ['zipcrypto', oZipInfo.compress_type, oZipInfo.CRC, complete, [ZipCryptoCheckByte(oZipInfo), others], data]
+
+# tests the start of a decrypted file (without encryption header) that is larger than ZIPCRYPTO_VERIFY_SIZE
+def ZipCryptoVerifyStart(compression, decrypted):
+    if compression == zipfile.ZIP_DEFLATED:
+        try:
+            decompressed, completeDecompressed = ZipDecompress(compression, decrypted, False)
+        except zlib.error:
+            return False
+        return not completeDecompressed
+    elif compression == zipfile.ZIP_BZIP2:
+        # stream header BZh1 to BZh9 followed by the magic number of the first block
+        return decrypted[:3] == b'BZh' and decrypted[3:4] in [b'1', b'2', b'3', b'4', b'5', b'6', b'7', b'8', b'9'] and decrypted[4:10] == b'\x31\x41\x59\x26\x53\x59'
+    elif compression == zipfile.ZIP_LZMA:
+        # 5 bytes of properties (lc, lp and pb, dictionary size) and a valid start of the LZMA stream
+        if len(decrypted) < 9 or struct.unpack('<H', decrypted[2:4])[0] != 5 or bytearray(decrypted)[4] >= 9 * 5 * 5:
+            return False
+        try:
+            ZipDecompress(compression, decrypted, False)
+        except lzma.LZMAError:
+            return False
+        return True
+    return True
+
+# returns True if the CRC-32 of the complete decrypted and decompressed file is correct
+def ZipCryptoVerifyComplete(compression, crc, password, data):
+    decrypted = ZipCryptoDecrypt(password, data)
     try:
-        oZipfile.open(oZipfile.infolist()[0], 'r').read(2)
-        if stop:
-            Print('ZIP file is not password protected', fOut)
-        return ''
-    except RuntimeError:
-        pass
+        decompressed, completeDecompressed = ZipDecompress(compression, decrypted[12:], True)
+    except Exception:
+        return False
+    return zlib.crc32(decompressed) & 0xFFFFFFFF == crc
+
+# fast test of a password: passwords that pass this test are then verified with ZipAttackVerifyFinal, by the main process
+# ZipCrypto: the check bytes of other files and the start of the file are tested, and small files are verified completely
+def ZipAttackVerify(zipattackheader, password):
+    method, compression, crc, complete, checkvalues, data = zipattackheader
+    if method == 'aes':
+        salt, verifier, keylength = checkvalues
+        keys = hashlib.pbkdf2_hmac('sha1', password, salt, 1000, 2 * keylength + 2)
+        if keys[-2:] != verifier:
+            return False
+        if complete:
+            return hmac.new(keys[keylength:2 * keylength], data[:-10], hashlib.sha1).digest()[:10] == data[-10:]
+        return True
+    else:
+        checkbyte, others = checkvalues
+        decrypted = ZipCryptoDecrypt(password, data[:12 + ZIPCRYPTO_VERIFY_SIZE], checkbyte)
+        if decrypted == None:
+            return False
+        for header, checkbyteOther in others:
+            if ZipCryptoDecrypt(password, header, checkbyteOther) == None:
+                return False
+        if complete and len(data) <= 12 + ZIPCRYPTO_VERIFY_SIZE:
+            return ZipCryptoVerifyComplete(compression, crc, password, data)
+        if not ZipCryptoVerifyStart(compression, decrypted[12:]):
+            return False
+        if complete and len(data) <= 12 + ZIPCRYPTO_FULL_VERIFY_SIZE:
+            return ZipCryptoVerifyComplete(compression, crc, password, data)
+        return True
 
+# verification of a password that passed ZipAttackVerify: a large ZipCrypto file is decrypted completely (if it is not larger than ZIP_ATTACK_DATA_LIMIT)
+def ZipAttackVerifyFinal(zipattackheader, password):
+    method, compression, crc, complete, checkvalues, data = zipattackheader
+    if method == 'zipcrypto' and complete and len(data) > 12 + ZIPCRYPTO_FULL_VERIFY_SIZE:
+        return ZipCryptoVerifyComplete(compression, crc, password, data)
+    return True
+
+dZipAttackWorker = {}
+
+def ZipAttackWorkerInitialize(zipattackheader, pool=False):
+    dZipAttackWorker['header'] = zipattackheader
+    if pool:
+        # Ctrl-C is handled by the main process, that terminates the pool
+        signal.signal(signal.SIGINT, signal.SIG_IGN)
+
+# returns (number of passwords tested, list of passwords that pass ZipAttackVerify)
+def ZipAttackWorker(passwords):
+    return len(passwords), [password for password in passwords if ZipAttackVerify(dZipAttackWorker['header'], C2BIP3(password))]
+
+# the passwords are split in batches; with option --jobs the batches are tested by a pool of processes and the results are processed in order of the batches
+class cZipAttack(object):
+    def __init__(self, zipattackheader, jobs):
+        self.zipattackheader = zipattackheader
+        self.jobs = jobs
+        self.oPool = None
+
+    def Batches(self, passwords):
+        for index in range(0, len(passwords), ZIP_ATTACK_CHUNK_SIZE):
+            yield passwords[index:index + ZIP_ATTACK_CHUNK_SIZE]
+
+    def Map(self, passwords):
+        if self.jobs <= 1:
+            ZipAttackWorkerInitialize(self.zipattackheader)
+            return map(ZipAttackWorker, self.Batches(passwords))
+        self.oPool = multiprocessing.Pool(self.jobs, ZipAttackWorkerInitialize, (self.zipattackheader, True))
+        return self.oPool.imap(ZipAttackWorker, self.Batches(passwords))
+
+    def Terminate(self):
+        if self.oPool != None:
+            self.oPool.terminate()
+            self.oPool = None
+
+def DictionaryAttackZipfile(passwords, oZipfile, fOut, stop):
     counter = 0
-    passwords = GetDictionary(passwordfile)
     start = time.time()
     for password in passwords:
         try:
@@ -5095,8 +5433,6 @@ def DictionaryAttack(passwordfile, oZipfile, fOut, stop):
             if stop:
                 Print('Password: %s' % password, fOut)
             return password
-        except KeyboardInterrupt:
-            return None
         except RuntimeError:
             pass
         except zipfile.BadZipfile:
@@ -5110,6 +5446,39 @@ def DictionaryAttack(passwordfile, oZipfile, fOut, stop):
                 Print('Passwords: %8d %.2f%% p/s: %d ETC: %s' % (counter, float(counter) / float(len(passwords)) * 100.0, pps, FormatTime(start + len(passwords) / pps)), fOut)
     return None
 
+def DictionaryAttack(passwordfile, oZipfile, fOut, stop, jobs=1):
+    try:
+        oZipfile.open(oZipfile.infolist()[0], 'r').read(2)
+        if stop:
+            Print('ZIP file is not password protected', fOut)
+        return ''
+    except RuntimeError:
+        pass
+
+    passwords = GetDictionary(passwordfile)
+    zipattackheader = ZipAttackHeader(oZipfile)
+    if zipattackheader == None:
+        return DictionaryAttackZipfile(passwords, oZipfile, fOut, stop)
+
+    counter = 0
+    start = time.time()
+    oZipAttack = cZipAttack(zipattackheader, jobs)
+    try:
+        for count, candidates in oZipAttack.Map(passwords):
+            for password in candidates:
+                if ZipAttackVerifyFinal(zipattackheader, C2BIP3(password)):
+                    if stop:
+                        Print('Password: %s' % password, fOut)
+                    return password
+            counter += count
+            if counter // 10000 > (counter - count) // 10000:
+                pps = float(counter) / max(float(time.time() - start), 0.000001)
+                if stop:
+                    Print('Passwords: %8d %.2f%% p/s: %d ETC: %s' % (counter, float(counter) / float(len(passwords)) * 100.0, pps, FormatTime(start + len(passwords) / pps)), fOut)
+    finally:
+        oZipAttack.Terminate()
+    return None
+
 def SelectDumpFunction(options):
     if options.dump or options.dumpall:
         DumpFunction = lambda x:x
@@ -5124,12 +5493,381 @@ def SelectDumpFunction(options):
         DumpFunction = HexAsciiDump
     return DumpFunction
 
+# returns a function to dump a chunk of a file given the position of the chunk, or None if the dump can not be done in chunks
+def SelectDumpChunkFunction(options):
+    if options.dump or options.dumpall:
+        return lambda data, position: data
+    elif options.hexdump or options.hexdumpall:
+        return lambda data, position: HexDump(data)
+    elif options.translate != '':
+        return None
+    else:
+        return lambda data, position: cDump(data, offset=position, dumplinelength=dumplinelength).HexAsciiDump()
+
+ZIP_THREADS_BUFFER_SIZE = 0x4000000
+ZIP_DUMP_CHUNK_SIZE = 0x100000
+
+# generator: yields function(*arguments) for each (size, arguments) in jobs, in order
+# with threads > 1, the jobs are executed by a pool of threads; jobs are submitted as long as the total size of the jobs in progress is less than ZIP_THREADS_BUFFER_SIZE, larger jobs are executed alone
+def MapThreads(function, jobs, threads):
+    if threads <= 1:
+        for size, arguments in jobs:
+            yield function(*arguments)
+        return
+    oPool = multiprocessing.pool.ThreadPool(threads)
+    pending = collections.deque()
+    buffered = 0
+    try:
+        for size, arguments in jobs:
+            while len(pending) > 0 and (buffered + size > ZIP_THREADS_BUFFER_SIZE or len(pending) >= threads * 4):
+                sizePending, result = pending.popleft()
+                buffered -= sizePending
+                yield result.get()
+            if size > ZIP_THREADS_BUFFER_SIZE:
+                yield function(*arguments)
+            else:
+                pending.append((size, oPool.apply_async(function, arguments)))
+                buffered += size
+        while len(pending) > 0:
+            sizePending, result = pending.popleft()
+            yield result.get()
+    finally:
+        oPool.terminate()
+
+# reads contained files; with several threads, each thread opens the ZIP file again, because a ZIP file object can not be shared safely between threads
+# the ZIP file objects opened by the threads are closed with method Close
+class cZipMembers(object):
+    def __init__(self, oZipfile, threads):
+        self.oZipfile = oZipfile
+        self.threads = threads
+        self.oThreadLocal = threading.local()
+        self.oZipfilesThreads = []
+        self.oLock = threading.Lock()
+
+    def ZipFile(self):
+        if self.threads <= 1:
+            return self.oZipfile
+        if not hasattr(self.oThreadLocal, 'oZipfile'):
+            if self.oZipfile.filename != None and os.path.isfile(self.oZipfile.filename):
+                self.oThreadLocal.oZipfile = CreateZipFileObject(self.oZipfile.filename, 'r')
+            else:
+                self.oThreadLocal.oZipfile = CreateZipFileObject(DataIO(self.oZipfile.fp.getvalue()), 'r')
+            with self.oLock:
+                self.oZipfilesThreads.append(self.oThreadLocal.oZipfile)
+        return self.oThreadLocal.oZipfile
+
+    def Close(self):
+        with self.oLock:
+            for oZipfile in self.oZipfilesThreads:
+                oZipfile.close()
+            self.oZipfilesThreads = []
+            self.oThreadLocal = threading.local()
+
+    def Read(self, oZipInfo, zippassword):
+        file = self.ZipFile().open(oZipInfo, 'r', C2BIP3(zippassword))
+        filecontent = file.read()
+        file.close()
+        return filecontent
+
+    # returns an iterator over the content of a contained file, in chunks of ZIP_DUMP_CHUNK_SIZE bytes; the contained file is opened before returning
+    def ReadChunks(self, oZipInfo, zippassword):
+        return ReadFileChunks(self.ZipFile().open(oZipInfo, 'r', C2BIP3(zippassword)))
+
+# generator: yields the content of file in chunks of ZIP_DUMP_CHUNK_SIZE bytes, and closes file
+def ReadFileChunks(file):
+    try:
+        while True:
+            chunk = file.read(ZIP_DUMP_CHUNK_SIZE)
+            if chunk == b'':
+                break
+            yield chunk
+    finally:
+        file.close()
+
+# generator: yields the dump of the chunks, the dump of each chunk (except the last one) is a whole number of dump lines
+def DumpChunks(chunks, DumpChunkFunction):
+    position = 0
+    buffer = b''
+    for chunk in chunks:
+        buffer += chunk
+        length = len(buffer) - len(buffer) % dumplinelength
+        if length > 0:
+            yield DumpChunkFunction(buffer[:length], position)
+            position += length
+            buffer = buffer[length:]
+    if buffer != b'':
+        yield DumpChunkFunction(buffer, position)
+
+# returns the dump of a contained file as a sequence of strings: files larger than ZIP_THREADS_BUFFER_SIZE are read and dumped in chunks, except with options -c and -t
+def DumpZipMember(oZipMembers, oZipInfo, zippassword, DumpFunction, DumpChunkFunction, cut):
+    try:
+        if cut == '' and DumpChunkFunction != None and ZipMemberSize(oZipInfo) > ZIP_THREADS_BUFFER_SIZE:
+            return DumpChunks(oZipMembers.ReadChunks(oZipInfo, zippassword), DumpChunkFunction)
+        return [DumpFunction(CutData(oZipMembers.Read(oZipInfo, zippassword), cut))]
+    except cZipUnsupportedFile as e:
+        return ['Error: %s: %s\n' % (oZipInfo.filename, e)]
+
+# returns (row, extra info) for the file listing
+def AnalyzeZipMember(oZipMembers, oZipInfo, zippassword, counter, zipfilename, options):
+    error = None
+    filecontent = None
+    if options.extended or options.extra != '':
+        try:
+            filecontent = oZipMembers.Read(oZipInfo, zippassword)
+        except cZipUnsupportedFile as e:
+            error = 'Error: %s' % e
+    encrypted = oZipInfo.flag_bits & 1
+    timestamp = '%04d-%02d-%02d %02d:%02d:%02d' % oZipInfo.date_time
+    if options.extended and error != None:
+        row = [oZipInfo.filename, encrypted, timestamp, error] + [''] * 10
+    elif options.extended:
+        filehash, magicPrintable, magicHex, fileSize, entropy, countUniqueBytes, countNullByte, countControlBytes, countWhitespaceBytes, countPrintableBytes, countHighBytes = CalculateFileMetaData(filecontent)
+        row = [oZipInfo.filename, encrypted, timestamp, filehash, fileSize, entropy, countUniqueBytes, magicHex, magicPrintable, countNullByte, countControlBytes, countWhitespaceBytes, countPrintableBytes, countHighBytes]
+    else:
+        row = [oZipInfo.filename, encrypted, timestamp]
+    if options.zipfilename:
+        row.insert(0, zipfilename)
+    row.insert(0, counter)
+    return row, GenerateExtraInfo(options.extra, counter, zipfilename, oZipInfo.filename, encrypted, timestamp, filecontent)
+
+def ZipMemberSize(oZipInfo):
+    return oZipInfo.file_size + oZipInfo.compress_size
+
+# file record of the central directory, with the same attributes as zipfile.ZipInfo
+class cZipCentralDirectoryEntry(object):
+    def __init__(self, header, filename, extra, comment):
+        signature, self.create_version, self.extract_version, self.flag_bits, self.compress_type, dostime, dosdate, self.CRC, self.compress_size, self.file_size, lengthFilename, lengthExtra, lengthComment, self.volume, self.internal_attr, self.external_attr, self.header_offset = struct.unpack('<4s6H3L5H2L', header)
+        if self.flag_bits & 0x800:
+            self.filename = filename.decode('utf-8')
+        else:
+            self.filename = filename.decode('cp437')
+        if '\x00' in self.filename:
+            self.filename = self.filename[:self.filename.index('\x00')]
+        self.date_time = ((dosdate >> 9) + 1980, (dosdate >> 5) & 0xF, dosdate & 0x1F, dostime >> 11, (dostime >> 5) & 0x3F, (dostime & 0x1F) * 2)
+        self.extra = extra
+        self.comment = comment
+        self.ParseZIP64Extra()
+
+    def ParseZIP64Extra(self):
+        position = 0
+        while position + 4 <= len(self.extra):
+            headerID, size = struct.unpack('<HH', self.extra[position:position + 4])
+            if headerID == 0x0001:
+                values = self.extra[position + 4:position + 4 + size]
+                for name in ['file_size', 'compress_size', 'header_offset']:
+                    if getattr(self, name) == 0xFFFFFFFF and len(values) >= 8:
+                        setattr(self, name, struct.unpack('<Q', values[:8])[0])
+                        values = values[8:]
+                return
+            position += 4 + size
+
+    def is_dir(self):
+        return self.filename.endswith('/')
+
+ZIP_CENTRAL_DIRECTORY_CHUNK_SIZE = 0x100000
+ZIP64_EXTENSIBLE_DATA_SEARCH_SIZE = 0x10000
+
+# reads the central directory of a ZIP file (ZIP64 included) straight from disk, and the contained files that are selected
+# raised by cZipCentralDirectory for a contained file that module zipfile can not read either: the file is reported and zipdump continues with the next file
+class cZipUnsupportedFile(Exception):
+    pass
+
+class cZipCentralDirectory(object):
+    def __init__(self, fZip):
+        self.fZip = fZip
+        self.oLock = threading.Lock()
+        self.oZipfile = None
+        self.dZipInfos = None
+        self.ReadEndOfCentralDirectory()
+
+    def ReadEndOfCentralDirectory(self):
+        self.fZip.seek(0, os.SEEK_END)
+        filesize = self.fZip.tell()
+        sizeTail = min(filesize, 22 + 0xFFFF)
+        self.fZip.seek(filesize - sizeTail)
+        tail = self.fZip.read(sizeTail)
+        position = tail.rfind(b'PK\x05\x06')
+        while position != -1 and (len(tail) - position < 22 or position + 22 + struct.unpack('<H', tail[position + 20:position + 22])[0] > len(tail)):
+            position = tail.rfind(b'PK\x05\x06', 0, position)
+        if position == -1:
+            raise Exception('End of central directory record not found')
+        signature, disk, diskCentralDirectory, self.entriesDisk, self.entries, self.sizeCentralDirectory, self.offsetCentralDirectory, lengthComment = struct.unpack('<4s4H2LH', tail[position:position + 22])
+        self.comment = tail[position + 22:position + 22 + lengthComment]
+        self.positionEndOfCentralDirectory = filesize - sizeTail + position
+        self.zip64 = False
+        positionEndOfCentralDirectory = self.positionEndOfCentralDirectory
+        positionZip64 = self.ReadZip64EndOfCentralDirectory()
+        if positionZip64 != None:
+            self.zip64 = True
+            positionEndOfCentralDirectory = positionZip64
+        self.concat = positionEndOfCentralDirectory - self.sizeCentralDirectory - self.offsetCentralDirectory
+        if self.concat < 0:
+            raise Exception('Bad central directory offset: 0x%08x' % self.offsetCentralDirectory)
+
+    # reads the ZIP64 end of central directory record found via the ZIP64 locator (that precedes the end of central directory record), and returns its position (or None if there is no ZIP64 record)
+    # the offset in the locator does not include data prepended to the ZIP file: if the record is not found at this offset, it is searched before the locator (the record, with its extensible data, ends at the locator)
+    def ReadZip64EndOfCentralDirectory(self):
+        if self.positionEndOfCentralDirectory < 20:
+            return None
+        positionLocator = self.positionEndOfCentralDirectory - 20
+        self.fZip.seek(positionLocator)
+        locator = self.fZip.read(20)
+        if len(locator) != 20 or locator[:4] != b'PK\x06\x07':
+            return None
+        signature, diskZip64, offsetZip64, disks = struct.unpack('<4sLQL', locator)
+        positions = [offsetZip64]
+        positionSearch = max(0, positionLocator - ZIP64_EXTENSIBLE_DATA_SEARCH_SIZE - 56)
+        self.fZip.seek(positionSearch)
+        data = self.fZip.read(positionLocator - positionSearch)
+        position = data.rfind(b'PK\x06\x06')
+        while position != -1:
+            positions.append(positionSearch + position)
+            position = data.rfind(b'PK\x06\x06', 0, position)
+        for position in positions:
+            if position + 56 > positionLocator:
+                continue
+            self.fZip.seek(position)
+            record = self.fZip.read(56)
+            if record[:4] != b'PK\x06\x06':
+                continue
+            signature, size, versionMadeBy, versionNeeded, disk, diskCentralDirectory, entriesDisk, entries, sizeCentralDirectory, offsetCentralDirectory = struct.unpack('<4sQ2H2L4Q', record)
+            if position + 12 + size != positionLocator:
+                continue
+            self.entriesDisk, self.entries, self.sizeCentralDirectory, self.offsetCentralDirectory = entriesDisk, entries, sizeCentralDirectory, offsetCentralDirectory
+            return position
+        return None
+
+    # generator: yields a cZipCentralDirectoryEntry for each record of the central directory; the central directory is read in chunks of ZIP_CENTRAL_DIRECTORY_CHUNK_SIZE bytes
+    def Entries(self):
+        positionRead = self.offsetCentralDirectory + self.concat
+        buffer = b''
+        index = 0
+        eof = False
+        for iter in range(self.entries):
+            if not eof and len(buffer) - index < 46 + 3 * 0xFFFF:
+                with self.oLock:
+                    self.fZip.seek(positionRead)
+                    chunk = self.fZip.read(ZIP_CENTRAL_DIRECTORY_CHUNK_SIZE)
+                positionRead += len(chunk)
+                eof = len(chunk) < ZIP_CENTRAL_DIRECTORY_CHUNK_SIZE
+                buffer = buffer[index:] + chunk
+                index = 0
+            header = buffer[index:index + 46]
+            if len(header) != 46 or header[:4] != b'PK\x01\x02':
+                raise Exception('Bad central directory record at position 0x%08x' % (positionRead - len(buffer) + index))
+            lengthFilename, lengthExtra, lengthComment = struct.unpack('<3H', header[28:34])
+            positionFilename = index + 46
+            positionExtra = positionFilename + lengthFilename
+            positionComment = positionExtra + lengthExtra
+            index = positionComment + lengthComment
+            if index > len(buffer):
+                raise Exception('Truncated central directory record at position 0x%08x' % (positionRead - len(buffer) + positionFilename - 46))
+            yield cZipCentralDirectoryEntry(header, buffer[positionFilename:positionExtra], buffer[positionExtra:positionComment], buffer[positionComment:index])
+
+    # returns the local file header and the position of the file data
+    def ReadLocalFileHeader(self, oEntry):
+        with self.oLock:
+            self.fZip.seek(oEntry.header_offset + self.concat)
+            header = self.fZip.read(30)
+        if len(header) != 30 or header[:4] != b'PK\x03\x04':
+            raise Exception('Bad local file header for %s' % oEntry.filename)
+        lengthFilename, lengthExtra = struct.unpack('<2H', header[26:30])
+        return header, oEntry.header_offset + self.concat + 30 + lengthFilename + lengthExtra
+
+    # returns an iterator over the content of a contained file, in chunks; encrypted files and files compressed with a method not supported by ZipDecompress are read completely before returning
+    def ReadChunks(self, oEntry, zippassword):
+        if oEntry.flag_bits & 1 or not ZipDecompressSupported(oEntry.compress_type):
+            return [self.Read(oEntry, zippassword)]
+        return self.DecompressChunks(oEntry)
+
+    # generator: yields the content of an unencrypted contained file in chunks, and checks the CRC at the end
+    def DecompressChunks(self, oEntry):
+        header, position = self.ReadLocalFileHeader(oEntry)
+        crc = 0
+        for chunk in ZipDecompressChunks(oEntry.compress_type, self.ReadCompressedChunks(position, oEntry.compress_size)):
+            crc = zlib.crc32(chunk, crc)
+            yield chunk
+        if crc & 0xFFFFFFFF != oEntry.CRC:
+            raise Exception('Bad CRC-32 for file %r' % oEntry.filename)
+
+    # generator: yields size bytes read from position, in chunks of ZIP_DUMP_CHUNK_SIZE bytes
+    def ReadCompressedChunks(self, position, size):
+        while size > 0:
+            with self.oLock:
+                self.fZip.seek(position)
+                chunk = self.fZip.read(min(size, ZIP_DUMP_CHUNK_SIZE))
+            if chunk == b'':
+                raise Exception('Truncated ZIP file at position 0x%08x' % position)
+            position += len(chunk)
+            size -= len(chunk)
+            yield chunk
+
+    # files with AES encryption or compressed with a method not supported by ZipDecompress are read with module zipfile: the first time, module zipfile reads the complete central directory
+    def ReadZipfile(self, oEntry, zippassword):
+        with self.oLock:
+            if self.oZipfile == None:
+                self.oZipfile = CreateZipFileObject(self.fZip, 'r')
+                self.dZipInfos = dict((oZipInfo.header_offset, oZipInfo) for oZipInfo in self.oZipfile.infolist())
+            oZipInfo = self.dZipInfos.get(oEntry.header_offset + self.concat)
+            if oZipInfo == None:
+                raise Exception('File not found by module zipfile: %s' % oEntry.filename)
+            try:
+                file = self.oZipfile.open(oZipInfo, 'r', C2BIP3(zippassword))
+            except NotImplementedError as e:
+                raise cZipUnsupportedFile(str(e))
+            try:
+                return file.read()
+            except NotImplementedError as e:
+                raise cZipUnsupportedFile(str(e))
+            finally:
+                file.close()
+
+    def Close(self):
+        if self.oZipfile != None:
+            self.oZipfile.close()
+            self.oZipfile = None
+
+    def Read(self, oEntry, zippassword):
+        if oEntry.compress_type == 99 or not ZipDecompressSupported(oEntry.compress_type):
+            return self.ReadZipfile(oEntry, zippassword)
+        header, position = self.ReadLocalFileHeader(oEntry)
+        with self.oLock:
+            self.fZip.seek(position)
+            data = self.fZip.read(oEntry.compress_size)
+        if oEntry.flag_bits & 1:
+            if oEntry.flag_bits & 8:
+                checkbyte = (struct.unpack('<H', header[10:12])[0] >> 8) & 0xFF
+            else:
+                checkbyte = oEntry.CRC >> 24
+            data = ZipCryptoDecrypt(C2BIP3(zippassword), data, checkbyte)
+            if data == None:
+                raise RuntimeError('Bad password for file %r' % oEntry.filename)
+            data = data[12:]
+        data, complete = ZipDecompress(oEntry.compress_type, data, True)
+        if zlib.crc32(data) & 0xFFFFFFFF != oEntry.CRC:
+            raise Exception('Bad CRC-32 for file %r' % oEntry.filename)
+        return data
+
+# generator: yields (index, contained file) for the selected files; without option -s, the dump options that dump a single file stop after the first file
+def SelectZipMembers(oZipInfos, options):
+    counter = 0
+    for oZipInfo in oZipInfos:
+        counter += 1
+        if DecideToSelect(options.select, counter, oZipInfo.filename):
+            yield counter, oZipInfo
+            if options.select == '' and (options.dump or options.hexdump or options.asciidump):
+                break
+
 def ZIPDump(zipfilename, options, data=None):
     global decoders
     decoders = []
     LoadDecoders(options.decoders, options.decoderdir, True)
 
     FixPipe()
+    if options.centraldirectory:
+        ZIPDumpCentralDirectory(zipfilename, options, data)
+        return
+
     if data != None:
         oZipfile = CreateZipFileObject(DataIO(data), 'r')
     elif zipfilename == '':
@@ -5173,11 +5911,11 @@ def ZIPDump(zipfilename, options, data=None):
         return
 
     if options.passwordfile != '':
-        passwordfound = DictionaryAttack(options.passwordfile, oZipfile, fOut, False)
+        passwordfound = DictionaryAttack(options.passwordfile, oZipfile, fOut, False, options.jobs)
         if passwordfound != None:
             zippassword = passwordfound
     elif options.passwordfilestop != '':
-        DictionaryAttack(options.passwordfilestop, oZipfile, fOut, True)
+        DictionaryAttack(options.passwordfilestop, oZipfile, fOut, True, options.jobs)
         if fOut:
             fOut.close()
         return
@@ -5198,6 +5936,8 @@ def ZIPDump(zipfilename, options, data=None):
                         fWrite.write(data)
         return
 
+    oZipMembers = cZipMembers(oZipfile, options.threads)
+
     if options.yara != None:
         if not 'yara' in sys.modules:
             print('Error: option yara requires the YARA Python module.')
@@ -5206,18 +5946,14 @@ def ZIPDump(zipfilename, options, data=None):
 
     if options.dump or options.dumpall or options.hexdump or options.hexdumpall or options.asciidump or options.asciidumpall or options.translate != '':
         DumpFunction = SelectDumpFunction(options)
-        counter = 0
-        for oZipInfo in oZipfile.infolist():
-            counter += 1
-            if DecideToSelect(options.select, counter, oZipInfo.filename):
-                file = oZipfile.open(oZipInfo, 'r', C2BIP3(zippassword))
+        DumpChunkFunction = SelectDumpChunkFunction(options)
+        selected = ([ZipMemberSize(oZipInfo), (oZipMembers, oZipInfo, zippassword, DumpFunction, DumpChunkFunction, options.cut)] for counter, oZipInfo in SelectZipMembers(oZipfile.infolist(), options))
+        for dumps in MapThreads(DumpZipMember, selected, options.threads):
+            for dumped in dumps:
                 if options.output:
-                    fOut.write(DumpFunction(CutData(file.read(), options.cut)))
+                    fOut.write(dumped)
                 else:
-                    StdoutWriteChunked(DumpFunction(CutData(file.read(), options.cut)))
-                file.close()
-                if options.select == '' and (options.dump or options.hexdump or options.asciidump):
-                    break
+                    StdoutWriteChunked(dumped)
     else:
         if oZipfile.comment != b'':
             Print(oZipfile.comment, fOut)
@@ -5236,27 +5972,17 @@ def ZIPDump(zipfilename, options, data=None):
                 headers.extend(['Encrypted', 'Timestamp'])
         if not options.yarastringsraw:
             outputRows.append(headers)
-        counter = 0
-        for oZipInfo in oZipfile.infolist():
-            counter += 1
-            if DecideToSelect(options.select, counter, oZipInfo.filename):
-                file = oZipfile.open(oZipInfo, 'r', C2BIP3(zippassword))
-                filecontent = file.read()
-                file.close()
-                encrypted = oZipInfo.flag_bits & 1
-                timestamp = '%04d-%02d-%02d %02d:%02d:%02d' % oZipInfo.date_time
-                if options.yara == None:
-                    if options.extended:
-                        filehash, magicPrintable, magicHex, fileSize, entropy, countUniqueBytes, countNullByte, countControlBytes, countWhitespaceBytes, countPrintableBytes, countHighBytes = CalculateFileMetaData(filecontent)
-                        row = [oZipInfo.filename, encrypted, timestamp, filehash, fileSize, entropy, countUniqueBytes, magicHex, magicPrintable, countNullByte, countControlBytes, countWhitespaceBytes, countPrintableBytes, countHighBytes]
-                    else:
-                        row = [oZipInfo.filename, encrypted, timestamp]
-                    if options.zipfilename:
-                        row.insert(0, zipfilename)
-                    row.insert(0, counter)
-                    outputRows.append(row)
-                    outputExtraInfo.append(GenerateExtraInfo(options.extra, counter, zipfilename, oZipInfo.filename, encrypted, timestamp, filecontent))
-                else:
+        if options.yara == None:
+            selected = [[counter + 1, oZipInfo] for counter, oZipInfo in enumerate(oZipfile.infolist()) if DecideToSelect(options.select, counter + 1, oZipInfo.filename)]
+            for row, extrainfo in MapThreads(AnalyzeZipMember, [[ZipMemberSize(oZipInfo), (oZipMembers, oZipInfo, zippassword, counter, zipfilename, options)] for counter, oZipInfo in selected], options.threads):
+                outputRows.append(row)
+                outputExtraInfo.append(extrainfo)
+        else:
+            counter = 0
+            for oZipInfo in oZipfile.infolist():
+                counter += 1
+                if DecideToSelect(options.select, counter, oZipInfo.filename):
+                    filecontent = oZipMembers.Read(oZipInfo, zippassword)
                     oDecoders = [cIdentity(filecontent, None)]
                     for cDecoder in decoders:
                         try:
@@ -5266,6 +5992,7 @@ def ZIPDump(zipfilename, options, data=None):
                             print('Error instantiating decoder: %s' % cDecoder.name)
                             if options.verbose:
                                 raise e
+                            oZipMembers.Close()
                             return
                     for oDecoder in oDecoders:
                         while oDecoder.Available():
@@ -5290,19 +6017,80 @@ def ZIPDump(zipfilename, options, data=None):
 
         PrintOutput(outputRows, outputExtraInfo, options.extra, options.separator, QUOTE, fOut)
 
+    oZipMembers.Close()
     if fOut:
         fOut.close()
     oZipfile.close()
 
-def FindAll(data, sub):
-    result = []
-    start = 0
-    while True:
-        position = data.find(sub, start)
-        if position == -1:
-            return result
-        result.append(position)
-        start = position + 1
+# file listing and dump with the central directory read straight from disk: contained files are only read when they are selected for a dump or for options -e and -E
+def ZIPDumpCentralDirectory(zipfilename, options, data=None):
+    if data != None:
+        fZip = DataIO(data)
+    elif zipfilename == '':
+        if sys.platform == 'win32':
+            import msvcrt
+            msvcrt.setmode(sys.stdin.fileno(), os.O_BINARY)
+        if sys.version_info[0] > 2:
+            fZip = DataIO(sys.stdin.buffer.read())
+        else:
+            fZip = DataIO(sys.stdin.read())
+    else:
+        fZip = open(zipfilename, 'rb')
+    oCentralDirectory = cZipCentralDirectory(fZip)
+    zippassword = options.password
+
+    if options.output:
+        fOut = open(options.output, 'w')
+    else:
+        fOut = None
+
+    if options.dump or options.dumpall or options.hexdump or options.hexdumpall or options.asciidump or options.asciidumpall or options.translate != '':
+        DumpFunction = SelectDumpFunction(options)
+        DumpChunkFunction = SelectDumpChunkFunction(options)
+        selected = ([ZipMemberSize(oEntry), (oCentralDirectory, oEntry, zippassword, DumpFunction, DumpChunkFunction, options.cut)] for counter, oEntry in SelectZipMembers(oCentralDirectory.Entries(), options))
+        for dumps in MapThreads(DumpZipMember, selected, options.threads):
+            for dumped in dumps:
+                if options.output:
+                    fOut.write(dumped)
+                else:
+                    StdoutWriteChunked(dumped)
+    else:
+        if oCentralDirectory.comment != b'':
+            Print(oCentralDirectory.comment, fOut)
+        headers = ['Index']
+        if options.zipfilename:
+            headers.append('Zipfilename')
+        headers.append('Filename')
+        if options.extended:
+            headers.extend(['Encrypted', 'Timestamp', 'MD5', 'Filesize', 'Entropy', 'Unique bytes', 'Magic HEX', 'Magic ASCII', 'Null bytes', 'Control bytes', 'Whitespace bytes', 'Printable bytes', 'High bytes'])
+        else:
+            headers.extend(['Encrypted', 'Timestamp'])
+        if not options.extra.startswith('!') and not options.extra.startswith('#'):
+            PrintOutputRow(headers, '', options.extra, options.separator, QUOTE, fOut)
+        outputExtraInfo = ['']
+        selected = ([ZipMemberSize(oEntry), (oCentralDirectory, oEntry, zippassword, counter, zipfilename, options)] for counter, oEntry in SelectZipMembers(oCentralDirectory.Entries(), options))
+        for row, extrainfo in MapThreads(AnalyzeZipMember, selected, options.threads):
+            if options.extra.startswith('#'):
+                outputExtraInfo.append(extrainfo)
+            else:
+                PrintOutputRow(row, extrainfo, options.extra, options.separator, QUOTE, fOut)
+        if options.extra.startswith('#'):
+            PrintOutput([], outputExtraInfo, options.extra, options.separator, QUOTE, fOut)
+
+    oCentralDirectory.Close()
+    if fOut:
+        fOut.close()
+    fZip.close()
+
+oREPKRecord = re.compile(b'PK(?:\x03\x04|\x01\x02|\x05\x06|\x07\x08)')
+
+# generator: yields the position of each PK record signature, and of a truncated signature (PK) at the end of the data
+def FindPKRecords(data):
+    for oMatch in oREPKRecord.finditer(data):
+        yield oMatch.start()
+    position = data.find(b'PK', max(len(data) - 3, 0))
+    if position != -1:
+        yield position
 
 class cPKRecord(object):
     def GenerateExtraInfo(self, extra):
@@ -5349,8 +6137,9 @@ class cPKRecord(object):
             value = self.formatFormat[index] % self.fields[index]
         return '%s:%s' % (self.formatDescription[index], value)
 
+# data and extra are memoryview slices of the carved data (no copy)
 class cPKFILE(cPKRecord):
-    def __init__(self, data):
+    def __init__(self, data, position=0):
         self.fields = None
         self.data = None
         self.extra = None
@@ -5358,62 +6147,84 @@ class cPKFILE(cPKRecord):
         self.formatDescription = ['signature1', 'signature2', 'version', 'flags', 'compressiontype', 'filetime', 'filedate', 'crc', 'compressedsize', 'uncompressedsize', 'filenamelength', 'extrafieldlength']
         self.formatFormat = ['%04x', '%04x', '', '', 'dictionary', '%08x', '%08x', '%08x', '', '', '', '']
         formatLength = struct.calcsize(format)
-        dataFields = data[:formatLength]
-        if len(dataFields) == formatLength:
-            self.fields = struct.unpack(format, dataFields)
-            self.data = data[formatLength + self.fields[-2] + self.fields[-1]:formatLength + self.fields[-2] + self.fields[-1] + self.fields[8]]
-            self.extra = data[formatLength + self.fields[-2]:formatLength + self.fields[-2] + self.fields[-1]]
+        if len(data) - position >= formatLength:
+            self.fields = struct.unpack_from(format, data, position)
+            oView = memoryview(data)
+            start = position + formatLength + self.fields[-2]
+            self.data = oView[start + self.fields[-1]:start + self.fields[-1] + self.fields[8]]
+            self.extra = oView[start:start + self.fields[-1]]
 
 class cPKDIR(cPKRecord):
-    def __init__(self, data):
+    def __init__(self, data, position=0):
         self.fields = None
         self.data = None
         format = '<HHHHHHHHIIIHHHHHII'
         self.formatDescription = ['signature1', 'signature2', 'versionmadeby', 'versiontoextract', 'flags', 'compressiontype', 'filetime', 'filedate', 'crc', 'compressedsize', 'uncompressedsize', 'filenamelength', 'extrafieldlength', 'filecommentlength', 'disknumberstart', 'internalattributes', 'headeroffset']
         self.formatFormat = ['%04x', '%04x', '', '', '', 'dictionary', '%08x', '%08x', '%08x', '', '', '', '', '', '', '', '']
         formatLength = struct.calcsize(format)
-        dataFields = data[:formatLength]
-        if len(dataFields) == formatLength:
-            self.fields = struct.unpack(format, dataFields)
+        if len(data) - position >= formatLength:
+            self.fields = struct.unpack_from(format, data, position)
 
 #a# todo: add more record types - https://pkware.cachefly.net/webdocs/casestudies/APPNOTE.TXT
-def ParseZIPRecord(data):
-    if data[0:2] != b'PK':
+# parses the record at position in data, without copying the data that follows the record
+def ParseZIPRecord(data, position=0):
+    if data[position:position + 2] != b'PK':
         return None
+    remaining = len(data) - position
     magic = 'PK'
     extra = None
     oPKRecord = None
-    if len(data) >= 4:
-        magic += '%02x%02x' % (P23Ord(data[2]), P23Ord(data[3]))
-        if data[2:4] == b'\x03\x04':
+    if remaining >= 4:
+        signature = data[position + 2:position + 4]
+        magic += '%02x%02x' % (P23Ord(signature[0]), P23Ord(signature[1]))
+        if signature == b'\x03\x04':
             magic += ' fil'
-            oPKRecord = cPKFILE(data)
-            if len(data[26:28]) == 2:
-                length = struct.unpack('<H', data[26:28])[0]
-                filename = data[30:30 + length]
+            oPKRecord = cPKFILE(data, position)
+            if remaining >= 28:
+                length = struct.unpack_from('<H', data, position + 26)[0]
+                filename = data[position + 30:position + 30 + length]
                 if len(filename) == length:
                     magic += ' ' + repr(filename)
-        elif data[2:4] == b'\x01\x02':
+        elif signature == b'\x01\x02':
             magic += ' dir'
-            oPKRecord = cPKDIR(data)
-            if len(data[28:30]) == 2:
-                length = struct.unpack('<H', data[28:30])[0]
-                filename = data[46:46 + length]
+            oPKRecord = cPKDIR(data, position)
+            if remaining >= 30:
+                length = struct.unpack_from('<H', data, position + 28)[0]
+                filename = data[position + 46:position + 46 + length]
                 if len(filename) == length:
                     magic += ' ' + repr(filename)
-        elif data[2:4] == b'\x05\x06':
+        elif signature == b'\x05\x06':
             magic += ' end'
-            if len(data[20:22]) == 2:
-                length = struct.unpack('<H', data[20:22])[0]
+            if remaining >= 22:
+                length = struct.unpack_from('<H', data, position + 20)[0]
                 extra = 22 + length
             else:
-                extra = len(data)
-        elif data[2:4] == b'\x07\x08':
+                extra = remaining
+        elif signature == b'\x07\x08':
             magic += ' dsc'
         else:
             return None
     return magic, extra, oPKRecord
 
+# generator: yields [index, position, record, info, oPKRecord] for each record, as it is found; index is p for the data before the first record, s for the data after the last EOCD record, a number for EOCD records, and -1 for other records
+def ZIPRecords(data):
+    index = 1
+    last = None
+    for location in FindPKRecords(data):
+        info = ParseZIPRecord(data, location)
+        if info == None:
+            continue
+        if last == None and location != 0:
+            yield ['p', 0, 'data', location, None]
+        if info[0] == 'PK0506 end':
+            yield [index, location, info[0], info[1], info[2]]
+            index += 1
+        else:
+            yield [-1, location, info[0], info[1], info[2]]
+        last = [location, info]
+    if last != None and last[1][1] != None and last[0] + last[1][1] < len(data):
+        yield ['s', last[0] + last[1][1], 'data', len(data) - last[0] - last[1][1], None]
+
 def AnalyzeZIPRecord(data, options):
     DumpFunction = SelectDumpFunction(options)
 
@@ -5530,19 +6341,7 @@ def ParsePKRecordSelect(select):
 
 def ZIPFind(zipfilename, options):
     data = cBinaryFile(zipfilename, C2BIP3(options.password), True, True).read()
-    locations = [entry for entry in [[location, ParseZIPRecord(data[location:])] for location in FindAll(data, b'PK')] if entry[1] != None]
-    records = []
-    index = 1
-    if len(locations) > 0 and locations[0][0] != 0:
-        records.append(['p', 0, 'data', locations[0][0], None])
-    for location, info in locations:
-        if info[0] == 'PK0506 end':
-            records.append([index, location, info[0], info[1], info[2]])
-            index += 1
-        else:
-            records.append([-1, location, info[0], info[1], info[2]])
-    if len(locations) > 0 and locations[-1][1][1] != None and locations[-1][0] + locations[-1][1][1] < len(data):
-        records.append(['s', locations[-1][0] + locations[-1][1][1], 'data', len(data) - locations[-1][0] - locations[-1][1][1], None])
+    records = ZIPRecords(data)
     if options.find == 'list':
         index = 1
         overview = []
@@ -5598,9 +6397,9 @@ def ZIPFind(zipfilename, options):
                         DumpFunction = SelectDumpFunction(options)
                         dSelect = ParsePKRecordSelect(options.select)
                         if dSelect[PARSE_SELECT_SOURCE] == PARSE_SELECT_DATA:
-                            recordData = oPKRecord.data
+                            recordData = oPKRecord.data.tobytes()
                         elif dSelect[PARSE_SELECT_SOURCE] == PARSE_SELECT_EXTRA:
-                            recordData = oPKRecord.extra
+                            recordData = oPKRecord.extra.tobytes()
                         if dSelect[PARSE_SELECT_DECOMPRESS] and oPKRecord.fields[4] == 8:
                             recordData = zlib.decompress(recordData, -zlib.MAX_WBITS)
                         StdoutWriteChunked(DumpFunction(CutData(recordData, options.cut)))
@@ -5645,6 +6444,10 @@ def ValidateOptions(options):
                 print('Error: the value of the find option (-f) is invalid: %s' % options.find)
                 return True
 
+    if options.centraldirectory and (options.yara != None or options.jsonoutput or options.write != '' or options.passwordfile != '' or options.passwordfilestop != ''):
+        print('Error: option --centraldirectory can not be used with options -y, -j, -W, -P and --passwordfilestop')
+        return True
+
     if options.write != '':
         if not options.write in validWriteValues:
             print('Invalid write option: %s' % options.write)
@@ -5676,6 +6479,8 @@ def Main():
     oParser.add_option('-p', '--password', default='infected', help='The ZIP password to be used (default infected)')
     oParser.add_option('-P', '--passwordfile', default='', help='A file with ZIP passwords to be used in a dictionary attack; use . to use build-in list')
     oParser.add_option('--passwordfilestop', default='', help='A file with ZIP passwords to be used in a dictionary attack, stop after the attack; use . to use build-in list')
+    oParser.add_option('--jobs', type=int, default=1, help='Number of processes for the dictionary attack (default 1)')
+    oParser.add_option('--threads', type=int, default=1, help='Number of threads to decompress, hash and dump contained files (default 1)')
     oParser.add_option('-y', '--yara', help="YARA rule file (or directory or @file) to check files (YARA search doesn't work with -s option)")
     oParser.add_option('--yarastrings', action='store_true', default=False, help='Print YARA strings')
     oParser.add_option('--yarastringsraw', action='store_true', default=False, help='Print only YARA strings')
@@ -5691,6 +6496,7 @@ def Main():
     oParser.add_option('-f', '--find', type=str, default='', help='Find PK MAGIC sequence (use l or list for listing, number for selecting)')
     oParser.add_option('-i', '--info', action='store_true', default=False, help='display extra info')
     oParser.add_option('-W', '--write', type=str, default='', help='Write all files to disk')
+    oParser.add_option('--centraldirectory', action='store_true', default=False, help='List the central directory read straight from disk (for large ZIP files)')
     (options, args) = oParser.parse_args()
 
     if options.man: